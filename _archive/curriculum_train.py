@@ -1,61 +1,123 @@
 """
-Curriculum training: locomotion -> wood -> survival.
-Weights carry forward between stages. Phase 1: structure only; run locomotion stage only.
+Curriculum training: locomotion -> wood -> survival in one process (src/curriculum.py).
+Servers, connections and the PPO weights stay live across stages: each transition swaps the task
+on the running envs and resets them, which takes milliseconds. A stage advances once its metric
+(per step, averaged over the last --window episodes) reaches its threshold, or when its
+--stage-timesteps budget is spent.
 
-Planned flow:
-  1. Train locomotion -> save
-  2. Load model -> switch to wood task -> continue training -> save
-  3. Load model -> switch to survival task -> continue training -> save
+Usage:
+  python curriculum_train.py
+  python curriculum_train.py --n-envs 8 --stage-timesteps 100000 --save-path models/curriculum
+  python curriculum_train.py --stages wood survival --load-path models/locomotion.zip
+  python curriculum_train.py --vec-env mock --n-envs 256 --threshold locomotion=0.8 --threshold wood=1.2
 """
 
 import argparse
-import sys
-import time
 from pathlib import Path
 
-# When implementing full curriculum:
-# from stable_baselines3 import PPO
-# from src.environment import TerrariaEnv
-# from src.tasks import get_task
+from stable_baselines3 import PPO
+
+from src.curriculum import DEFAULT_STAGES, DEFAULT_WINDOW, CurriculumRunner, Stage
+from src.environment import TerrariaEnv
+from src.tasks import get_task
+
+# Root modules are importable once src is (src/__init__ puts the repo root on sys.path).
+from server_manager import MockServerManager, default_server_count
+from train import MOCK_SEED, make_vec_env
 
 PROJECT_ROOT = Path(__file__).resolve().parent
-DEFAULT_PORT = 8765
-MAX_EPISODE_STEPS = 10_000
+MAX_EPISODE_STEPS = 1_000
 STAGE_TIMESTEPS = 50_000
 
 
+def _stages(args: argparse.Namespace) -> list[Stage]:
+    defaults = {s.task: s for s in DEFAULT_STAGES}
+    thresholds = {}
+    for item in args.threshold:
+        name, _, value = item.partition("=")
+        if name not in defaults or not value:
+            raise SystemExit(f"--threshold expects STAGE=VALUE with STAGE in {list(defaults)}, got {item!r}")
+        thresholds[name] = None if value == "none" else float(value)
+    stages = []
+    for name in args.stages:
+        stage = defaults[name]._replace(timesteps=args.stage_timesteps)
+        if name in thresholds:
+            stage = stage._replace(threshold=thresholds[name])
+        stages.append(stage)
+    return stages
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Curriculum train (structure: locomotion -> wood -> survival).")
-    parser.add_argument("--stage", type=str, default="locomotion", choices=["locomotion", "wood", "survival"],
-                        help="Which stage to run (Phase 1: only locomotion is runnable)")
-    parser.add_argument("--timesteps", type=int, default=STAGE_TIMESTEPS)
-    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
-    parser.add_argument("--load-path", type=str, default=None, help="Load previous stage model (for future use)")
-    parser.add_argument("--save-path", type=str, default=None)
+    parser = argparse.ArgumentParser(description="Curriculum train (locomotion -> wood -> survival), in process.")
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        default=[s.task for s in DEFAULT_STAGES],
+        choices=[s.task for s in DEFAULT_STAGES],
+        help="Stages to run, in order",
+    )
+    parser.add_argument("--stage-timesteps", type=int, default=STAGE_TIMESTEPS, help="Timestep budget per stage")
+    parser.add_argument(
+        "--threshold",
+        action="append",
+        default=[],
+        metavar="STAGE=VALUE",
+        help="Override a stage's advance threshold ('none': always run the full budget)",
+    )
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Episodes averaged for the threshold")
+    parser.add_argument("--max-episode-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--n-envs", type=int, default=1)
+    parser.add_argument("--vec-env", choices=["socket", "shm", "mock"], default="socket", help="As in train.py")
+    parser.add_argument("--port", type=int, default=None, help="Use the server already running on this port")
+    parser.add_argument("--servers", type=int, default=None, help="Mock servers to start (default: one per core)")
+    parser.add_argument("--load-path", type=str, default=None, help="Start from this model instead of a fresh one")
+    parser.add_argument("--save-path", type=str, default=None, help="Directory for <stage>.zip after each stage")
     args = parser.parse_args()
+    stages = _stages(args)
+
+    servers = None
+    addresses = [("localhost", args.port)] * args.n_envs
+    if args.vec_env != "mock" and args.port is None:
+        servers = MockServerManager(args.servers or min(args.n_envs, default_server_count()))
+        servers.start()
+        addresses = servers.addresses(args.n_envs)
+    try:
+        task = get_task(stages[0].task, max_episode_steps=args.max_episode_steps)
+        if args.n_envs == 1 and args.vec_env != "mock":
+            host, port = addresses[0]
+            env = TerrariaEnv(host=host, port=port, max_episode_steps=args.max_episode_steps, task=task)
+        else:
+            # Seed each slot (slot i plays world MOCK_SEED + i) unless the server is someone else's.
+            seed = MOCK_SEED if args.port is None or args.vec_env == "mock" else None
+            env = make_vec_env(args.vec_env, task, addresses, max_episode_steps=args.max_episode_steps, seed=seed)
+        if args.load_path:
+            model = PPO.load(args.load_path, env=env)
+        else:
+            model = PPO("MlpPolicy", env, verbose=0, policy_kwargs=dict(net_arch=[64, 64]))
+
+        save_dir = Path(args.save_path) if args.save_path else None
+
+        def on_stage_end(stage: Stage, result) -> None:
+            outcome = "threshold reached" if result.advanced else "budget spent"
+            print(
+                f"[curriculum] {stage.task}: {result.timesteps} steps, {result.episodes} episodes, "
+                f"{stage.metric}/step={result.metric:.3f} ({outcome}); switch took {result.switch_ms:.1f} ms",
+                flush=True,
+            )
+            if save_dir is not None:
+                save_dir.mkdir(parents=True, exist_ok=True)
+                model.save(save_dir / stage.task)
 
-    # Phase 1: run locomotion stage only (same as train.py --task locomotion)
-    if args.stage == "locomotion":
-        from train import main as train_main
-        sys.argv = [
-            "train.py",
-            "--task", "locomotion",
-            "--timesteps", str(args.timesteps),
-            "--port", str(args.port),
-        ]
-        if args.save_path:
-            sys.argv.extend(["--save-path", args.save_path])
-        train_main()
-        return
-
-    # Future: load model, set env to next task, learn, save
-    # model = PPO.load(args.load_path)
-    # task = get_task(args.stage, max_episode_steps=MAX_EPISODE_STEPS)
-    # env = TerrariaEnv(port=args.port, task=task)
-    # model.set_env(env)
-    # model.learn(total_timesteps=args.timesteps)
-    # model.save(args.save_path or f"models/{args.stage}")
-    print("Only --stage locomotion is implemented in Phase 1. Use train.py for locomotion.")
+        runner = CurriculumRunner(
+            model, stages, max_episode_steps=args.max_episode_steps, window=args.window, on_stage_end=on_stage_end
+        )
+        runner.run()
+        if save_dir is not None:
+            print(f"Saved stage models to {save_dir}")
+        env.close()
+    finally:
+        if servers is not None:
+            servers.stop()
 
 
 if __name__ == "__main__":
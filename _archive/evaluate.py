@@ -1,63 +1,184 @@
 """
 Evaluate a saved PPO model: run deterministic policy, print episode reward, survival time, wood collected.
-Starts mock_server in a subprocess.
+Starts mock servers through server_manager.MockServerManager (not with --vec-env mock, or when
+--port names an already running server; that server gets one plain connection per env, no seed or
+batch commands).
+--n-envs K runs the episodes across K envs with one batched predict per step (src/evaluation.py);
+per-episode lines stream as episodes finish, then the means with confidence intervals.
+--record DIR also writes the transitions as a trajectory directory;
+--capture PATH appends the raw server replies to a capture file (replay_server.py serves it back).
+With K > 1 each env records to DIR/env<i> and PATH.<i>.
+--overlap splits the K envs into two groups and predicts for one while the other's step is in
+flight (src/rollout.py); the actions are the same as without it.
+--latency prints per-phase latency percentiles (policy, vec_step, and the env/client phases
+when envs are per-connection) at the end.
+Models trained with train.py --frame-stack K get their envs wrapped in FrameStackVecEnv(K), with
+K read from the model's observation space.
 """
 
 import argparse
-import subprocess
-import sys
-import time
+import functools
 from pathlib import Path
 
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv
 
+from src.client import TerrariaClient
 from src.environment import TerrariaEnv
+from src.evaluation import format_summary, iter_episodes, summarize
+from src.frame_stack import FrameStackVecEnv
+from src.rollout import DoubleBufferedVecEnv, split_groups
 from src.tasks import get_task
+from src.trajectory import TrajectoryWriter
+from src.vec_env import MockVecEnv, TerrariaVecEnv
+
+# Root modules are importable once src is (src/__init__ puts the repo root on sys.path).
+from latency import PhaseTimer
+from server_manager import MockServerManager, default_server_count
 
-PROJECT_ROOT = Path(__file__).resolve().parent
-DEFAULT_PORT = 8765
 MAX_EPISODE_STEPS = 10_000
 
 
+def _make_env(
+    i: int, args: argparse.Namespace, task, address: tuple[str, int], latency: PhaseTimer | None
+) -> TerrariaEnv | TrajectoryWriter:
+    capture = record = None
+    if args.capture:
+        capture = args.capture if args.n_envs == 1 else f"{args.capture}.{i}"
+    if args.record:
+        record = args.record if args.n_envs == 1 else str(Path(args.record) / f"env{i}")
+    client = TerrariaClient(host=address[0], port=address[1], capture=capture)
+    env = TerrariaEnv(max_episode_steps=MAX_EPISODE_STEPS, task=task, backend=client, latency=latency)
+    if record:
+        env = TrajectoryWriter(env, record)
+    return env
+
+
+def _stack_frames(env: VecEnv, k: int) -> VecEnv:
+    """
+    FrameStackVecEnv(k) around env (around each group of a DoubleBufferedVecEnv). Views, no copies:
+    iter_episodes hands each observation to predict before the env steps again.
+    """
+    if isinstance(env, DoubleBufferedVecEnv):
+        return DoubleBufferedVecEnv(*(FrameStackVecEnv(g, k, copy=False) for g in env.groups))
+    return FrameStackVecEnv(env, k, copy=False)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Evaluate saved PPO model.")
     parser.add_argument("--model-path", type=str, required=True, help="Path to model .zip")
     parser.add_argument("--task", type=str, default="locomotion", help="Task (must match training)")
     parser.add_argument("--episodes", type=int, default=5)
-    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--port", type=int, default=None, help="Use the server already running on this port")
+    parser.add_argument("--n-envs", type=int, default=1, help="Concurrent envs; one batched predict per step")
+    parser.add_argument(
+        "--vec-env",
+        choices=["socket", "mock"],
+        default="socket",
+        help="'socket': mock_server worlds on one connection; 'mock': in-process mock worlds (no server)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="World seed (world i uses seed + i)")
+    parser.add_argument("--record", type=str, default=None, help="Record transitions to this directory")
+    parser.add_argument("--capture", type=str, default=None, help="Append raw server replies to this capture file")
+    parser.add_argument("--latency", action="store_true", help="Print per-phase latency percentiles at the end")
+    parser.add_argument(
+        "--overlap", action="store_true", help="Two env groups: predict for one while the other steps"
+    )
     args = parser.parse_args()
+    if args.vec_env == "mock" and (args.record or args.capture):
+        parser.error("--record/--capture need server connections: use --vec-env socket")
+    if args.overlap and (args.n_envs < 2 or args.record or args.capture):
+        parser.error("--overlap needs --n-envs >= 2 and no --record/--capture")
 
-    proc = subprocess.Popen(
-        [sys.executable, "mock_server.py", str(args.port)],
-        cwd=PROJECT_ROOT,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
+    # Per-env connections (--record/--capture) get one server per core; the multiplexed env needs one.
+    # A server we didn't start (--port, e.g. the game) may not know the seed / batch commands:
+    # plain per-connection envs, unseeded.
+    external = args.vec_env != "mock" and args.port is not None
+    per_env = bool(args.record or args.capture or external)
+    servers = None
+    addresses = [("localhost", args.port)] * args.n_envs
+    if args.vec_env != "mock" and args.port is None:
+        servers = MockServerManager(min(args.n_envs, default_server_count()) if per_env else 1, seed=args.seed)
+        servers.start()
+        addresses = servers.addresses(args.n_envs)
     try:
-        time.sleep(0.5)
+        latency = PhaseTimer(step_phase="step_wait" if args.overlap else "vec_step") if args.latency else None
         model = PPO.load(args.model_path)
         task = get_task(args.task, max_episode_steps=MAX_EPISODE_STEPS)
-        env = TerrariaEnv(port=args.port, max_episode_steps=MAX_EPISODE_STEPS, task=task)
-
-        for ep in range(1, args.episodes + 1):
-            obs, info = env.reset()
-            total_reward = 0.0
-            done = False
-            while not done:
-                action, _ = model.predict(obs, deterministic=True)
-                obs, reward, terminated, truncated, info = env.step(int(action))
-                total_reward += reward
-                done = terminated or truncated
+        if args.overlap and args.vec_env == "mock":
+            env = split_groups(
+                lambda count, offset: MockVecEnv(
+                    count, max_episode_steps=MAX_EPISODE_STEPS, task=task, seed=args.seed + offset
+                ),
+                args.n_envs,
+            )
+        elif args.overlap and external:
+            env = split_groups(
+                lambda count, offset: TerrariaVecEnv(
+                    count,
+                    addresses=addresses[offset : offset + count],
+                    max_episode_steps=MAX_EPISODE_STEPS,
+                    task=task,
+                ),
+                args.n_envs,
+            )
+        elif args.overlap:
+            env = split_groups(
+                lambda count, offset: TerrariaVecEnv(
+                    count,
+                    host=addresses[0][0],
+                    port=addresses[0][1],
+                    max_episode_steps=MAX_EPISODE_STEPS,
+                    task=task,
+                    multiplex=True,
+                    seed=args.seed + offset,
+                ),
+                args.n_envs,
+            )
+        elif args.vec_env == "mock":
+            env = MockVecEnv(args.n_envs, max_episode_steps=MAX_EPISODE_STEPS, task=task, seed=args.seed)
+        elif per_env:
+            env = DummyVecEnv(
+                [functools.partial(_make_env, i, args, task, addresses[i], latency) for i in range(args.n_envs)]
+            )
+            if not external:
+                # Envs sharing a server would otherwise replay the same world: env i's first reset
+                # sends "reset seed+i", later episodes continue that stream.
+                env.seed(args.seed)
+        else:
+            env = TerrariaVecEnv(
+                args.n_envs,
+                host=addresses[0][0],
+                port=addresses[0][1],
+                max_episode_steps=MAX_EPISODE_STEPS,
+                task=task,
+                multiplex=True,
+                seed=args.seed,
+            )
+
+        frames = model.observation_space.shape[0] // env.observation_space.shape[0]
+        if frames > 1:
+            env = _stack_frames(env, frames)
+
+        def predict(obs):
+            return model.predict(obs, deterministic=True)[0]
 
+        results = []
+        for result in iter_episodes(predict, env, args.episodes, latency=latency):
+            results.append(result)
             print(
-                f"Episode {ep}: reward={total_reward:.1f} "
-                f"survival_time={info.get('survival_time', 0)} "
-                f"wood_collected={info.get('wood_collected', 0)}"
+                f"Episode {result.index + 1} (env {result.env}): reward={result.total_reward:.1f} "
+                f"survival_time={result.survival_time} "
+                f"wood_collected={result.wood_collected}",
+                flush=True,
             )
+        print(format_summary(summarize(results), len(results)))
+        if latency is not None:
+            print(latency.format())
         env.close()
     finally:
-        proc.terminate()
-        proc.wait(timeout=2)
+        if servers is not None:
+            servers.stop()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,13 @@
 """Terraria RL environment package."""
 
+import sys
+from pathlib import Path
+
+# Bridge modules shared with the root scripts (framing, mock_server, ...) live at the repo root.
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
 from src.environment import TerrariaEnv
 from src.tasks import get_task
 
@@ -0,0 +1,98 @@
+"""
+Async multi-env driver: steps K Terraria connections concurrently on one event loop.
+Each slot behaves like a TerrariaEnv (same observation vector, task-driven reward/done/info),
+but all K round trips overlap instead of running one after another or in K threads.
+
+Usage:
+  driver = AsyncEnvDriver([("127.0.0.1", 8765)] * 32, task=get_task("locomotion"))
+  obs, infos = await driver.reset()
+  obs, rewards, terminated, truncated, infos = await driver.step(actions)
+"""
+
+import asyncio
+from typing import Any, Sequence
+
+import numpy as np
+
+from async_client import AsyncBridgeClient
+from src.environment import MAX_EPISODE_STEPS, NUM_ACTIONS, default_encoder
+from src.observation import ObservationEncoder
+from src.tasks.base_task import BaseTask
+
+
+class AsyncEnvDriver:
+    """
+    K TerrariaEnv-equivalent slots over AsyncBridgeClient connections.
+    Episodes do not auto-reset: call reset(indices) for slots that reported done.
+    A slot whose request timed out is disconnected; reset(indices) reconnects it.
+    """
+
+    def __init__(
+        self,
+        addresses: Sequence[tuple[str, int]],
+        task: BaseTask | None = None,
+        max_episode_steps: int = MAX_EPISODE_STEPS,
+        timeout: float | None = 30.0,
+        encoder: ObservationEncoder | None = None,
+    ):
+        if task is None:
+            raise ValueError("task must be a BaseTask instance (e.g. get_task('locomotion')).")
+        self.task = task
+        self.encoder = encoder or default_encoder()
+        self.max_episode_steps = max_episode_steps
+        self.clients = [AsyncBridgeClient(host=h, port=p, timeout=timeout) for h, p in addresses]
+        self.num_envs = len(self.clients)
+        self._states: list[dict[str, Any] | None] = [None] * self.num_envs
+        self._step_counts = np.zeros(self.num_envs, dtype=np.int64)
+        self._episode_rewards = np.zeros(self.num_envs, dtype=np.float64)
+        self._obs = np.zeros((self.num_envs, self.encoder.dim), dtype=np.float32)
+
+    async def connect(self) -> None:
+        await asyncio.gather(*(c.connect() for c in self.clients))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(c.close() for c in self.clients))
+
+    async def reset(self, indices: Sequence[int] | None = None) -> tuple[np.ndarray, list[dict]]:
+        """Start new episodes for the given slots (all by default). Returns (obs, infos) for those slots."""
+        idx = list(range(self.num_envs)) if indices is None else list(indices)
+        await asyncio.gather(*(self.clients[i].connect() for i in idx))
+        states = await asyncio.gather(*(self.clients[i].reset() for i in idx))
+        infos = []
+        for i, state in zip(idx, states):
+            self._states[i] = state
+            self._step_counts[i] = 0
+            self._episode_rewards[i] = 0.0
+            self.encoder.encode_row(state, self._obs, i)
+            infos.append(self.task.get_info(state, 0.0, 0))
+        return self._obs[idx].copy(), infos
+
+    async def step(
+        self,
+        actions: Sequence[int],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        """Send one action per slot concurrently; returns batched (obs, rewards, terminated, truncated, infos)."""
+        if any(s is None for s in self._states):
+            raise RuntimeError("Call reset() before step()")
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+        actions = [int(a) if 0 <= int(a) < NUM_ACTIONS else 6 for a in actions]
+        next_states = await asyncio.gather(*(c.send_action(a) for c, a in zip(self.clients, actions)))
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for i, next_state in enumerate(next_states):
+            prev_state = self._states[i]
+            self._states[i] = next_state
+            self._step_counts[i] += 1
+            step_count = int(self._step_counts[i])
+            events = next_state.get("last_reward_events", {})
+            reward = self.task.compute_reward(prev_state, next_state, events)
+            self._episode_rewards[i] += reward
+            rewards[i] = reward
+            terminated[i] = self.task.check_done(next_state, step_count, self.max_episode_steps)
+            infos.append(self.task.get_info(next_state, float(self._episode_rewards[i]), step_count))
+            self.encoder.encode_row(next_state, self._obs, i)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        return self._obs.copy(), rewards, terminated, truncated, infos
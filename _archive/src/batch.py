@@ -0,0 +1,51 @@
+"""
+Structured NumPy layout for batches of server states and reward events.
+Used by the batched task API (BaseTask.compute_reward_batch / check_done_batch) and vector envs.
+"""
+
+from typing import Any, Sequence
+
+import numpy as np
+
+from reward_events import events_to_mask, mask_to_events
+
+# Scalar state fields carried in a batch row (server state schema; see README).
+STATE_FIELDS = [
+    "player_x",
+    "player_y",
+    "health",
+    "wood_count",
+    "is_night",
+    "enemy_distance",
+    "enemy_count",
+    "time_of_day",
+    "has_shelter",
+    "step_count",
+]
+
+STATE_DTYPE = np.dtype([(k, np.float64) for k in STATE_FIELDS])
+
+# Event bitmasks: reward_events.EVENT_BITS (the binary wire format uses the same bits).
+EVENT_DTYPE = np.uint32
+
+
+def write_state_row(state: dict[str, Any], out: np.ndarray, i: int) -> None:
+    """Write one state dict into row i of a STATE_DTYPE array."""
+    out[i] = tuple(float(state.get(k, 0)) for k in STATE_FIELDS)
+
+
+def states_to_struct(states: Sequence[dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Convert state dicts to (STATE_DTYPE array, event mask array)."""
+    arr = np.zeros(len(states), dtype=STATE_DTYPE)
+    events = np.zeros(len(states), dtype=EVENT_DTYPE)
+    for i, state in enumerate(states):
+        write_state_row(state, arr, i)
+        events[i] = events_to_mask(state.get("last_reward_events"))
+    return arr, events
+
+
+def row_to_state(row: np.void, mask: int = 0) -> dict[str, Any]:
+    """Rebuild a state dict from one STATE_DTYPE row (for the scalar fallback path)."""
+    state: dict[str, Any] = {k: row[k].item() for k in STATE_FIELDS}
+    state["last_reward_events"] = mask_to_events(int(mask))
+    return state
@@ -1,7 +1,7 @@
 """
 Persistent TCP socket client for Terraria tModLoader RL mod.
 Connects to localhost:8765, receives JSON state messages, sends JSON action messages.
-Uses only standard library: socket, json, time.
+Uses only standard library: socket, json, time (plus the shared framing and connection_pool modules).
 """
 
 import json
@@ -9,11 +9,18 @@ import socket
 import time
 from typing import Any
 
+from connection_pool import ConnectionPool, backoff_delay
+from capture import CaptureWriter
+from delta_protocol import KEYFRAME_COMMAND, DeltaDecoder, delta_request, is_delta_message
+from framing import LineFramer
+from latency import PhaseTimer
+
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 8765
 DEFAULT_TIMEOUT = 30.0
 RECONNECT_ATTEMPTS = 5
-RECONNECT_DELAY_SEC = 1.0
+RECONNECT_DELAY_SEC = 1.0  # backoff base: retry n waits up to min(RECONNECT_DELAY_MAX, base * 2**n)
+RECONNECT_DELAY_MAX = 10.0
 
 
 class TerrariaClient:
@@ -21,9 +28,19 @@ class TerrariaClient:
     Persistent TCP client for Terraria RL environment.
     - connect(): establish connection (idempotent if already connected).
     - receive_state(): read one newline-terminated JSON state from server.
-    - send_action(action: int): send {"action": action} as JSON line.
+    - get_state(): send "state", return the current state.
+    - reset(seed=None): send "reset [seed]", return the fresh state of a new episode.
+    - send_action(action: int): send {"action_id": action} as JSON line, return the resulting state.
+    - send_action_sequence(actions, all_states): several actions in one round trip (frame skip).
     - close(): close the connection.
-    Reconnects automatically on connection loss when receive_state/send_action are used.
+    Reconnects automatically on connection loss when receive_state/get_state/send_action are used,
+    with exponential backoff and jitter between attempts. standby=N keeps N pre-connected sockets
+    warm (connection_pool.ConnectionPool) so a dropped connection is replaced without waiting;
+    metrics() reports reconnects and downtime.
+    delta=N asks the server for delta-encoded replies (keyframe every N); full states are
+    rebuilt locally and a sequence gap triggers a keyframe request (delta_protocol).
+    capture=PATH appends every received message to a capture file (capture.py) for replay_server.py.
+    latency=PhaseTimer records "send", "recv" (waiting for and framing the reply) and "decode" times.
     """
 
     def __init__(
@@ -33,13 +50,30 @@ class TerrariaClient:
         timeout: float = DEFAULT_TIMEOUT,
         reconnect_attempts: int = RECONNECT_ATTEMPTS,
         reconnect_delay: float = RECONNECT_DELAY_SEC,
+        delta: int = 0,
+        standby: int = 0,
+        capture: str | None = None,
+        latency: PhaseTimer | None = None,
     ):
         self.host = host
         self.port = port
         self.timeout = timeout
         self.reconnect_attempts = reconnect_attempts
         self.reconnect_delay = reconnect_delay
+        self.delta = delta
+        self.delta_gaps = 0
+        self.standby = standby
+        self.reconnects = 0
+        self.downtime_total = 0.0
+        self.downtime_max = 0.0
+        self._down_since: float | None = None
+        self._pool: ConnectionPool | None = None
+        self._decoder: DeltaDecoder | None = None
+        self.capture = capture
+        self._capture: CaptureWriter | None = None
+        self.latency = latency
         self._sock: socket.socket | None = None
+        self._framer: LineFramer | None = None
 
     def connect(self) -> None:
         """Open a persistent TCP connection to the server. Idempotent if already connected."""
@@ -49,21 +83,60 @@ class TerrariaClient:
                 return
             except OSError:
                 self._sock = None
-        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._sock.settimeout(self.timeout)
-        self._sock.connect((self.host, self.port))
+        if self.standby > 0:
+            if self._pool is None:
+                self._pool = ConnectionPool(self.host, self.port, timeout=self.timeout, standby=self.standby)
+            self._sock = self._pool.acquire()
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            self._sock.connect((self.host, self.port))
+        if self.capture and self._capture is None:
+            self._capture = CaptureWriter(self.capture)
+        self._framer = LineFramer(self._sock, capture=self._capture)
+        self._decoder = None
         print(f"[TerrariaClient] Connected to {self.host}:{self.port}")
+        if self.delta > 0:
+            self._sock.sendall(delta_request(self.delta))
+            msg = json.loads(self._recv_line())
+            if is_delta_message(msg):
+                self._decoder = DeltaDecoder()
+                self._decoder.decode(msg)
+        if self._down_since is not None:
+            down = time.monotonic() - self._down_since
+            self._down_since = None
+            self.reconnects += 1
+            self.downtime_total += down
+            self.downtime_max = max(self.downtime_max, down)
 
     def close(self) -> None:
-        """Close the connection."""
+        """Close the connection (and the standby pool, if any)."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._capture is not None:
+            self._capture.close()
+            self._capture = None
         if self._sock is not None:
             try:
                 self._sock.close()
             except OSError:
                 pass
             self._sock = None
+            self._framer = None
             print("[TerrariaClient] Connection closed")
 
+    def metrics(self) -> dict[str, Any]:
+        """Reconnect count and downtime (seconds from a failed request to the next working connection)."""
+        metrics: dict[str, Any] = {
+            "reconnects": self.reconnects,
+            "downtime_total": self.downtime_total,
+            "downtime_max": self.downtime_max,
+        }
+        if self._pool is not None:
+            metrics.update(self._pool.metrics())
+        return metrics
+
     def _is_connected(self) -> bool:
         if self._sock is None:
             return False
@@ -73,25 +146,55 @@ class TerrariaClient:
         except OSError:
             return False
 
+    def _connection_failed(self, name: str, attempt: int, err: Exception) -> None:
+        """
+        Drop the broken socket before a retry. With a standby pool the next connect() swaps in a
+        warm socket right away; otherwise wait an exponential backoff with jitter first.
+        """
+        if self._down_since is None:
+            self._down_since = time.monotonic()
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._framer = None
+        if attempt >= self.reconnect_attempts - 1:
+            return
+        if self._pool is not None:
+            print(f"[TerrariaClient] {name} failed (attempt {attempt + 1}): {err}; switching to standby connection")
+            return
+        delay = backoff_delay(attempt, self.reconnect_delay, RECONNECT_DELAY_MAX)
+        print(f"[TerrariaClient] {name} failed (attempt {attempt + 1}): {err}; reconnecting in {delay:.2f}s")
+        time.sleep(delay)
+
     def _recv_line(self) -> str:
         """Receive a newline-terminated line. Raises ConnectionError if not connected or connection closed."""
-        if self._sock is None:
+        if self._sock is None or self._framer is None:
             raise ConnectionError("Not connected")
-        buf = []
-        while True:
-            b = self._sock.recv(1)
-            if not b:
-                raise ConnectionError("Connection closed by server")
-            if b == b"\n":
-                break
-            buf.append(b)
-        return b"".join(buf).decode("utf-8")
+        lat = self.latency
+        if lat is None:
+            line = self._framer.readline()
+        else:
+            t0 = time.perf_counter_ns()
+            line = self._framer.readline()
+            lat.record("recv", time.perf_counter_ns() - t0)
+        if line is None:
+            raise ConnectionError("Connection closed by server")
+        return line.decode("utf-8")
 
     def _send_line(self, line: str) -> None:
         """Send a newline-terminated line. Raises ConnectionError if not connected."""
         if self._sock is None:
             raise ConnectionError("Not connected")
+        lat = self.latency
+        if lat is None:
+            self._sock.sendall((line + "\n").encode("utf-8"))
+            return
+        t0 = time.perf_counter_ns()
         self._sock.sendall((line + "\n").encode("utf-8"))
+        lat.record("send", time.perf_counter_ns() - t0)
 
     def receive_state(self) -> dict[str, Any]:
         """
@@ -103,39 +206,76 @@ class TerrariaClient:
             try:
                 if not self._is_connected():
                     self.connect()
-                raw = self._recv_line()
-                state = json.loads(raw)
-                return state
+                return self._decode(self._recv_line())[0]
             except (ConnectionError, json.JSONDecodeError, OSError, socket.timeout) as e:
                 last_err = e
-                self._sock = None
-                if attempt < self.reconnect_attempts - 1:
-                    print(f"[TerrariaClient] receive_state failed (attempt {attempt + 1}): {e}; reconnecting in {self.reconnect_delay}s")
-                    time.sleep(self.reconnect_delay)
+                self._connection_failed("receive_state", attempt, e)
         raise ConnectionError(f"receive_state failed after {self.reconnect_attempts} attempts") from last_err
 
-    def send_action(self, action: int) -> None:
+    def _request(self, line: str, name: str) -> dict[str, Any]:
         """
-        Send a JSON action message: {"action": action}.
-        On connection failure, attempts reconnect up to reconnect_attempts times.
+        Send one request line and receive the JSON state it produces.
+        On connection failure, reconnects and resends, up to reconnect_attempts times.
         """
-        action = int(action)
-        payload = json.dumps({"action": action})
         last_err: Exception | None = None
         for attempt in range(self.reconnect_attempts):
             try:
                 if not self._is_connected():
                     self.connect()
-                self._send_line(payload)
-                return
-            except (ConnectionError, OSError, socket.timeout) as e:
+                self._send_line(line)
+                state, gap = self._decode(self._recv_line())
+                if gap:
+                    self._send_line(KEYFRAME_COMMAND)
+                    state, _ = self._decode(self._recv_line())
+                return state
+            except (ConnectionError, json.JSONDecodeError, OSError, socket.timeout) as e:
                 last_err = e
-                self._sock = None
-                if attempt < self.reconnect_attempts - 1:
-                    print(f"[TerrariaClient] send_action failed (attempt {attempt + 1}): {e}; reconnecting in {self.reconnect_delay}s")
-                    time.sleep(self.reconnect_delay)
-        raise ConnectionError(f"send_action failed after {self.reconnect_attempts} attempts") from last_err
+                self._connection_failed(name, attempt, e)
+        raise ConnectionError(f"{name} failed after {self.reconnect_attempts} attempts") from last_err
+
+    def _decode(self, raw: str) -> tuple[dict[str, Any], bool]:
+        """Parse a reply line into a full state; (state, gap) where gap flags a missed delta."""
+        lat = self.latency
+        if lat is None:
+            msg = json.loads(raw)
+        else:
+            t0 = time.perf_counter_ns()
+            msg = json.loads(raw)
+            lat.record("decode", time.perf_counter_ns() - t0)
+        if self._decoder is None or not is_delta_message(msg):
+            return msg, False
+        state, gap = self._decoder.decode(msg)
+        if gap:
+            self.delta_gaps += 1
+        return state, gap
+
+    def send_action(self, action: int) -> dict[str, Any]:
+        """
+        Send a JSON action message {"action_id": action} and return the resulting state.
+        On connection failure, attempts reconnect up to reconnect_attempts times.
+        """
+        return self._request(json.dumps({"action_id": int(action)}), "send_action")
+
+    def send_action_sequence(self, actions: list[int], all_states: bool = False) -> dict[str, Any] | list[dict[str, Any]]:
+        """
+        Send {"actions": [...]} so the server applies them in order (frame skip) in one round trip.
+        Returns the final state, or one state per action if all_states.
+        """
+        reply = self._request(
+            json.dumps({"actions": [int(a) for a in actions], "return": "all" if all_states else "final"}),
+            "send_action_sequence",
+        )
+        if not all_states:
+            return reply
+        states = reply.get("states") or []
+        if len(states) != len(actions):
+            raise ConnectionError(f"Expected {len(actions)} states in sequence reply, got {len(states)}")
+        return states
+
+    def reset(self, seed: int | None = None) -> dict[str, Any]:
+        """Start a new episode server-side ('reset' / 'reset S') and return its fresh state."""
+        return self._request("reset" if seed is None else f"reset {int(seed)}", "reset")
 
     def get_state(self) -> dict[str, Any]:
-        """Alias for receive_state to match environment interface."""
-        return self.receive_state()
+        """Request the current state (send 'state') and return it."""
+        return self._request("state", "get_state")
@@ -0,0 +1,145 @@
+"""
+In-process curriculum: one model, one env, tasks swapped in place (locomotion -> wood -> survival).
+
+CurriculumRunner trains an SB3 model through a list of Stages. Between stages nothing restarts:
+set_task() swaps the BaseTask on the live env (connections and servers stay up), one reset starts
+fresh episodes under the new task, and the weights stay in memory. A stage ends when its metric,
+averaged over the last `window` finished episodes, reaches the stage threshold (StageCallback stops
+model.learn), or when its timestep budget runs out.
+
+Metrics are per-step rates, info[metric] / info["episode_length"], so thresholds don't depend on
+the episode length. Stage budgets are rounded up to whole rollouts by learn().
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Callable, NamedTuple, Sequence
+
+import numpy as np
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.callbacks import BaseCallback
+
+from src.tasks import get_task
+from src.tasks.base_task import BaseTask
+
+DEFAULT_WINDOW = 20
+
+
+class Stage(NamedTuple):
+    task: str  # get_task name
+    timesteps: int  # budget
+    metric: str = "total_reward"  # info key, divided by episode_length
+    threshold: float | None = None  # advance once the window mean reaches this; None: run the whole budget
+
+
+DEFAULT_STAGES = (
+    Stage("locomotion", 50_000, "total_reward", 0.5),  # net distance right per step
+    Stage("wood", 50_000, "total_reward", 1.0),  # wood per step (1 reward per wood; every env reports total_reward)
+    Stage("survival", 50_000),
+)
+
+
+class StageResult(NamedTuple):
+    task: str
+    timesteps: int  # trained in this stage
+    episodes: int  # finished in this stage
+    metric: float  # window mean when the stage ended (nan before any episode finished)
+    advanced: bool  # threshold reached (False: budget ran out)
+    switch_ms: float  # set_task + reset
+
+
+def set_task(env: Any, task: BaseTask) -> None:
+    """
+    Swap the task on a live env: TerrariaEnv, TerrariaVecEnv / MockVecEnv, SharedMemoryVecEnv and
+    DoubleBufferedVecEnv have set_task(); other VecEnvs (e.g. SB3's DummyVecEnv over TerrariaEnvs)
+    get it through env_method.
+    """
+    if hasattr(env, "set_task"):
+        env.set_task(task)
+    else:
+        env.env_method("set_task", task)
+
+
+class StageCallback(BaseCallback):
+    """Keeps the last `window` per-step metric values of finished episodes; stops learn() at the threshold."""
+
+    def __init__(self, metric: str, threshold: float | None, window: int = DEFAULT_WINDOW):
+        super().__init__()
+        self.metric = metric
+        self.threshold = threshold
+        self.values: deque[float] = deque(maxlen=window)
+        self.episodes = 0
+
+    @property
+    def mean(self) -> float:
+        return float(np.mean(self.values)) if self.values else math.nan
+
+    @property
+    def reached(self) -> bool:
+        return (
+            self.threshold is not None
+            and len(self.values) == self.values.maxlen
+            and self.mean >= self.threshold
+        )
+
+    def _on_step(self) -> bool:
+        for done, info in zip(self.locals["dones"], self.locals["infos"]):
+            if done and self.metric in info:
+                self.episodes += 1
+                self.values.append(info[self.metric] / max(1, info.get("episode_length", 1)))
+        return not self.reached
+
+
+class CurriculumRunner:
+    """
+    Trains model (its env set, e.g. PPO("MlpPolicy", env)) through stages in order.
+    run() returns one StageResult per stage; on_stage_end(stage, result), if given, is called
+    after each stage (e.g. to save a checkpoint). The model's timestep count carries across stages.
+    """
+
+    def __init__(
+        self,
+        model: BaseAlgorithm,
+        stages: Sequence[Stage] = DEFAULT_STAGES,
+        max_episode_steps: int = 10_000,
+        window: int = DEFAULT_WINDOW,
+        on_stage_end: Callable[[Stage, StageResult], Any] | None = None,
+    ):
+        if model.get_env() is None:
+            raise ValueError("model needs an env (pass it to the constructor or use set_env)")
+        self.model = model
+        self.stages = list(stages)
+        self.max_episode_steps = max_episode_steps
+        self.window = window
+        self.on_stage_end = on_stage_end
+
+    def switch(self, name: str) -> float:
+        """Put the env on task `name` and start fresh episodes; returns the time taken in ms."""
+        env = self.model.get_env()
+        t0 = time.perf_counter()
+        set_task(env, get_task(name, max_episode_steps=self.max_episode_steps))
+        # learn(reset_num_timesteps=False) continues from _last_obs; point it at the new episodes.
+        self.model._last_obs = env.reset()
+        self.model._last_episode_starts = np.ones((env.num_envs,), dtype=bool)
+        return (time.perf_counter() - t0) * 1e3
+
+    def run(self) -> list[StageResult]:
+        results = []
+        for stage in self.stages:
+            switch_ms = self.switch(stage.task)
+            callback = StageCallback(stage.metric, stage.threshold, self.window)
+            start = self.model.num_timesteps
+            self.model.learn(stage.timesteps, callback=callback, reset_num_timesteps=False)
+            result = StageResult(
+                stage.task,
+                self.model.num_timesteps - start,
+                callback.episodes,
+                callback.mean,
+                callback.reached,
+                switch_ms,
+            )
+            results.append(result)
+            if self.on_stage_end is not None:
+                self.on_stage_end(stage, result)
+        return results
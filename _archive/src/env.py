@@ -47,7 +47,7 @@ class TerrariaEnv:
         Returns (state, info).
         """
         self._client.connect()
-        state = self._client.receive_state()
+        state = self._client.get_state()
         self._state = state
         info = self._info_from_state(state, step_reward=0.0)
         print(f"[TerrariaEnv] reset() -> state keys: {list(state.keys())}")
@@ -60,8 +60,7 @@ class TerrariaEnv:
         if self._state is None:
             raise RuntimeError("Call reset() before step()")
         action = int(action)
-        self._client.send_action(action)
-        next_state = self._client.receive_state()
+        next_state = self._client.send_action(action)
         reward = next_state.get("reward", 0.0)
         done = next_state.get("done", False)
         self._state = next_state
@@ -3,12 +3,15 @@ Gym-style Terraria environment: reset(), step(action), structured observation.
 Reward, done, and info are delegated to the task object.
 """
 
+import time
 import numpy as np
 from typing import Any
 
 import gymnasium as gym
 
+from latency import PhaseTimer
 from src.client import TerrariaClient
+from src.observation import ObservationEncoder
 from src.tasks.base_task import BaseTask
 
 
@@ -42,10 +45,28 @@ def _state_to_obs(state: dict[str, Any]) -> np.ndarray:
     return np.array(vals, dtype=np.float32)
 
 
+def default_encoder() -> ObservationEncoder:
+    """Encoder for the standard OBS_KEYS layout with OBS_LOW/OBS_HIGH bounds."""
+    return ObservationEncoder(OBS_KEYS, low=OBS_LOW, high=OBS_HIGH)
+
+
 class TerrariaEnv(gym.Env):
     """
     Generic Terraria env: task controls reward, termination, and info.
     reset() -> (obs, info); step(action) -> (obs, reward, terminated, truncated, info).
+    backend: anything with TerrariaClient's reset/send_action/close (e.g. an in-process
+    src.mock_backend.MockBackend); defaults to a TerrariaClient on host:port. reset() sends a bare
+    "reset" (client.reset()) unless given a seed.
+    frame_skip: repeat each action this many frames; reward is summed over the frames, step counts
+    are in frames, and the step stops at the first frame that ends the episode.
+    action_sequences: send the frame_skip repeats as one action-sequence command
+    (send_action_sequence, one round trip) instead of frame_skip single actions; only for servers
+    that support it, such as mock_server.py and MockBackend.
+    latency: a latency.PhaseTimer to record "client" (the round trip), "task" (compute_reward +
+    check_done), "info", "obs", "step" and "reset" times; it is handed to the client too, and its
+    report (if any) gets a summary at the end of each episode. None (default) adds no timing.
+    set_task(task) swaps the task on the live env (the connection stays open); the running
+    episode continues under the new task, so reset() for a clean start.
     """
 
     def __init__(
@@ -54,21 +75,34 @@ class TerrariaEnv(gym.Env):
         port: int = 8765,
         max_episode_steps: int = MAX_EPISODE_STEPS,
         task: BaseTask | None = None,
+        encoder: ObservationEncoder | None = None,
+        backend: Any = None,
+        frame_skip: int = 1,
+        latency: PhaseTimer | None = None,
+        action_sequences: bool = False,
     ):
         if task is None:
             raise ValueError("task must be a BaseTask instance (e.g. get_task('locomotion')).")
         super().__init__()
-        self.client = TerrariaClient(host=host, port=port)
+        self.client = backend if backend is not None else TerrariaClient(host=host, port=port)
+        if frame_skip < 1:
+            raise ValueError("frame_skip must be >= 1")
         self.max_episode_steps = max_episode_steps
+        self.frame_skip = frame_skip
+        self.action_sequences = action_sequences
         self.task = task
+        self.encoder = encoder or default_encoder()
+        self.latency = latency
+        if latency is not None and hasattr(self.client, "latency"):
+            self.client.latency = latency  # the client splits "client" into send / recv / decode
         self._state: dict[str, Any] | None = None
         self._step_count = 0
         self._episode_reward = 0.0
 
         self.observation_space = gym.spaces.Box(
-            low=OBS_LOW,
-            high=OBS_HIGH,
-            shape=(len(OBS_KEYS),),
+            low=self.encoder.low,
+            high=self.encoder.high,
+            shape=(self.encoder.dim,),
             dtype=np.float32,
         )
         self.action_space = gym.spaces.Discrete(NUM_ACTIONS)
@@ -78,16 +112,30 @@ class TerrariaEnv(gym.Env):
         seed: int | None = None,
         options: dict | None = None,
     ) -> tuple[np.ndarray, dict]:
+        super().reset(seed=seed)
+        lat = self.latency
+        t0 = time.perf_counter_ns() if lat is not None else 0
         self._step_count = 0
         self._episode_reward = 0.0
-        state = self.client.get_state()
+        # fresh episode server-side, in one round trip
+        state = self.client.reset() if seed is None else self.client.reset(seed)
         if state is None:
             raise RuntimeError("Failed to get initial state from server (is mock_server running?)")
         self._state = state
-        obs = _state_to_obs(state)
+        obs = self.encoder.encode(state)
         info = self.task.get_info(state, 0.0, 0)
+        if lat is not None:
+            lat.record("reset", time.perf_counter_ns() - t0)
         return obs, info
 
+    def set_task(self, task: BaseTask) -> None:
+        self.task = task
+
+    @property
+    def state(self) -> dict[str, Any] | None:
+        """The latest server state (read-only by convention), e.g. for recorders reading events."""
+        return self._state
+
     def step(
         self,
         action: int,
@@ -98,25 +146,52 @@ class TerrariaEnv(gym.Env):
         if not 0 <= action < NUM_ACTIONS:
             action = 6
 
-        prev_state = dict(self._state)
-        next_state = self.client.send_action(action)
-        if next_state is None:
+        lat = self.latency
+        t0 = time.perf_counter_ns() if lat is not None else 0
+        prev_state = self._state  # states are fresh dicts from the client; never mutated
+        if self.frame_skip == 1:
+            next_states = [self.client.send_action(action)]
+        elif self.action_sequences:
+            next_states = self.client.send_action_sequence([action] * self.frame_skip, all_states=True)
+        else:
+            next_states = [self.client.send_action(action) for _ in range(self.frame_skip)]
+        if not next_states or next_states[0] is None:
             raise RuntimeError("Failed to get state after action (connection lost?)")
-
+        if lat is not None:
+            t1 = time.perf_counter_ns()
+            lat.record("client", t1 - t0)
+
+        reward = 0.0
+        done = False
+        for next_state in next_states:
+            self._step_count += 1
+            events = next_state.get("last_reward_events", {})
+            reward += self.task.compute_reward(prev_state, next_state, events)
+            done = self.task.check_done(next_state, self._step_count, self.max_episode_steps)
+            prev_state = next_state
+            if done:
+                break
         self._state = next_state
-        self._step_count += 1
-
-        events = next_state.get("last_reward_events", {})
-        reward = self.task.compute_reward(prev_state, next_state, events)
         self._episode_reward += reward
+        if lat is not None:
+            t2 = time.perf_counter_ns()
+            lat.record("task", t2 - t1)
 
-        done = self.task.check_done(next_state, self._step_count, self.max_episode_steps)
         # Gymnasium: terminated = game over, truncated = time limit (we don't separate yet)
         terminated = done
         truncated = False
 
         info = self.task.get_info(next_state, self._episode_reward, self._step_count)
-        obs = _state_to_obs(next_state)
+        if lat is None:
+            return self.encoder.encode(next_state), reward, terminated, truncated, info
+        t3 = time.perf_counter_ns()
+        obs = self.encoder.encode(next_state)
+        t4 = time.perf_counter_ns()
+        lat.record("info", t3 - t2)
+        lat.record("obs", t4 - t3)
+        lat.record("step", t4 - t0)
+        if terminated or truncated:
+            lat.episode_end()
         return obs, reward, terminated, truncated, info
 
     def close(self) -> None:
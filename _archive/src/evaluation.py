@@ -0,0 +1,120 @@
+"""
+Parallel policy evaluation over a VecEnv: E episodes across the env's K slots, one batched
+predict() call per tick, results streamed as episodes finish.
+
+Slot i runs (E + i) // K episodes (the quotas sum to E) and anything it finishes past its quota
+is discarded, so fast-finishing slots can't bias the sample toward short episodes.
+Metrics come from the task info of the finishing step (BaseTask.get_info).
+On a DoubleBufferedVecEnv the episodes run through its overlapped() loop, so inference for one
+group of slots runs while the other group's step is in flight.
+"""
+
+import math
+import statistics
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from latency import PhaseTimer
+from src.rollout import DoubleBufferedVecEnv
+
+METRICS = ("total_reward", "survival_time", "wood_collected")
+
+
+class EpisodeResult(NamedTuple):
+    index: int  # completion order, 0-based
+    env: int  # VecEnv slot that ran it
+    total_reward: float
+    survival_time: int
+    wood_collected: int
+
+
+def iter_episodes(
+    predict: Callable[[np.ndarray], Any],
+    venv: VecEnv,
+    episodes: int,
+    latency: PhaseTimer | None = None,
+) -> Iterator[EpisodeResult]:
+    """
+    Run `episodes` episodes on venv, yielding each result as it completes.
+    predict(obs_batch) -> actions for all K slots (e.g. lambda o: model.predict(o, deterministic=True)[0]).
+    latency: records "policy" (the batched predict) and "vec_step" (venv.step) per tick
+    ("policy" and "step_wait" per group step on a DoubleBufferedVecEnv).
+    The caller owns venv (reset here, not closed).
+    """
+    k = venv.num_envs
+    quotas = np.array([(episodes + i) // k for i in range(k)], dtype=np.int64)
+    counts = np.zeros(k, dtype=np.int64)
+    done_total = 0
+    if episodes <= 0:
+        return
+    ticks = _ticks(predict, venv, latency)
+    try:
+        for offset, dones, infos in ticks:
+            for i in np.flatnonzero(dones).tolist():
+                slot = offset + i
+                if counts[slot] >= quotas[slot]:
+                    continue
+                counts[slot] += 1
+                info = infos[i]
+                yield EpisodeResult(
+                    done_total,
+                    slot,
+                    float(info.get("total_reward", 0.0)),
+                    int(info.get("survival_time", 0)),
+                    int(info.get("wood_collected", 0)),
+                )
+                done_total += 1
+                if done_total >= episodes:
+                    return
+    finally:
+        ticks.close()
+
+
+def _ticks(
+    predict: Callable[[np.ndarray], Any], venv: VecEnv, latency: PhaseTimer | None
+) -> Iterator[tuple[int, np.ndarray, list[dict]]]:
+    """(first slot, dones, infos) per vector step, or per group step on a DoubleBufferedVecEnv."""
+    obs = venv.reset()
+    if isinstance(venv, DoubleBufferedVecEnv):
+        steps = venv.overlapped(lambda o: (predict(o), None), latency=latency)
+        try:
+            for step in steps:
+                yield step.offset, step.dones, step.infos
+        finally:
+            steps.close()
+        return
+    while True:
+        if latency is None:
+            obs, _, dones, infos = venv.step(predict(obs))
+        else:
+            t0 = time.perf_counter_ns()
+            actions = predict(obs)
+            t1 = time.perf_counter_ns()
+            obs, _, dones, infos = venv.step(actions)
+            latency.record("policy", t1 - t0)
+            latency.record("vec_step", time.perf_counter_ns() - t1)
+        yield 0, dones, infos
+
+
+def confidence_interval(values: Iterable[float], confidence: float = 0.95) -> tuple[float, float]:
+    """(mean, half-width) of a normal-approximation confidence interval for the mean."""
+    values = list(values)
+    mean = statistics.fmean(values) if values else math.nan
+    if len(values) < 2:
+        return mean, math.nan
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    return mean, z * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def summarize(results: Iterable[EpisodeResult], confidence: float = 0.95) -> dict[str, tuple[float, float]]:
+    """Per-metric (mean, CI half-width) over results."""
+    results = list(results)
+    return {m: confidence_interval((getattr(r, m) for r in results), confidence) for m in METRICS}
+
+
+def format_summary(summary: dict[str, tuple[float, float]], episodes: int, confidence: float = 0.95) -> str:
+    parts = [f"{m}={mean:.2f}±{half:.2f}" for m, (mean, half) in summary.items()]
+    return f"{episodes} episodes ({confidence:.0%} CI): " + " ".join(parts)
@@ -0,0 +1,107 @@
+"""
+Observation history for TerrariaEnv slots: the last K observation vectors of every env, stacked
+oldest -> newest into one (K * obs_dim,) observation (same layout as SB3's VecFrameStack), so the
+policy can see velocity and approaching enemies.
+
+FrameRing keeps the history in one preallocated (N, 2K, D) array. Each new frame is written twice,
+at row h and h + K, so the last K frames are always the contiguous rows h + 1 .. h + K: a step is
+two row writes per env and the stacked (N, K * D) observation is a view, whatever K is. A finished
+env's rows are zeroed (only that env's), so a new episode starts from zero padding.
+
+FrameStackVecEnv wraps any VecEnv of flat observations (TerrariaVecEnv, MockVecEnv,
+SharedMemoryVecEnv, DummyVecEnv over TerrariaEnvs, ...). copy=False returns the ring view itself,
+valid until the next step or reset; copy=True (default) returns a copy, for callers that keep an
+observation across a step (SB3's collect_rollouts stores the previous obs after stepping).
+"""
+
+from typing import Any, Sequence
+
+import gymnasium as gym
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv, VecEnvWrapper
+
+
+class FrameRing:
+    """Last k frames of num_envs envs; window / flat are views of the current history."""
+
+    def __init__(self, num_envs: int, k: int, dim: int, dtype: Any = np.float32):
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        self.num_envs = num_envs
+        self.k = k
+        self.dim = dim
+        self.frames = np.zeros((num_envs, 2 * k, dim), dtype=dtype)
+        self.head = 0  # row of the newest frame (and its copy at head + k)
+
+    @property
+    def window(self) -> np.ndarray:
+        """(num_envs, k, dim) view, oldest frame first."""
+        return self.frames[:, self.head + 1 : self.head + self.k + 1]
+
+    @property
+    def flat(self) -> np.ndarray:
+        """(num_envs, k * dim) view (each env's window is contiguous, so the reshape doesn't copy)."""
+        return self.window.reshape(self.num_envs, self.k * self.dim)
+
+    def reset(self, frames: np.ndarray, indices: Sequence[int] | None = None) -> None:
+        """Zero the history of all envs (or just `indices`) and make frames their newest frame."""
+        if indices is None:
+            self.frames.fill(0)
+            self.head = self.k - 1
+            self.frames[:, self.head] = frames
+            self.frames[:, self.head + self.k] = frames
+            return
+        h = self.head
+        self.frames[indices] = 0
+        self.frames[indices, h] = frames
+        self.frames[indices, h + self.k] = frames
+
+    def push(self, frames: np.ndarray, dones: np.ndarray | None = None) -> None:
+        """
+        Append one frame per env. dones marks envs whose frame starts a new episode: their
+        history is zeroed first (frames is then the new episode's first observation).
+        """
+        h = self.head = (self.head + 1) % self.k
+        self.frames[:, h] = frames
+        self.frames[:, h + self.k] = frames
+        if dones is not None:
+            idx = np.flatnonzero(dones)
+            if len(idx):
+                self.reset(frames[idx], idx)
+
+
+class FrameStackVecEnv(VecEnvWrapper):
+    """
+    venv with each observation replaced by the last k observations, oldest first (zero-padded at
+    the start of an episode). Finished envs get the stacked terminal observation in
+    info["terminal_observation"]. copy: see the module docstring.
+    """
+
+    def __init__(self, venv: VecEnv, k: int, copy: bool = True):
+        space = venv.observation_space
+        if not isinstance(space, gym.spaces.Box) or len(space.shape) != 1:
+            raise ValueError(f"FrameStackVecEnv needs flat Box observations, got {space}")
+        observation_space = gym.spaces.Box(
+            low=np.tile(space.low, k), high=np.tile(space.high, k), dtype=space.dtype
+        )
+        super().__init__(venv, observation_space=observation_space)
+        self.k = k
+        self.copy = copy
+        self.ring = FrameRing(venv.num_envs, k, space.shape[0], dtype=space.dtype)
+
+    def _out(self) -> np.ndarray:
+        return self.ring.flat.copy() if self.copy else self.ring.flat
+
+    def reset(self) -> np.ndarray:
+        self.ring.reset(self.venv.reset())
+        return self._out()
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        obs, rewards, dones, infos = self.venv.step_wait()
+        for i in np.flatnonzero(dones).tolist():
+            terminal = infos[i].get("terminal_observation")
+            if terminal is not None:
+                history = self.ring.window[i, 1:]
+                infos[i]["terminal_observation"] = np.concatenate((history.ravel(), terminal))
+        self.ring.push(obs, dones)
+        return self._out(), rewards, dones, infos
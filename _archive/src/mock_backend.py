@@ -0,0 +1,228 @@
+"""
+In-process backends running the mock server's game logic without a socket.
+- MockBackend: one world, same get_state/send_action surface as TerrariaClient
+  (pass it to TerrariaEnv(backend=...)); identical to a mock_server connection with the same seed.
+- VectorMockBackend: N worlds advanced together with NumPy. Each world has its own
+  random.Random-equivalent stream (a vectorized MT19937 seeded exactly like random.Random),
+  so world i reproduces MockBackend(seeds[i]) step for step.
+"""
+
+import random
+from typing import Any, Sequence
+
+import numpy as np
+
+from reward_events import EVENT_BITS
+from mock_server import STEP_PER_DAY_NIGHT, _apply_action, _default_state
+from src.batch import EVENT_DTYPE, STATE_DTYPE, STATE_FIELDS, row_to_state
+
+# Fields the mock server reports as ints (everything else is a float).
+_INT_FIELDS = frozenset(
+    ["health", "wood_count", "is_night", "enemy_count", "time_of_day", "has_shelter", "step_count"]
+)
+
+_NUM_ACTIONS = 7
+_DO_NOTHING = 6
+
+
+class MockBackend:
+    """
+    One mock world in-process. Mirrors TerrariaClient: connect(), close(), get_state(), reset(seed),
+    send_action(action) -> state, send_action_sequence(actions, all_states).
+    Actions outside 0..6 leave the state unchanged, as on the server.
+    """
+
+    def __init__(self, seed: int | None = 42):
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._state = _default_state(seed)
+
+    def connect(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_state(self) -> dict[str, Any]:
+        return self._state
+
+    def send_action(self, action: int) -> dict[str, Any]:
+        if 0 <= action < _NUM_ACTIONS:
+            self._state = _apply_action(self._state, action, self._rng)
+        return self._state
+
+    def reset(self, seed: int | None = None) -> dict[str, Any]:
+        """New episode from the default state; a seed reseeds the stream, else it continues (like the server)."""
+        if seed is not None:
+            self._rng = random.Random(seed)
+        self._state = _default_state(seed)
+        return self._state
+
+    def send_action_sequence(self, actions: list[int], all_states: bool = False) -> dict[str, Any] | list[dict[str, Any]]:
+        states = [self.send_action(a) for a in actions]
+        return states if all_states else self._state
+
+
+class _MTStreams:
+    """N independent MT19937 generators matching random.Random(seed).random() bit for bit."""
+
+    _N, _M = 624, 397
+    _MATRIX_A = np.uint32(0x9908B0DF)
+    _UPPER = np.uint32(0x80000000)
+    _LOWER = np.uint32(0x7FFFFFFF)
+
+    def __init__(self, seeds: Sequence[int | None]):
+        self.mt = np.empty((len(seeds), self._N), dtype=np.uint32)
+        self.index = np.empty(len(seeds), dtype=np.int64)
+        self.seed(np.arange(len(seeds)), seeds)
+
+    def seed(self, rows: Sequence[int], seeds: Sequence[int | None]) -> None:
+        for row, seed in zip(rows, seeds):
+            # getstate() -> (version, (mt[0..623], index), gauss_next)
+            internal = random.Random(seed).getstate()[1]
+            self.mt[row] = internal[: self._N]
+            self.index[row] = internal[self._N]
+
+    def _twist(self, mt: np.ndarray) -> None:
+        """Regenerate (k, 624) state rows in place; chunked so each chunk only reads finished words."""
+        N, M, upper, lower, matrix_a = self._N, self._M, self._UPPER, self._LOWER, self._MATRIX_A
+
+        def chunk(lo: int, hi: int, src: np.ndarray) -> None:
+            y = (mt[:, lo:hi] & upper) | (mt[:, lo + 1 : hi + 1] & lower)
+            mt[:, lo:hi] = src ^ (y >> 1) ^ ((y & 1) * matrix_a)
+
+        chunk(0, N - M, mt[:, M:N].copy())
+        chunk(N - M, 2 * (N - M), mt[:, 0 : N - M].copy())
+        chunk(2 * (N - M), N - 1, mt[:, N - M : M - 1].copy())
+        y = (mt[:, N - 1] & upper) | (mt[:, 0] & lower)
+        mt[:, N - 1] = mt[:, M - 1] ^ (y >> 1) ^ ((y & 1) * matrix_a)
+
+    def _genrand(self, rows: np.ndarray) -> np.ndarray:
+        idx = self.index[rows]
+        exhausted = rows[idx >= self._N]
+        if exhausted.size:
+            mt = self.mt[exhausted]
+            self._twist(mt)
+            self.mt[exhausted] = mt
+            self.index[exhausted] = 0
+            idx = self.index[rows]
+        y = self.mt[rows, idx]
+        self.index[rows] = idx + 1
+        y ^= y >> 11
+        y ^= (y << 7) & np.uint32(0x9D2C5680)
+        y ^= (y << 15) & np.uint32(0xEFC60000)
+        y ^= y >> 18
+        return y
+
+    def random(self, rows: np.ndarray) -> np.ndarray:
+        """One random.random() draw per row (rows must be unique); float64 in [0, 1)."""
+        a = (self._genrand(rows) >> 5).astype(np.float64)
+        b = (self._genrand(rows) >> 6).astype(np.float64)
+        return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
+
+
+class VectorMockBackend:
+    """
+    N mock worlds stepped with NumPy; the game rules are mock_server._apply_action's.
+    States live in one STATE_DTYPE array (`states`) and the last step's events in an
+    EVENT_DTYPE bitmask array (`events`), ready for BaseTask.compute_reward_batch/check_done_batch.
+    - seeds: per-world seeds (default seed + i).
+    - step(actions) -> (states, events): updates both arrays in place and returns them.
+    - reset(indices, seeds): fresh worlds for the given rows.
+    - state(i): world i as a server-style state dict.
+    """
+
+    def __init__(self, num_envs: int, seed: int | None = 42, seeds: Sequence[int | None] | None = None):
+        if seeds is None:
+            seeds = [None if seed is None else seed + i for i in range(num_envs)]
+        if len(seeds) != num_envs:
+            raise ValueError(f"Expected {num_envs} seeds, got {len(seeds)}")
+        self.num_envs = num_envs
+        self.seeds = list(seeds)
+        self.states = np.zeros(num_envs, dtype=STATE_DTYPE)
+        self.events = np.zeros(num_envs, dtype=EVENT_DTYPE)
+        self._rng = _MTStreams(self.seeds)
+        self.reset(seeds=self.seeds)
+
+    def reset(self, indices: Sequence[int] | None = None, seeds: Sequence[int | None] | None = None) -> None:
+        """Restore the default state for rows in indices (all by default), reseeding them if seeds are given."""
+        rows = np.arange(self.num_envs) if indices is None else np.asarray(indices, dtype=np.int64)
+        if seeds is not None:
+            if len(seeds) != len(rows):
+                raise ValueError(f"Expected {len(rows)} seeds, got {len(seeds)}")
+            self._rng.seed(rows.tolist(), seeds)
+            for row, seed in zip(rows.tolist(), seeds):
+                self.seeds[row] = seed
+        default = _default_state(None)
+        self.states[rows] = tuple(float(default[k]) for k in STATE_FIELDS)
+        self.events[rows] = 0
+
+    def state(self, i: int) -> dict[str, Any]:
+        """World i as the dict the mock server would send."""
+        state = row_to_state(self.states[i], self.events[i])
+        for k in _INT_FIELDS:
+            state[k] = int(state[k])
+        return state
+
+    def get_states(self) -> list[dict[str, Any]]:
+        return [self.state(i) for i in range(self.num_envs)]
+
+    def step(self, actions: Sequence[int] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Apply one action per world (out-of-range actions count as do_nothing)."""
+        a = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        a = np.where((a >= 0) & (a < _NUM_ACTIONS), a, _DO_NOTHING)
+        s = self.states
+        x, y, wood, shelter = s["player_x"], s["player_y"], s["wood_count"], s["has_shelter"]
+        health, night, enemies, dist = s["health"], s["is_night"], s["enemy_count"], s["enemy_distance"]
+        steps, tod = s["step_count"], s["time_of_day"]
+        events = self.events
+        events[:] = 0
+
+        # Movement
+        x -= a == 0
+        x += a == 1
+        jump = a == 2
+        y[jump] = np.minimum(y[jump] + 2.0, 10.0)
+
+        # Mine: +1 wood, 20% chance of a chopped tree (+2 more)
+        mine = np.flatnonzero(a == 3)
+        wood[mine] += 1
+        events[mine] |= EVENT_BITS["wood_collected"]
+        chopped = mine[self._rng.random(mine) < 0.2]
+        wood[chopped] += 2
+        events[chopped] |= EVENT_BITS["tree_chopped"]
+
+        # Place block: 10 wood builds a shelter (once)
+        build = (a == 4) & (wood >= 10) & (shelter == 0)
+        wood[build] -= 10
+        shelter[build] = 1
+        events[build] |= EVENT_BITS["shelter_built"]
+
+        # Attack
+        hit = (a == 5) & (enemies > 0)
+        enemies[hit] -= 1
+        dist[hit] = np.minimum(100.0, dist[hit] + 10.0)
+
+        # Day/night cycle
+        steps += 1
+        flip = steps % STEP_PER_DAY_NIGHT == 0
+        dawn = flip & (night == 1)
+        night[flip] = 1 - night[flip]
+        tod[flip] = steps[flip] % (2 * STEP_PER_DAY_NIGHT)
+        events[dawn] |= EVENT_BITS["survived_night"]
+
+        # Night: enemies spawn and may hit; day clears them
+        nights = np.flatnonzero(night != 0)
+        spawn = nights[self._rng.random(nights) < 0.15]
+        enemies[spawn] = np.minimum(5, enemies[spawn] + 1)
+        dist[spawn] = np.maximum(0.0, dist[spawn] - 5.0)
+        close = nights[(enemies[nights] > 0) & (dist[nights] < 20)]
+        damaged = close[self._rng.random(close) < 0.2]
+        health[damaged] = np.maximum(0, health[damaged] - 10)
+        events[damaged] |= EVENT_BITS["damage_taken"]
+        day = night == 0
+        enemies[day] = 0
+        dist[day] = 100.0
+
+        events[health <= 0] |= EVENT_BITS["died"]
+        return s, events
@@ -0,0 +1,142 @@
+"""
+Compiled observation encoder: state dict -> float32 observation vector.
+Built once per key layout: the per-key lookups (and optional normalization) are generated
+into one specialized function that packs straight into a caller-provided float32 buffer,
+instead of building a list and a fresh np.array on every step.
+"""
+
+import struct
+from typing import Any, NamedTuple, Sequence
+
+import numpy as np
+
+
+class ListField(NamedTuple):
+    """
+    Nested list field (e.g. "nearby_npcs") flattened into fixed slots.
+    Each of the first `slots` elements contributes one value per name in `fields`
+    (elements are dicts); with no fields, elements are numbers. Missing slots, and elements that
+    are not dicts when fields are given, are padded.
+    """
+
+    key: str
+    slots: int
+    fields: tuple[str, ...] = ()
+    low: float = -1e4
+    high: float = 1e4
+    pad: float = 0.0
+
+
+class ObservationEncoder:
+    """
+    Encode state dicts into float32 vectors laid out as `keys` followed by each ListField's slots.
+    - normalize: map [low, high] per feature to [-1, 1] (bounds default to +-1e4 like OBS_LOW/OBS_HIGH).
+    - encode(state, out=None): one observation; writes into `out` if given.
+    - encode_row(state, batch, i): writes row i of a C-contiguous (N, dim) float32 array.
+    - encode_batch(states, out=None): all rows of a batch.
+    - encode_struct(states, out=None): rows straight from a structured array (e.g. src.batch.STATE_DTYPE).
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        low: Sequence[float] | np.ndarray | None = None,
+        high: Sequence[float] | np.ndarray | None = None,
+        list_fields: Sequence[ListField] = (),
+        normalize: bool = False,
+    ):
+        self.keys = list(keys)
+        self.list_fields = list(list_fields)
+        self.normalize = normalize
+        raw_low = np.full(len(self.keys), -1e4) if low is None else np.asarray(low, dtype=np.float64)
+        raw_high = np.full(len(self.keys), 1e4) if high is None else np.asarray(high, dtype=np.float64)
+        if raw_low.shape != (len(self.keys),) or raw_high.shape != (len(self.keys),):
+            raise ValueError("low/high must have one bound per key")
+        for lf in self.list_fields:
+            width = lf.slots * max(1, len(lf.fields))
+            raw_low = np.concatenate([raw_low, np.full(width, lf.low)])
+            raw_high = np.concatenate([raw_high, np.full(width, lf.high)])
+        self.dim = len(raw_low)
+        self.raw_low = raw_low.astype(np.float32)
+        self.raw_high = raw_high.astype(np.float32)
+        if normalize:
+            self.low = np.full(self.dim, -1.0, dtype=np.float32)
+            self.high = np.full(self.dim, 1.0, dtype=np.float32)
+        else:
+            self.low, self.high = self.raw_low, self.raw_high
+        self._raw_low64, self._raw_high64 = raw_low, raw_high
+        self._struct = struct.Struct(f"={self.dim}f")
+        self._pack = self._compile(raw_low, raw_high)
+
+    def _compile(self, low: np.ndarray, high: np.ndarray):
+        """Generate `pack(state, buf, offset)` specialized for this layout."""
+        # The source is built as text and exec'd once, so a step runs no loops over keys or slots,
+        # just one struct.pack_into call. For keys ["health"] and ListField("npcs", 1, ("x",)):
+        #   def pack(state, buf, offset):
+        #       g = state.get
+        #       l0 = g('npcs') or ()
+        #       n0 = len(l0)
+        #       e0_0 = l0[0] if n0 > 0 and isinstance(l0[0], dict) else _EMPTY
+        #       _pack_into(buf, offset, g('health', 0), e0_0.get('x', 0.0))
+        # Only repr()s of the layout's keys, field names and float constants reach the source.
+        exprs: list[str] = []
+        lines = ["def pack(state, buf, offset):", "    g = state.get"]
+        for k in self.keys:
+            exprs.append(f"g({k!r}, 0)")
+        for n, lf in enumerate(self.list_fields):
+            lines.append(f"    l{n} = g({lf.key!r}) or ()")
+            lines.append(f"    n{n} = len(l{n})")
+            for j in range(lf.slots):
+                if lf.fields:
+                    lines.append(f"    e{n}_{j} = l{n}[{j}] if n{n} > {j} and isinstance(l{n}[{j}], dict) else _EMPTY")
+                    exprs.extend(f"e{n}_{j}.get({f!r}, {lf.pad!r})" for f in lf.fields)
+                else:
+                    exprs.append(f"(l{n}[{j}] if n{n} > {j} else {lf.pad!r})")
+        if self.normalize:
+            # x -> (x - low) * 2 / (high - low) - 1, constants folded in
+            exprs = [
+                f"({e} - {float(lo)!r}) * {2.0 / (float(hi) - float(lo))!r} - 1.0"
+                for e, lo, hi in zip(exprs, low, high)
+            ]
+        lines.append("    _pack_into(buf, offset, " + ", ".join(exprs) + ")")
+        namespace: dict[str, Any] = {"_pack_into": self._struct.pack_into, "_EMPTY": {}}
+        exec("\n".join(lines), namespace)
+        return namespace["pack"]
+
+    def encode(self, state: dict[str, Any], out: np.ndarray | None = None) -> np.ndarray:
+        """Encode one state; `out` (float32, C-contiguous, shape (dim,)) is reused if given."""
+        if out is None:
+            out = np.empty(self.dim, dtype=np.float32)
+        self._pack(state, out, 0)
+        return out
+
+    def encode_row(self, state: dict[str, Any], batch: np.ndarray, i: int) -> None:
+        """Encode one state into row i of a C-contiguous (N, dim) float32 array."""
+        self._pack(state, batch, i * self._struct.size)
+
+    def encode_batch(self, states: Sequence[dict[str, Any]], out: np.ndarray | None = None) -> np.ndarray:
+        """Encode states into rows of `out` (allocated as (len(states), dim) if not given)."""
+        if out is None:
+            out = np.empty((len(states), self.dim), dtype=np.float32)
+        pack, size = self._pack, self._struct.size
+        for i, state in enumerate(states):
+            pack(state, out, i * size)
+        return out
+
+    def encode_struct(self, states: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Vectorized encode of a structured (N,) array with one field per key (missing fields
+        encode as 0). Same values as encode_batch; not available with list fields.
+        """
+        if self.list_fields:
+            raise ValueError("encode_struct does not support list fields")
+        if out is None:
+            out = np.empty((len(states), self.dim), dtype=np.float32)
+        names = states.dtype.names or ()
+        for j, k in enumerate(self.keys):
+            col = states[k] if k in names else 0.0
+            if self.normalize:
+                lo, hi = float(self._raw_low64[j]), float(self._raw_high64[j])
+                col = (col - lo) * (2.0 / (hi - lo)) - 1.0
+            out[:, j] = col
+        return out
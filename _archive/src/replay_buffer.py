@@ -0,0 +1,270 @@
+"""
+Prioritized experience replay for off-policy experiments on TerrariaEnv rollouts.
+
+PrioritizedReplayBuffer is a fixed-capacity ring of contiguous NumPy arrays
+(obs / next_obs (capacity, len(OBS_KEYS)) f32, actions i32, rewards f32, dones bool);
+the oldest transition is overwritten once it is full. Sampling is proportional to
+priority ** alpha through a SumTree, O(log n) per sample and vectorized over the batch.
+With path=DIR the arrays are .npy files opened with np.lib.format.open_memmap (as in
+trajectory.py) plus meta.json, so a buffer larger than RAM spills to disk and an existing
+DIR is reopened where it stopped. ReplayRecorder is a gym wrapper that feeds a buffer.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+
+from src.environment import OBS_KEYS
+
+COLUMNS = {
+    "obs": np.float32,
+    "next_obs": np.float32,
+    "actions": np.int32,
+    "rewards": np.float32,
+    "dones": np.bool_,
+    "priorities": np.float64,  # raw priority (before alpha), kept to rebuild the tree on reopen
+}
+
+
+class SumTree:
+    """
+    Complete binary tree over `capacity` leaves (rounded up to a power of two) in one float64 array:
+    node i has children 2i and 2i+1, leaves start at `size`, tree[1] is the total.
+    update() and find() take arrays and walk all indices one level at a time.
+    """
+
+    def __init__(self, capacity: int):
+        self.size = 1 << max(0, int(capacity - 1).bit_length())
+        self.depth = self.size.bit_length() - 1
+        self.tree = np.zeros(2 * self.size, dtype=np.float64)
+        self._shifts = np.arange(self.depth + 1)
+        self._path = np.empty(self.depth + 1, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def update(self, indices: np.ndarray, values: np.ndarray) -> None:
+        """Set leaves indices to values and recompute their ancestors."""
+        nodes = np.asarray(indices, dtype=np.int64) + self.size
+        tree = self.tree
+        tree[nodes] = values  # duplicate indices: the last value wins
+        # Siblings share a parent; recomputing it twice writes the same sum, so no dedup is needed.
+        for _ in range(self.depth):
+            nodes >>= 1
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+
+    def update_one(self, index: int, value: float) -> None:
+        """
+        Set one leaf and recompute its ancestors exactly, without a Python loop: going up the path,
+        each ancestor is the previous one plus its sibling, i.e. a running sum of the leaf and the
+        path's siblings (bit-identical to update(), since float addition is commutative).
+        """
+        nodes = (index + self.size) >> self._shifts  # leaf, parent, ..., root
+        path = self._path
+        path[0] = value
+        path[1:] = self.tree[nodes[:-1] ^ 1]
+        self.tree[nodes] = np.add.accumulate(path)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Leaf index whose cumulative range holds each value in [0, total)."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        tree = self.tree
+        for _ in range(self.depth):
+            left = tree[2 * nodes]
+            right = values >= left
+            values -= np.where(right, left, 0.0)
+            nodes = 2 * nodes + right
+        return nodes - self.size
+
+    def leaves(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[np.asarray(indices, dtype=np.int64) + self.size]
+
+
+class PrioritizedReplayBuffer:
+    """
+    - add(obs, action, reward, next_obs, done): one transition; add_batch(...) many (e.g. a VecEnv step).
+      New transitions get the highest priority seen so far, so each is sampled at least once early on.
+    - sample(batch_size, beta): dict of obs, actions, rewards, next_obs, dones plus importance
+      weights (normalized to max 1) and the ring indices to pass back to update_priorities().
+    - update_priorities(indices, priorities): e.g. |TD error|; eps keeps every transition sampleable.
+    - flush(): write meta.json (and the memmaps) for a disk-backed buffer.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        obs_dim: int = len(OBS_KEYS),
+        alpha: float = 0.6,
+        beta: float = 0.4,
+        eps: float = 1e-6,
+        path: str | Path | None = None,
+        seed: int | None = None,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.obs_dim = obs_dim
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.path = Path(path) if path is not None else None
+        self.rng = np.random.default_rng(seed)
+        self.size = 0
+        self.pos = 0
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+        self._arrays = self._allocate()
+        # Plain ndarray views (the same pages when disk-backed) keep per-step stores cheap.
+        views = {name: array.view(np.ndarray) for name, array in self._arrays.items()}
+        self.obs, self.next_obs = views["obs"], views["next_obs"]
+        self.actions, self.rewards, self.dones = views["actions"], views["rewards"], views["dones"]
+        self.priorities = views["priorities"]
+        if self.size:
+            self.tree.update(np.arange(self.size), self.priorities[: self.size] ** self.alpha)
+
+    def _shape(self, name: str) -> tuple[int, ...]:
+        return (self.capacity, self.obs_dim) if name in ("obs", "next_obs") else (self.capacity,)
+
+    def _allocate(self) -> dict[str, np.ndarray]:
+        if self.path is None:
+            return {name: np.zeros(self._shape(name), dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["capacity"] != self.capacity or meta["obs_dim"] != self.obs_dim:
+                raise ValueError(
+                    f"{self.path} holds a buffer of capacity {meta['capacity']} x {meta['obs_dim']}, "
+                    f"not {self.capacity} x {self.obs_dim}"
+                )
+            self.size, self.pos, self.max_priority = meta["size"], meta["pos"], meta["max_priority"]
+            mode = "r+"
+        else:
+            mode = "w+"
+        open_memmap = np.lib.format.open_memmap
+        arrays = {}
+        for name, dtype in COLUMNS.items():
+            file = self.path / f"{name}.npy"
+            if mode == "r+":
+                arrays[name] = open_memmap(file, mode="r+")
+            else:
+                arrays[name] = open_memmap(file, mode="w+", dtype=dtype, shape=self._shape(name))
+        return arrays
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, obs: np.ndarray, action: int, reward: float, next_obs: np.ndarray, done: bool) -> None:
+        i = self.pos
+        self.obs[i] = obs
+        self.next_obs[i] = next_obs
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = done
+        self.priorities[i] = self.max_priority
+        self.tree.update_one(i, self.max_priority**self.alpha)
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(
+        self,
+        obs: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        next_obs: np.ndarray,
+        dones: np.ndarray,
+    ) -> None:
+        """Add n transitions (leading axis n); rows past capacity overwrite the oldest, in order."""
+        n = len(actions)
+        if n > self.capacity:  # only the newest `capacity` rows would survive
+            skip = n - self.capacity
+            obs, actions, rewards = obs[skip:], actions[skip:], rewards[skip:]
+            next_obs, dones = next_obs[skip:], dones[skip:]
+            n = self.capacity
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.obs[idx] = obs
+        self.next_obs[idx] = next_obs
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+        self.priorities[idx] = self.max_priority
+        self.tree.update(idx, np.full(n, self.max_priority**self.alpha))
+        self.pos = int((self.pos + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size: int, beta: float | None = None) -> dict[str, np.ndarray]:
+        """Stratified proportional sample: one draw from each of batch_size equal slices of the total."""
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        beta = self.beta if beta is None else beta
+        total = self.tree.total
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        idx = self.tree.find(np.minimum(values, np.nextafter(total, 0.0)))
+        # Float round-off can land on an empty leaf past the filled region; fold those back in.
+        idx = np.where(idx < self.size, idx, self.rng.integers(0, self.size, batch_size))
+        probs = self.tree.leaves(idx) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return {
+            "obs": self.obs[idx],
+            "actions": self.actions[idx],
+            "rewards": self.rewards[idx],
+            "next_obs": self.next_obs[idx],
+            "dones": self.dones[idx],
+            "weights": weights.astype(np.float32),
+            "indices": idx,
+        }
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        p = np.abs(np.asarray(priorities, dtype=np.float64)) + self.eps
+        self.priorities[indices] = p
+        self.max_priority = max(self.max_priority, float(p.max()))
+        self.tree.update(indices, p**self.alpha)
+
+    def flush(self) -> None:
+        if self.path is None:
+            return
+        for array in self._arrays.values():
+            array.flush()
+        meta = {
+            "capacity": self.capacity,
+            "obs_dim": self.obs_dim,
+            "size": self.size,
+            "pos": self.pos,
+            "max_priority": self.max_priority,
+        }
+        (self.path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+class ReplayRecorder(gym.Wrapper):
+    """
+    Feed every transition of a TerrariaEnv into a PrioritizedReplayBuffer while passing it through.
+    done is `terminated` only: a truncated step still bootstraps from next_obs.
+    """
+
+    def __init__(self, env: gym.Env, buffer: PrioritizedReplayBuffer):
+        super().__init__(env)
+        if buffer.obs_dim != int(np.prod(env.observation_space.shape)):
+            raise ValueError(f"buffer obs_dim {buffer.obs_dim} does not match the env observation space")
+        self.buffer = buffer
+        self._last_obs: np.ndarray | None = None
+
+    def reset(self, **kwargs: Any) -> tuple[np.ndarray, dict]:
+        obs, info = self.env.reset(**kwargs)
+        self._last_obs = obs
+        return obs, info
+
+    def step(self, action: Any) -> tuple[np.ndarray, float, bool, bool, dict]:
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self.buffer.add(self._last_obs, action, reward, obs, terminated)
+        self._last_obs = obs
+        return obs, reward, terminated, truncated, info
+
+    def close(self) -> None:
+        self.buffer.flush()
+        super().close()
@@ -3,6 +3,10 @@ Reward calculation for Terraria survive-first-night environment.
 All magic numbers in one place; stateless.
 """
 
+import numpy as np
+
+from reward_events import EVENT_BITS, events_to_mask
+
 # Shaped reward constants (from spec)
 REWARD_WOOD_COLLECTED = 2
 REWARD_TREE_CHOPPED = 5
@@ -29,6 +33,7 @@ def compute_reward(
         next_state: State dict after the step.
         events: Optional dict of event flags from server, e.g.:
             wood_collected, tree_chopped, shelter_built, damage_taken, died, survived_night.
+            With none of these set, rewards are inferred from state deltas.
 
     Returns:
         Scalar reward for this step.
@@ -49,8 +54,9 @@ def compute_reward(
     if events.get("survived_night"):
         reward += REWARD_SURVIVED_NIGHT
 
-    # Fallback: infer from state deltas if events not provided
-    if not events:
+    # Fallback: infer from state deltas if no recognised event is set (compute_reward_batch's rule:
+    # its bitmask can't tell a missing dict from one with only unknown or false events)
+    if not events_to_mask(events):
         prev_health = prev_state.get("health", 0)
         next_health = next_state.get("health", 0)
         if next_health < prev_health:
@@ -71,6 +77,50 @@ def compute_reward(
     return reward
 
 
+def compute_reward_batch(
+    prev_states: np.ndarray,
+    next_states: np.ndarray,
+    events: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized compute_reward over a batch.
+
+    Args:
+        prev_states: STATE_DTYPE array (N,) before the step.
+        next_states: STATE_DTYPE array (N,) after the step.
+        events: (N,) event bitmasks (reward_events.EVENT_BITS); 0 means no recognised event,
+            in which case rewards are inferred from state deltas as in compute_reward.
+
+    Returns:
+        (N,) float32 rewards.
+    """
+    events = np.asarray(events)
+    reward = np.zeros(len(next_states), dtype=np.float32)
+    for name, value in (
+        ("wood_collected", REWARD_WOOD_COLLECTED),
+        ("tree_chopped", REWARD_TREE_CHOPPED),
+        ("shelter_built", REWARD_SHELTER_BUILT),
+        ("damage_taken", REWARD_DAMAGE_TAKEN),
+        ("died", REWARD_DEATH),
+        ("survived_night", REWARD_SURVIVED_NIGHT),
+    ):
+        reward += np.where(events & EVENT_BITS[name], value, 0)
+
+    # Fallback: infer from state deltas where no events were provided
+    no_events = events == 0
+    if no_events.any():
+        prev_health = prev_states["health"]
+        next_health = next_states["health"]
+        inferred = np.where(next_health < prev_health, REWARD_DAMAGE_TAKEN, 0)
+        inferred += np.where((next_health <= 0) & (prev_health > 0), REWARD_DEATH, 0)
+        inferred += np.where(next_states["wood_count"] > prev_states["wood_count"], REWARD_WOOD_COLLECTED, 0)
+        survived = (prev_states["is_night"] != 0) & (next_states["is_night"] == 0) & (next_health > 0)
+        inferred += np.where(survived, REWARD_SURVIVED_NIGHT, 0)
+        reward += np.where(no_events, inferred, 0)
+
+    return reward
+
+
 def compute_reward_move_right(
     prev_state: dict,
     next_state: dict,
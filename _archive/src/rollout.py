@@ -0,0 +1,253 @@
+"""
+Double-buffered rollouts: policy inference overlapped with environment I/O.
+
+DoubleBufferedVecEnv joins two VecEnv groups (slots 0..a-1 and a..a+b-1) into one VecEnv.
+As a plain VecEnv it steps both groups together. overlapped(policy) alternates instead: while
+group A's actions are in flight (step_async sent, step_wait not called yet) the policy runs on
+group B's fresh observations, B's actions go out, then A's replies are collected, and the roles
+swap. Every group still acts on its own latest observations, so with a policy whose output for
+a row doesn't depend on the rest of the batch (deterministic predict) the actions are the ones
+lock-step stepping of all slots would produce.
+
+The overlap comes from groups whose step_async only sends (TerrariaVecEnv, SharedMemoryVecEnv).
+In-process groups (MockVecEnv, DummyVecEnv) do all their work in step_wait: same results, no overlap.
+
+OverlappedPPO is PPO collecting its rollouts through overlapped() when its env is a DoubleBufferedVecEnv.
+"""
+
+import time
+from typing import Any, Callable, Iterator, NamedTuple
+
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3 import PPO
+from stable_baselines3.common.buffers import RolloutBuffer
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.utils import obs_as_tensor
+from stable_baselines3.common.vec_env import VecEnv
+
+from latency import PhaseTimer
+from src.tasks.base_task import BaseTask
+
+# policy(obs) -> (actions, extra); extra is handed back untouched in GroupStep.extra
+GroupPolicy = Callable[[np.ndarray], tuple[np.ndarray, Any]]
+
+
+class GroupStep(NamedTuple):
+    group: int  # 0 (A) or 1 (B)
+    offset: int  # global index of the group's first slot
+    obs: np.ndarray  # observations the actions were computed from
+    actions: np.ndarray
+    extra: Any
+    next_obs: np.ndarray
+    rewards: np.ndarray
+    dones: np.ndarray
+    infos: list[dict]
+
+
+class DoubleBufferedVecEnv(VecEnv):
+    """
+    Two VecEnv groups as one VecEnv (group B's slots follow group A's).
+    - reset() / step(): both groups, results concatenated.
+    - overlapped(policy, steps): GroupSteps alternating A, B, A, ... with inference for one group
+      running while the other group's step is in flight.
+    - set_task(task): swap the task in both groups.
+    Both groups need the same observation and action spaces. Build group B with its seeds offset
+    by group A's size (e.g. seed + a) so slot i gets the same world as in a single VecEnv.
+    """
+
+    def __init__(self, group_a: VecEnv, group_b: VecEnv):
+        if group_a.observation_space != group_b.observation_space or group_a.action_space != group_b.action_space:
+            raise ValueError("both groups need the same observation and action spaces")
+        self.groups = (group_a, group_b)
+        self.offsets = (0, group_a.num_envs)
+        self.render_mode = None
+        super().__init__(group_a.num_envs + group_b.num_envs, group_a.observation_space, group_a.action_space)
+        self._obs: list[np.ndarray | None] = [None, None]
+        self._actions: np.ndarray | None = None
+
+    def reset(self) -> np.ndarray:
+        self._obs = [g.reset() for g in self.groups]
+        return np.concatenate(self._obs)
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = np.asarray(actions)
+        split = self.offsets[1]
+        self.groups[0].step_async(self._actions[:split])
+        self.groups[1].step_async(self._actions[split:])
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        (obs_a, rew_a, done_a, info_a), (obs_b, rew_b, done_b, info_b) = (g.step_wait() for g in self.groups)
+        self._obs = [obs_a, obs_b]
+        return (
+            np.concatenate(self._obs),
+            np.concatenate([rew_a, rew_b]),
+            np.concatenate([done_a, done_b]),
+            info_a + info_b,
+        )
+
+    def overlapped(
+        self,
+        policy: GroupPolicy,
+        steps: int | None = None,
+        latency: PhaseTimer | None = None,
+    ) -> Iterator[GroupStep]:
+        """
+        One GroupStep per group step, alternating A, B, A, ... from the current observations.
+        policy(obs) -> (actions, extra) for one group's observations.
+        steps: stop after this many steps per group, with nothing in flight (None: until closed).
+        Closing early completes the step still in flight (its transition is dropped), so the
+        groups stay usable. latency: records "policy" and "step_wait" per group step.
+        """
+        if self._obs[0] is None or self._obs[1] is None:
+            raise RuntimeError("Call reset() before overlapped()")
+        pending: list[tuple[np.ndarray, np.ndarray, Any] | None] = [None, None]
+        launched = [0, 0]
+
+        def launch(g: int) -> None:
+            obs = self._obs[g]
+            if latency is None:
+                actions, extra = policy(obs)
+            else:
+                t0 = time.perf_counter_ns()
+                actions, extra = policy(obs)
+                latency.record("policy", time.perf_counter_ns() - t0)
+            self.groups[g].step_async(actions)
+            pending[g] = (obs, actions, extra)
+            launched[g] += 1
+
+        try:
+            if steps is None or steps > 0:
+                launch(0)
+            g = 0
+            while pending[g] is not None:
+                h = 1 - g
+                if steps is None or launched[h] < steps:
+                    launch(h)  # h's inference ran while g's step was in flight
+                obs, actions, extra = pending[g]
+                if latency is None:
+                    next_obs, rewards, dones, infos = self.groups[g].step_wait()
+                else:
+                    t0 = time.perf_counter_ns()
+                    next_obs, rewards, dones, infos = self.groups[g].step_wait()
+                    latency.record("step_wait", time.perf_counter_ns() - t0)
+                pending[g] = None
+                self._obs[g] = next_obs
+                yield GroupStep(g, self.offsets[g], obs, actions, extra, next_obs, rewards, dones, infos)
+                g = h
+        finally:
+            for g in (0, 1):
+                if pending[g] is not None:
+                    self._obs[g] = self.groups[g].step_wait()[0]
+
+    def set_task(self, task: BaseTask) -> None:
+        """Swap the task in both groups (groups without set_task get it through env_method)."""
+        for g in self.groups:
+            if hasattr(g, "set_task"):
+                g.set_task(task)
+            else:
+                g.env_method("set_task", task)
+
+    def close(self) -> None:
+        for g in self.groups:
+            g.close()
+
+    def _locate(self, indices: Any) -> list[tuple[VecEnv, int]]:
+        split = self.offsets[1]
+        groups = self.groups
+        return [(groups[0], i) if i < split else (groups[1], i - split) for i in self._get_indices(indices)]
+
+    def get_attr(self, attr_name: str, indices: Any = None) -> list[Any]:
+        return [g.get_attr(attr_name, [i])[0] for g, i in self._locate(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: Any = None) -> None:
+        for g, i in self._locate(indices):
+            g.set_attr(attr_name, value, [i])
+
+    def env_method(self, method_name: str, *method_args: Any, indices: Any = None, **method_kwargs: Any) -> list[Any]:
+        return [
+            g.env_method(method_name, *method_args, indices=[i], **method_kwargs)[0] for g, i in self._locate(indices)
+        ]
+
+    def env_is_wrapped(self, wrapper_class: type, indices: Any = None) -> list[bool]:
+        return [g.env_is_wrapped(wrapper_class, [i])[0] for g, i in self._locate(indices)]
+
+
+def split_groups(make_group: Callable[[int, int], VecEnv], num_envs: int) -> DoubleBufferedVecEnv:
+    """DoubleBufferedVecEnv of make_group(count, offset) halves; group A gets the extra slot if num_envs is odd."""
+    if num_envs < 2:
+        raise ValueError("double buffering needs at least 2 envs")
+    a = (num_envs + 1) // 2
+    return DoubleBufferedVecEnv(make_group(a, 0), make_group(num_envs - a, a))
+
+
+class OverlappedPPO(PPO):
+    """
+    PPO whose rollout collection overlaps inference and env I/O when env is a DoubleBufferedVecEnv
+    (Discrete actions). Per rollout step, the policy runs on group B while group A's actions are in
+    flight and vice versa; the buffer gets the same rows as lock-step collection. Any other env
+    (or action space) uses PPO's own collect_rollouts.
+    """
+
+    def collect_rollouts(
+        self,
+        env: VecEnv,
+        callback: BaseCallback,
+        rollout_buffer: RolloutBuffer,
+        n_rollout_steps: int,
+    ) -> bool:
+        if not isinstance(env, DoubleBufferedVecEnv) or not isinstance(self.action_space, spaces.Discrete):
+            return super().collect_rollouts(env, callback, rollout_buffer, n_rollout_steps)
+        assert self._last_obs is not None, "No previous observation was provided"
+        self.policy.set_training_mode(False)
+        rollout_buffer.reset()
+        callback.on_rollout_start()
+
+        def policy(obs: np.ndarray) -> tuple[np.ndarray, tuple[th.Tensor, th.Tensor]]:
+            with th.no_grad():
+                actions, values, log_probs = self.policy(obs_as_tensor(obs, self.device))
+            return actions.cpu().numpy(), (values, log_probs)
+
+        steps = env.overlapped(policy, steps=n_rollout_steps)
+        try:
+            for _ in range(n_rollout_steps):
+                a, b = next(steps), next(steps)
+                actions = np.concatenate([a.actions, b.actions]).reshape(-1, 1)
+                values = th.cat([a.extra[0], b.extra[0]])
+                log_probs = th.cat([a.extra[1], b.extra[1]])
+                new_obs = np.concatenate([a.next_obs, b.next_obs])
+                rewards = np.concatenate([a.rewards, b.rewards])
+                dones = np.concatenate([a.dones, b.dones])
+                infos = a.infos + b.infos
+
+                self.num_timesteps += env.num_envs
+                callback.update_locals(locals())
+                if not callback.on_step():
+                    return False
+                self._update_info_buffer(infos, dones)
+
+                # Timeouts bootstrap with the value function, as in PPO.collect_rollouts
+                for idx, done in enumerate(dones):
+                    if (
+                        done
+                        and infos[idx].get("terminal_observation") is not None
+                        and infos[idx].get("TimeLimit.truncated", False)
+                    ):
+                        terminal_obs = self.policy.obs_to_tensor(infos[idx]["terminal_observation"])[0]
+                        with th.no_grad():
+                            terminal_value = self.policy.predict_values(terminal_obs)[0]
+                        rewards[idx] += self.gamma * terminal_value
+
+                rollout_buffer.add(self._last_obs, actions, rewards, self._last_episode_starts, values, log_probs)
+                self._last_obs = new_obs
+                self._last_episode_starts = dones
+        finally:
+            steps.close()
+
+        with th.no_grad():
+            values = self.policy.predict_values(obs_as_tensor(new_obs, self.device))
+        rollout_buffer.compute_returns_and_advantage(last_values=values, dones=dones)
+        callback.update_locals(locals())
+        callback.on_rollout_end()
+        return True
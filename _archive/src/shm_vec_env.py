@@ -0,0 +1,391 @@
+"""
+Process-pool rollout workers with shared-memory observation buffers.
+Each worker process owns one TerrariaEnv and writes its observation, reward and done flags
+straight into a multiprocessing.shared_memory ring; the trainer reads them as NumPy views.
+Pipes carry only a few raw bytes per step (command + ring slot), never pickled dicts.
+
+Ring layout (R = ring_size, N = num_envs, D = encoder.dim), one shared block:
+  obs (R, N, D) f32, terminal_obs (R, N, D) f32, actions (R, N) i64, rewards (R, N) f32,
+  dones (R, N) bool, truncated (R, N) bool, episode_returns (R, N) f64, episode_lengths (R, N) i64
+Vector step t uses slot t % R, so the last R steps stay readable without copies.
+
+A worker whose connection drops past TerrariaClient's own reconnect attempts reconnects
+through env.reset() and reports the step as done/truncated; a worker process that dies is
+respawned by the trainer on the same shared block. Any other exception in a worker (including
+the reset that follows a lost connection) is sent back with its traceback and raised by the trainer
+as RuntimeError; the worker keeps serving commands.
+set_task(task) pickles the task to every worker's TerrariaEnv.set_task (and to respawned workers),
+without restarting them or their connections. seed(S) (SB3's VecEnv.seed) makes the next reset()
+pickle seed S + i to worker i, which resets with env.reset(seed=S + i). env_method() pickles the
+call to the chosen workers and their return values back.
+"""
+
+import multiprocessing as mp
+import pickle
+import struct
+import traceback
+from multiprocessing.connection import Connection, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Sequence
+
+import numpy as np
+import gymnasium as gym
+from stable_baselines3.common.vec_env import VecEnv
+
+from src.environment import NUM_ACTIONS, default_encoder
+from src.observation import ObservationEncoder
+from src.tasks.base_task import BaseTask
+
+_CMD = struct.Struct("<cI")  # command byte, ring slot
+_RESET = b"r"
+_STEP = b"s"
+_CLOSE = b"c"
+_TASK = b"t"  # followed by one pickled BaseTask
+_RESET_SEEDED = b"R"  # followed by one pickled int: env.reset(seed=...)
+_METHOD = b"m"  # followed by one pickled (name, args, kwargs): getattr(env, name)(*args, **kwargs)
+_ACK = b"k"
+_RECONNECTED = b"x"  # step failed; env reconnected and reset, slot holds the fresh episode
+_RESULT = b"v"  # followed by the pickled return value of a _METHOD call
+_ERROR = b"e"  # followed by the worker's traceback (utf-8); the command raised
+
+
+class SharedRollout:
+    """
+    Named shared-memory ring of per-step arrays. Created by the trainer (create()),
+    attached by workers (attach()); every field is a NumPy view on the same block.
+    """
+
+    def __init__(self, shm: SharedMemory, ring_size: int, num_envs: int, obs_dim: int, owner: bool):
+        self.shm = shm
+        self.ring_size = ring_size
+        self.num_envs = num_envs
+        self.obs_dim = obs_dim
+        self._owner = owner
+        offset = 0
+        for name, dtype, shape in self._layout(ring_size, num_envs, obs_dim):
+            arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            setattr(self, name, arr)
+            offset += arr.nbytes
+
+    @staticmethod
+    def _layout(ring_size: int, num_envs: int, obs_dim: int) -> list[tuple[str, type, tuple[int, ...]]]:
+        r, n = ring_size, num_envs
+        return [
+            ("obs", np.float32, (r, n, obs_dim)),
+            ("terminal_obs", np.float32, (r, n, obs_dim)),
+            ("episode_returns", np.float64, (r, n)),
+            ("episode_lengths", np.int64, (r, n)),
+            ("actions", np.int64, (r, n)),
+            ("rewards", np.float32, (r, n)),
+            ("dones", np.bool_, (r, n)),
+            ("truncated", np.bool_, (r, n)),
+        ]
+
+    @classmethod
+    def nbytes(cls, ring_size: int, num_envs: int, obs_dim: int) -> int:
+        return sum(
+            int(np.prod(shape)) * np.dtype(dtype).itemsize
+            for _, dtype, shape in cls._layout(ring_size, num_envs, obs_dim)
+        )
+
+    @classmethod
+    def create(cls, ring_size: int, num_envs: int, obs_dim: int) -> "SharedRollout":
+        shm = SharedMemory(create=True, size=cls.nbytes(ring_size, num_envs, obs_dim))
+        return cls(shm, ring_size, num_envs, obs_dim, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, ring_size: int, num_envs: int, obs_dim: int) -> "SharedRollout":
+        return cls(SharedMemory(name=name), ring_size, num_envs, obs_dim, owner=False)
+
+    def close(self) -> None:
+        for name, _, _ in self._layout(self.ring_size, self.num_envs, self.obs_dim):
+            setattr(self, name, None)
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # caller still holds views; the mapping goes away with them
+        if self._owner:
+            self.shm.unlink()
+
+
+def _worker(
+    index: int,
+    env_fn: Callable[[], gym.Env],
+    shm_name: str,
+    ring_size: int,
+    num_envs: int,
+    obs_dim: int,
+    conn: Connection,
+) -> None:
+    """Worker loop: execute reset/step commands for env `index`, writing results into the ring."""
+    rollout = SharedRollout.attach(shm_name, ring_size, num_envs, obs_dim)
+    env = env_fn()
+    episode_return = 0.0
+    episode_length = 0
+    try:
+        while True:
+            cmd, slot = _CMD.unpack(conn.recv_bytes())
+            if cmd == _CLOSE:
+                break
+            reply, payload = _ACK, None
+            try:
+                if cmd == _TASK:
+                    env.set_task(conn.recv())
+                elif cmd == _METHOD:
+                    name, args, kwargs = conn.recv()
+                    reply, payload = _RESULT, pickle.dumps(getattr(env, name)(*args, **kwargs))
+                elif cmd == _RESET or cmd == _RESET_SEEDED:
+                    seed = conn.recv() if cmd == _RESET_SEEDED else None
+                    rollout.obs[slot, index], _ = env.reset(seed=seed)
+                    episode_return, episode_length = 0.0, 0
+                elif cmd == _STEP:
+                    try:
+                        obs, reward, terminated, truncated, _ = env.step(int(rollout.actions[slot, index]))
+                    except (ConnectionError, OSError):
+                        # TerrariaClient already retried; report a truncated step and reconnect via reset.
+                        obs, reward, terminated, truncated = rollout.obs[slot, index].copy(), 0.0, False, True
+                        reply = _RECONNECTED
+                    episode_return += reward
+                    episode_length += 1
+                    done = terminated or truncated
+                    rollout.rewards[slot, index] = reward
+                    rollout.dones[slot, index] = done
+                    rollout.truncated[slot, index] = truncated and not terminated
+                    rollout.episode_returns[slot, index] = episode_return
+                    rollout.episode_lengths[slot, index] = episode_length
+                    if done:
+                        rollout.terminal_obs[slot, index] = obs
+                        obs, _ = env.reset()
+                        episode_return, episode_length = 0.0, 0
+                    rollout.obs[slot, index] = obs
+            except EOFError:
+                raise  # trainer gone
+            except Exception:
+                reply, payload = _ERROR, traceback.format_exc().encode()
+            conn.send_bytes(reply)
+            if payload is not None:
+                conn.send_bytes(payload)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        env.close()
+        rollout.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    SB3 VecEnv over worker processes, one TerrariaEnv each, exchanging data through a
+    SharedRollout ring. step_wait() returns views into the ring (valid for ring_size steps);
+    `rollout` exposes the whole ring for zero-copy batch reads. encoder must be the one the
+    env_fns' envs use (default: default_encoder()); it sizes the ring and the observation space.
+    """
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        ring_size: int = 2048,
+        start_method: str | None = None,
+        timeout: float = 60.0,
+        encoder: ObservationEncoder | None = None,
+    ):
+        num_envs = len(env_fns)
+        if ring_size < 2:
+            raise ValueError("ring_size must be at least 2 (the previous step's observations must stay valid)")
+        self.encoder = encoder or default_encoder()
+        observation_space = gym.spaces.Box(
+            low=self.encoder.low, high=self.encoder.high, shape=(self.encoder.dim,), dtype=np.float32
+        )
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, gym.spaces.Discrete(NUM_ACTIONS))
+        self.env_fns = list(env_fns)
+        self.timeout = timeout
+        self.rollout = SharedRollout.create(ring_size, num_envs, self.encoder.dim)
+        self._ctx = mp.get_context(start_method)
+        self._procs: list[mp.process.BaseProcess | None] = [None] * num_envs
+        self._conns: list[Connection | None] = [None] * num_envs
+        self.restarts = 0  # worker processes respawned
+        self.reconnects = 0  # steps lost to a dropped connection inside a worker
+        self.closed = False
+        self._task: BaseTask | None = None  # set by set_task(); replaces the env_fns' task
+        self._t = 0  # vector steps taken; current slot is _t % ring_size
+        for i in range(num_envs):
+            self._spawn(i)
+
+    def _spawn(self, i: int) -> None:
+        parent, child = self._ctx.Pipe()
+        r = self.rollout
+        proc = self._ctx.Process(
+            target=_worker,
+            args=(i, self.env_fns[i], r.shm.name, r.ring_size, r.num_envs, r.obs_dim, child),
+            daemon=True,
+        )
+        proc.start()
+        child.close()
+        self._procs[i], self._conns[i] = proc, parent
+        if self._task is not None:
+            self._send_task(parent)
+
+    def _send_task(self, conn: Connection) -> None:
+        self._post(conn, _TASK, 0, self._task)
+
+    @staticmethod
+    def _post(conn: Connection, cmd: bytes, slot: int, *objs: Any) -> None:
+        """Send a command (and its pickled arguments); a dead worker shows up as EOF in _gather instead."""
+        try:
+            conn.send_bytes(_CMD.pack(cmd, slot))
+            for obj in objs:
+                conn.send(obj)
+        except OSError:
+            pass
+
+    def _restart(self, i: int, slot: int) -> None:
+        """Respawn a dead worker and start a fresh episode in its ring slot."""
+        self.restarts += 1
+        proc = self._procs[i]
+        if proc is not None:
+            proc.join(timeout=1.0)
+        self._conns[i].close()
+        self._spawn(i)
+        conn = self._conns[i]
+        try:
+            if self._task is not None:
+                self._check_reply(i, conn)  # set_task ack
+            conn.send_bytes(_CMD.pack(_RESET, slot))
+            self._check_reply(i, conn)
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Respawned worker {i} died before its first reset") from e
+
+    @staticmethod
+    def _check_reply(i: int, conn: Connection) -> bytes:
+        """Receive one reply; raise RuntimeError with the worker's traceback if it is _ERROR."""
+        reply = conn.recv_bytes()
+        if reply == _ERROR:
+            raise RuntimeError(f"Worker {i} failed:\n{conn.recv_bytes().decode()}")
+        return reply
+
+    def _broadcast(self, cmd: bytes, slot: int) -> None:
+        for conn in self._conns:
+            self._post(conn, cmd, slot)
+
+    def _gather(self, slot: int, stepping: bool, indices: Sequence[int] | None = None) -> dict[int, Any]:
+        """
+        Wait for the replies of workers `indices` (default: all); respawn workers whose process died.
+        Returns {i: value} for _RESULT replies. Every reply is read before the first worker error is raised,
+        so the pipes stay in step.
+        """
+        pending = {self._conns[i]: i for i in (range(self.num_envs) if indices is None else indices)}
+        results: dict[int, Any] = {}
+        error: RuntimeError | None = None
+        while pending:
+            ready = wait(list(pending), timeout=self.timeout)
+            if not ready:
+                raise TimeoutError(f"No reply from workers {sorted(pending.values())} within {self.timeout}s")
+            for conn in ready:
+                i = pending.pop(conn)
+                try:
+                    reply = self._check_reply(i, conn)
+                    if reply == _RECONNECTED:
+                        self.reconnects += 1
+                    elif reply == _RESULT:
+                        results[i] = pickle.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    if stepping:
+                        r = self.rollout
+                        r.rewards[slot, i] = 0.0
+                        r.dones[slot, i] = r.truncated[slot, i] = True
+                        r.terminal_obs[slot, i] = r.obs[slot, i]
+                        r.episode_returns[slot, i] = r.episode_lengths[slot, i] = 0
+                    try:
+                        self._restart(i, slot)
+                    except RuntimeError as e:
+                        error = error or e
+                except RuntimeError as e:
+                    error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def reset(self) -> np.ndarray:
+        slot = self._t % self.rollout.ring_size
+        if any(seed is not None for seed in self._seeds):
+            for conn, seed in zip(self._conns, self._seeds):
+                if seed is None:
+                    self._post(conn, _RESET, slot)
+                else:
+                    self._post(conn, _RESET_SEEDED, slot, seed)
+            self._reset_seeds()
+        else:
+            self._broadcast(_RESET, slot)
+        self._gather(slot, stepping=False)
+        return self.rollout.obs[slot]
+
+    def set_task(self, task: BaseTask) -> None:
+        """Swap the task in every worker; running episodes continue under it (reset() for fresh ones)."""
+        self._task = task
+        for conn in self._conns:
+            self._send_task(conn)
+        self._gather(self._t % self.rollout.ring_size, stepping=False)
+
+    def step_async(self, actions: np.ndarray) -> None:
+        prev = self._t % self.rollout.ring_size
+        self._t += 1
+        slot = self._t % self.rollout.ring_size
+        if slot != prev:
+            self.rollout.obs[slot] = self.rollout.obs[prev]
+        self.rollout.actions[slot] = np.asarray(actions).reshape(self.num_envs)
+        self._broadcast(_STEP, slot)
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        slot = self._t % self.rollout.ring_size
+        self._gather(slot, stepping=True)
+        r = self.rollout
+        infos: list[dict[str, Any]] = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(r.dones[slot]).tolist():
+            infos[i] = {
+                "terminal_observation": r.terminal_obs[slot, i],
+                "TimeLimit.truncated": bool(r.truncated[slot, i]),
+                "episode_length": int(r.episode_lengths[slot, i]),
+                "total_reward": float(r.episode_returns[slot, i]),
+            }
+        return r.obs[slot], r.rewards[slot], r.dones[slot], infos
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        for conn in self._conns:
+            try:
+                conn.send_bytes(_CMD.pack(_CLOSE, 0))
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self.rollout.close()
+        self.closed = True
+
+    def get_attr(self, attr_name: str, indices: Any = None) -> list[Any]:
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: Any = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args: Any, indices: Any = None, **method_kwargs: Any) -> list[Any]:
+        """
+        Call method_name on the workers' envs and return their results. Unlike set_task(), a call is not
+        replayed in respawned workers.
+        """
+        idx = list(self._get_indices(indices))
+        call = (method_name, method_args, method_kwargs)
+        for i in idx:
+            self._post(self._conns[i], _METHOD, 0, call)
+        results = self._gather(self._t % self.rollout.ring_size, stepping=False, indices=idx)
+        lost = [i for i in idx if i not in results]
+        if lost:
+            raise RuntimeError(f"Workers {lost} died during {method_name}() and were respawned")
+        return [results[i] for i in idx]
+
+    def env_is_wrapped(self, wrapper_class: type, indices: Any = None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
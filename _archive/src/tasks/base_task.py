@@ -1,10 +1,16 @@
 """
 Base task abstraction: reward, done, and info are defined by concrete tasks.
+Optional batch API: reward/done over structured state arrays (src.batch.STATE_DTYPE)
+and event bitmasks; the defaults fall back to the scalar methods row by row.
 """
 
 from abc import ABC, abstractmethod
 from typing import Any
 
+import numpy as np
+
+from src.batch import row_to_state
+
 
 class BaseTask(ABC):
     """
@@ -41,3 +47,40 @@ class BaseTask(ABC):
     ) -> dict[str, Any]:
         """Return info dict for this step (episode_length, total_reward, etc.)."""
         ...
+
+    def compute_reward_batch(
+        self,
+        prev_states: np.ndarray,
+        next_states: np.ndarray,
+        events: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Vectorized compute_reward: STATE_DTYPE arrays of shape (N,) and (N,) event bitmasks
+        -> (N,) float32 rewards. Default calls compute_reward per row; override for speed.
+        """
+        rewards = np.empty(len(next_states), dtype=np.float32)
+        for i in range(len(next_states)):
+            next_state = row_to_state(next_states[i], events[i])
+            rewards[i] = self.compute_reward(
+                row_to_state(prev_states[i]), next_state, next_state["last_reward_events"]
+            )
+        return rewards
+
+    def check_done_batch(
+        self,
+        states: np.ndarray,
+        events: np.ndarray,
+        step_counts: np.ndarray,
+        max_episode_steps: int,
+    ) -> np.ndarray:
+        """
+        Vectorized check_done -> (N,) bool. Default calls check_done per row; override for speed.
+        """
+        return np.fromiter(
+            (
+                self.check_done(row_to_state(states[i], events[i]), int(step_counts[i]), max_episode_steps)
+                for i in range(len(states))
+            ),
+            dtype=bool,
+            count=len(states),
+        )
@@ -4,6 +4,8 @@ Locomotion task: reward = delta player_x, done = max_steps only.
 
 from typing import Any
 
+import numpy as np
+
 from src.tasks.base_task import BaseTask
 
 
@@ -36,6 +38,24 @@ class LocomotionTask(BaseTask):
     ) -> bool:
         return step_count >= max_episode_steps
 
+    def compute_reward_batch(
+        self,
+        prev_states: np.ndarray,
+        next_states: np.ndarray,
+        events: np.ndarray,
+    ) -> np.ndarray:
+        delta_x = next_states["player_x"] - prev_states["player_x"]
+        return (delta_x * self.scale).astype(np.float32)
+
+    def check_done_batch(
+        self,
+        states: np.ndarray,
+        events: np.ndarray,
+        step_counts: np.ndarray,
+        max_episode_steps: int,
+    ) -> np.ndarray:
+        return np.asarray(step_counts) >= max_episode_steps
+
     def get_info(
         self,
         state: dict[str, Any],
@@ -4,7 +4,10 @@ Survival task: shaped rewards (wood, damage, death, survived_night); done on dea
 
 from typing import Any
 
-from src.reward import compute_reward
+import numpy as np
+
+from reward_events import EVENT_BITS
+from src.reward import compute_reward, compute_reward_batch
 from src.tasks.base_task import BaseTask
 
 
@@ -38,6 +41,26 @@ class SurvivalTask(BaseTask):
             return True
         return False
 
+    def compute_reward_batch(
+        self,
+        prev_states: np.ndarray,
+        next_states: np.ndarray,
+        events: np.ndarray,
+    ) -> np.ndarray:
+        return compute_reward_batch(prev_states, next_states, events)
+
+    def check_done_batch(
+        self,
+        states: np.ndarray,
+        events: np.ndarray,
+        step_counts: np.ndarray,
+        max_episode_steps: int,
+    ) -> np.ndarray:
+        done = np.asarray(step_counts) >= max_episode_steps
+        done |= states["health"] <= 0
+        done |= (events & EVENT_BITS["survived_night"]) != 0
+        return done
+
     def get_info(
         self,
         state: dict[str, Any],
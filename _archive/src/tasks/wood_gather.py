@@ -4,6 +4,8 @@ Wood gather task (stub): reward = wood_count delta; done = max_steps or optional
 
 from typing import Any
 
+import numpy as np
+
 from src.tasks.base_task import BaseTask
 
 
@@ -44,6 +46,27 @@ class WoodGatherTask(BaseTask):
             return True
         return False
 
+    def compute_reward_batch(
+        self,
+        prev_states: np.ndarray,
+        next_states: np.ndarray,
+        events: np.ndarray,
+    ) -> np.ndarray:
+        delta_wood = next_states["wood_count"] - prev_states["wood_count"]
+        return (delta_wood * self.reward_per_wood).astype(np.float32)
+
+    def check_done_batch(
+        self,
+        states: np.ndarray,
+        events: np.ndarray,
+        step_counts: np.ndarray,
+        max_episode_steps: int,
+    ) -> np.ndarray:
+        done = np.asarray(step_counts) >= max_episode_steps
+        if self.wood_threshold is not None:
+            done |= states["wood_count"] >= self.wood_threshold
+        return done
+
     def get_info(
         self,
         state: dict[str, Any],
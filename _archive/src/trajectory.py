@@ -0,0 +1,198 @@
+"""
+Columnar trajectory files: a TerrariaEnv wrapper that records every transition, and a reader
+that memory-maps them for offline analysis / behavior cloning.
+
+Layout of a recording directory:
+  meta.json               obs_dim, chunk_size, per-chunk lengths, total steps
+  episodes.npy            EPISODE_DTYPE rows: start (global step), length, return, terminated
+  <column>.<chunk>.npy    one preallocated .npy per column per chunk (np.memmap-able):
+                          obs (chunk, obs_dim) f32 | actions i32 | rewards f32 |
+                          terminated bool | truncated bool | events u32 (reward_events bitmask)
+Row t holds the observation the action was taken from, the action, and what it produced.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import gymnasium as gym
+import numpy as np
+
+from reward_events import events_to_mask
+
+DEFAULT_CHUNK_SIZE = 65536
+
+COLUMNS = {
+    "actions": np.int32,
+    "rewards": np.float32,
+    "terminated": np.bool_,
+    "truncated": np.bool_,
+    "events": np.uint32,
+}
+
+EPISODE_DTYPE = np.dtype(
+    [("start", np.int64), ("length", np.int64), ("return", np.float64), ("terminated", np.bool_)]
+)
+
+
+def _column_path(root: Path, name: str, chunk: int) -> Path:
+    return root / f"{name}.{chunk:05d}.npy"
+
+
+class TrajectoryWriter(gym.Wrapper):
+    """
+    Record a TerrariaEnv's transitions into `path` (see module docstring) while passing them through.
+    Chunks are preallocated with np.lib.format.open_memmap, so a step is a handful of array stores.
+    The index (meta.json, episodes.npy) is rewritten whenever a chunk fills and on close().
+    """
+
+    def __init__(self, env: gym.Env, path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(env)
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.obs_dim = int(np.prod(env.observation_space.shape))
+        self.steps = 0
+        self._chunk_lengths: list[int] = []
+        self._episodes: list[tuple[int, int, float, bool]] = []
+        self._episode_start: int | None = None
+        self._episode_return = 0.0
+        self._last_obs: np.ndarray | None = None
+        self._row = 0
+        self._open_chunk()
+
+    def _open_chunk(self) -> None:
+        chunk = len(self._chunk_lengths)
+        self._chunk_lengths.append(0)
+        self._row = 0
+        open_memmap = np.lib.format.open_memmap
+        self._obs = open_memmap(
+            _column_path(self.path, "obs", chunk), mode="w+", dtype=np.float32, shape=(self.chunk_size, self.obs_dim)
+        )
+        self._cols = {
+            name: open_memmap(_column_path(self.path, name, chunk), mode="w+", dtype=dtype, shape=(self.chunk_size,))
+            for name, dtype in COLUMNS.items()
+        }
+        # Plain ndarray views of the same pages: stores skip np.memmap's subclass overhead.
+        self._obs_rows = self._obs.view(np.ndarray)
+        self._actions, self._rewards, self._terminated, self._truncated, self._events = (
+            self._cols[name].view(np.ndarray) for name in COLUMNS
+        )
+
+    def _flush_chunk(self) -> None:
+        self._chunk_lengths[-1] = self._row
+        self._obs.flush()
+        for col in self._cols.values():
+            col.flush()
+        self._write_index()
+
+    def _write_index(self) -> None:
+        episodes = np.array(self._episodes, dtype=EPISODE_DTYPE)
+        np.save(self.path / "episodes.npy", episodes)
+        meta = {
+            "obs_dim": self.obs_dim,
+            "chunk_size": self.chunk_size,
+            "chunks": self._chunk_lengths,
+            "steps": self.steps,
+            "columns": ["obs", *COLUMNS],
+        }
+        (self.path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    def _end_episode(self, terminated: bool) -> None:
+        if self._episode_start is not None and self.steps > self._episode_start:
+            self._episodes.append(
+                (self._episode_start, self.steps - self._episode_start, self._episode_return, terminated)
+            )
+        self._episode_start = None
+
+    def reset(self, **kwargs: Any) -> tuple[np.ndarray, dict]:
+        self._end_episode(False)
+        obs, info = self.env.reset(**kwargs)
+        self._last_obs = obs
+        self._episode_start = self.steps
+        self._episode_return = 0.0
+        return obs, info
+
+    def step(self, action: Any) -> tuple[np.ndarray, float, bool, bool, dict]:
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        i = self._row
+        self._obs_rows[i] = self._last_obs
+        self._actions[i] = action
+        self._rewards[i] = reward
+        self._terminated[i] = terminated
+        self._truncated[i] = truncated
+        state = self.env.unwrapped.state
+        self._events[i] = events_to_mask(state.get("last_reward_events")) if state else 0
+        self._last_obs = obs
+        self._row = i + 1
+        self.steps += 1
+        self._episode_return += reward
+        if terminated or truncated:
+            self._end_episode(bool(terminated))
+        if self._row == self.chunk_size:
+            self._flush_chunk()
+            self._open_chunk()
+        return obs, reward, terminated, truncated, info
+
+    def close(self) -> None:
+        self._end_episode(False)
+        self._flush_chunk()
+        super().close()
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped view of a TrajectoryWriter directory; nothing is loaded until sliced.
+    - len(reader): total steps; reader.episodes: EPISODE_DTYPE array.
+    - column(name): per-chunk read-only memmaps, trimmed to their valid length.
+    - slice(name, start, stop): global step range of one column (copies only across chunk edges).
+    - episode(i): dict of column arrays for episode i.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text())
+        self.obs_dim = meta["obs_dim"]
+        self.chunk_size = meta["chunk_size"]
+        self.chunk_lengths: list[int] = meta["chunks"]
+        self.columns: list[str] = meta["columns"]
+        self.steps = meta["steps"]
+        self.episodes = np.load(self.path / "episodes.npy")
+        self._cache: dict[str, list[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.steps
+
+    def column(self, name: str) -> list[np.ndarray]:
+        if name not in self._cache:
+            self._cache[name] = [
+                np.load(_column_path(self.path, name, c), mmap_mode="r")[:n]
+                for c, n in enumerate(self.chunk_lengths)
+                if n
+            ]
+        return self._cache[name]
+
+    def slice(self, name: str, start: int, stop: int) -> np.ndarray:
+        parts = []
+        # Chunks are full except the last, so global step t is row t % chunk_size of chunk t // chunk_size.
+        chunks = self.column(name)
+        while start < stop:
+            c, row = divmod(start, self.chunk_size)
+            take = min(stop - start, self.chunk_size - row)
+            parts.append(chunks[c][row : row + take])
+            start += take
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return self.column(name)[0][:0] if self.chunk_lengths[0] else np.empty(0)
+        return np.concatenate(parts)
+
+    def episode(self, i: int) -> dict[str, np.ndarray]:
+        ep = self.episodes[i]
+        start, stop = int(ep["start"]), int(ep["start"] + ep["length"])
+        return {name: self.slice(name, start, stop) for name in self.columns}
+
+    def iter_chunks(self) -> Iterator[dict[str, np.ndarray]]:
+        """Yield each chunk's columns as memmaps (for streaming over a whole recording)."""
+        for c in range(len(self.column("obs"))):
+            yield {name: self.column(name)[c] for name in self.columns}
@@ -0,0 +1,291 @@
+"""
+Native vectorized Terraria env for stable_baselines3.
+Sends all N actions first, then collects the N replies with a selector as they arrive,
+so a vector step costs about one round trip instead of N in a row (DummyVecEnv).
+Observations are encoded straight into one preallocated (N, obs_dim) float32 array.
+With multiplex=True all N slots are worlds 0..N-1 on one connection, stepped by a single
+batch command per vector step (multi-world servers such as mock_server.py).
+MockVecEnv is the same VecEnv over in-process vectorized mock worlds (no server, no sockets).
+"""
+
+import json
+import selectors
+import socket
+from typing import Any, Sequence
+
+import numpy as np
+import gymnasium as gym
+from stable_baselines3.common.vec_env import VecEnv
+
+from bridge_client import RESET_COMMAND, _action_line, _batch_line, _reset_line
+from framing import LineFramer
+from src.batch import EVENT_DTYPE, STATE_DTYPE, events_to_mask, write_state_row
+from src.environment import MAX_EPISODE_STEPS, NUM_ACTIONS, default_encoder
+from src.mock_backend import VectorMockBackend
+from src.observation import ObservationEncoder
+from src.tasks.base_task import BaseTask
+
+_ACTION_LINES = [_action_line(a) for a in range(NUM_ACTIONS)]
+_RESET_LINE = _reset_line()
+
+
+class TerrariaVecEnv(VecEnv):
+    """
+    N Terraria connections stepped as one VecEnv. Each slot behaves like TerrariaEnv
+    (same observation, task reward/done/info); finished slots are reset automatically
+    and their last observation is stored in info["terminal_observation"], as SB3 expects.
+    - multiplex: one connection to host:port, slot i = world i, one batch command per step.
+    - seed: if set, sent as "seed S" on connect (per connection: seed + i; multiplexed: seed once,
+      so world i uses seed + i either way). Leave None for servers without the seed command.
+    - set_task(task): swap the task for every slot; connections stay open (reset() for fresh episodes).
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        host: str = "localhost",
+        port: int = 8765,
+        max_episode_steps: int = MAX_EPISODE_STEPS,
+        task: BaseTask | None = None,
+        addresses: Sequence[tuple[str, int]] | None = None,
+        timeout: float = 30.0,
+        encoder: ObservationEncoder | None = None,
+        multiplex: bool = False,
+        seed: int | None = None,
+    ):
+        if task is None:
+            raise ValueError("task must be a BaseTask instance (e.g. get_task('locomotion')).")
+        if multiplex and addresses is not None:
+            raise ValueError("multiplex=True uses one connection to host:port; don't pass addresses")
+        addresses = list(addresses) if addresses is not None else [(host, port)] * num_envs
+        if multiplex:
+            addresses = addresses[:1]
+        elif len(addresses) != num_envs:
+            raise ValueError(f"Expected {num_envs} addresses, got {len(addresses)}")
+        self.encoder = encoder or default_encoder()
+        observation_space = gym.spaces.Box(
+            low=self.encoder.low, high=self.encoder.high, shape=(self.encoder.dim,), dtype=np.float32
+        )
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, gym.spaces.Discrete(NUM_ACTIONS))
+        self.task = task
+        self.max_episode_steps = max_episode_steps
+        self.addresses = addresses
+        self.timeout = timeout
+        self.multiplex = multiplex
+        self.world_seed = seed  # not self.seed: that would hide VecEnv.seed()
+
+        self._socks: list[socket.socket] = []
+        self._framers: list[LineFramer] = []
+        self._selector = selectors.DefaultSelector()
+        self._states: list[dict[str, Any] | None] = [None] * num_envs
+        self._obs = np.zeros((num_envs, self.encoder.dim), dtype=np.float32)
+        self._struct = np.zeros(num_envs, dtype=STATE_DTYPE)
+        self._prev_struct = np.zeros(num_envs, dtype=STATE_DTYPE)
+        self._events = np.zeros(num_envs, dtype=EVENT_DTYPE)
+        self._step_counts = np.zeros(num_envs, dtype=np.int64)
+        self._episode_rewards = np.zeros(num_envs, dtype=np.float64)
+        self._actions: np.ndarray | None = None
+
+    def _connect(self) -> None:
+        if self._socks:
+            return
+        for i, (host, port) in enumerate(self.addresses):
+            sock = socket.create_connection((host, port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socks.append(sock)
+            self._framers.append(LineFramer(sock))
+            self._selector.register(sock, selectors.EVENT_READ, i)
+        if self.world_seed is not None:
+            for i, sock in enumerate(self._socks):
+                sock.sendall(f"seed {self.world_seed + i}\n".encode("utf-8"))
+            for framer in self._framers:
+                if framer.readline() is None:
+                    raise ConnectionError("Connection closed while seeding")
+
+    def _send(self, indices: Sequence[int], lines: Sequence[bytes]) -> None:
+        for i, line in zip(indices, lines):
+            self._socks[i].sendall(line)
+
+    def _collect(self, indices: Sequence[int]) -> None:
+        """Read one reply per env in indices, in arrival order; parse into _states and _obs rows."""
+        if self.multiplex:
+            self._collect_batch(indices)
+            return
+        waiting = set()
+        for i in indices:
+            line = self._framers[i].pop_line()
+            if line is None:
+                waiting.add(i)
+            else:
+                self._store(i, line)
+        while waiting:
+            events = self._selector.select(self.timeout)
+            if not events:
+                raise TimeoutError(f"No reply from envs {sorted(waiting)} within {self.timeout}s")
+            for key, _ in events:
+                i = key.data
+                if i not in waiting:
+                    continue
+                framer = self._framers[i]
+                if framer.fill() == 0:
+                    raise ConnectionError(f"Env {i}: connection closed by server")
+                line = framer.pop_line()
+                if line is not None:
+                    self._store(i, line)
+                    waiting.discard(i)
+
+    def _collect_batch(self, indices: Sequence[int]) -> None:
+        """Read the single batch reply carrying the states of indices (multiplexed connection)."""
+        line = self._framers[0].readline()
+        if line is None:
+            raise ConnectionError("Connection closed by server")
+        msg = json.loads(line)
+        states = msg.get("states") or []
+        if "error" in msg or len(states) != len(indices):
+            raise ConnectionError(f"Bad batch reply: {msg.get('error', f'{len(states)} states')}")
+        for i, state in zip(indices, states):
+            self._store_state(i, state)
+
+    def _store(self, i: int, line: bytes) -> None:
+        self._store_state(i, json.loads(line))
+
+    def _store_state(self, i: int, state: dict[str, Any]) -> None:
+        self._states[i] = state
+        self.encoder.encode_row(state, self._obs, i)
+        write_state_row(state, self._struct, i)
+        self._events[i] = events_to_mask(state.get("last_reward_events"))
+
+    def _reset_envs(self, indices: Sequence[int]) -> None:
+        if self.multiplex:
+            self._socks[0].sendall(_batch_line((i, RESET_COMMAND) for i in indices))
+        else:
+            self._send(indices, [_RESET_LINE] * len(indices))
+        self._collect(indices)
+        self._step_counts[indices] = 0
+        self._episode_rewards[indices] = 0.0
+
+    def reset(self) -> np.ndarray:
+        self._connect()
+        self._reset_envs(range(self.num_envs))
+        return self._obs.copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        if any(s is None for s in self._states):
+            raise RuntimeError("Call reset() before step()")
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        actions = [a if 0 <= a < NUM_ACTIONS else 6 for a in self._actions.tolist()]
+        if self.multiplex:
+            self._socks[0].sendall(_batch_line(enumerate(actions)))
+            return
+        self._send(range(self.num_envs), [_ACTION_LINES[a] for a in actions])
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        np.copyto(self._prev_struct, self._struct)
+        self._collect(range(self.num_envs))
+        self._step_counts += 1
+
+        rewards = self.task.compute_reward_batch(self._prev_struct, self._struct, self._events)
+        dones = self.task.check_done_batch(self._struct, self._events, self._step_counts, self.max_episode_steps)
+        self._episode_rewards += rewards
+
+        infos = []
+        for i, state in enumerate(self._states):
+            info = self.task.get_info(state, float(self._episode_rewards[i]), int(self._step_counts[i]))
+            if dones[i]:
+                info["terminal_observation"] = self._obs[i].copy()
+                info["TimeLimit.truncated"] = False
+            infos.append(info)
+
+        done_idx = np.flatnonzero(dones).tolist()
+        if done_idx:
+            self._reset_envs(done_idx)
+        return self._obs.copy(), rewards, dones, infos
+
+    def set_task(self, task: BaseTask) -> None:
+        self.task = task
+
+    def close(self) -> None:
+        for sock in self._socks:
+            try:
+                self._selector.unregister(sock)
+                sock.close()
+            except (KeyError, OSError):
+                pass
+        self._socks.clear()
+        self._framers.clear()
+
+    def get_attr(self, attr_name: str, indices: Any = None) -> list[Any]:
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: Any = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args: Any, indices: Any = None, **method_kwargs: Any) -> list[Any]:
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class: type, indices: Any = None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+
+class MockVecEnv(TerrariaVecEnv):
+    """
+    TerrariaVecEnv semantics over a VectorMockBackend: N mock worlds stepped with NumPy in-process.
+    Like the socket version, a finished slot starts a fresh episode (its random stream continues).
+    For throughput, task.get_info is only called for finished slots; other infos are empty dicts.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        max_episode_steps: int = MAX_EPISODE_STEPS,
+        task: BaseTask | None = None,
+        seed: int | None = 42,
+        seeds: Sequence[int | None] | None = None,
+        encoder: ObservationEncoder | None = None,
+    ):
+        super().__init__(num_envs, max_episode_steps=max_episode_steps, task=task, encoder=encoder)
+        self.backend = VectorMockBackend(num_envs, seed=seed, seeds=seeds)
+        self._ready = False
+
+    def reset(self) -> np.ndarray:
+        self.backend.reset()
+        self._step_counts[:] = 0
+        self._episode_rewards[:] = 0.0
+        self._ready = True
+        return self.encoder.encode_struct(self.backend.states, self._obs).copy()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        if not self._ready:
+            raise RuntimeError("Call reset() before step()")
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        np.copyto(self._prev_struct, self.backend.states)
+        states, events = self.backend.step(self._actions)
+        self._step_counts += 1
+
+        rewards = self.task.compute_reward_batch(self._prev_struct, states, events)
+        dones = self.task.check_done_batch(states, events, self._step_counts, self.max_episode_steps)
+        self._episode_rewards += rewards
+        self.encoder.encode_struct(states, self._obs)
+
+        infos: list[dict] = [{} for _ in range(self.num_envs)]
+        done_idx = np.flatnonzero(dones).tolist()
+        for i in done_idx:
+            info = self.task.get_info(
+                self.backend.state(i), float(self._episode_rewards[i]), int(self._step_counts[i])
+            )
+            info["terminal_observation"] = self._obs[i].copy()
+            info["TimeLimit.truncated"] = False
+            infos[i] = info
+        if done_idx:
+            self.backend.reset(done_idx)
+            self._obs[done_idx] = self.encoder.encode_struct(self.backend.states[done_idx])
+            self._step_counts[done_idx] = 0
+            self._episode_rewards[done_idx] = 0.0
+        return self._obs.copy(), rewards, dones, infos
+
+    def close(self) -> None:
+        pass
@@ -1,6 +1,6 @@
 """
 Run random actions for 10 episodes to verify env + mock + task pipeline.
-Starts mock server in a subprocess, then runs TerrariaEnv with random agent.
+Starts a mock server (server_manager.MockServerManager), then runs TerrariaEnv with random agent.
 
 Usage:
   python test_random_agent.py              # survival task
@@ -9,18 +9,15 @@ Usage:
 
 import argparse
 import random
-import subprocess
-import sys
-import time
-from pathlib import Path
 
 from src.environment import TerrariaEnv
 from src.tasks import get_task
 
-MOCK_PORT = 8765
+# Root modules are importable once src is (src/__init__ puts the repo root on sys.path).
+from server_manager import MockServerManager
+
 NUM_EPISODES = 10
 MAX_EPISODE_STEPS = 200  # short episodes for quick smoke test
-PROJECT_ROOT = Path(__file__).resolve().parent
 
 
 def main() -> None:
@@ -35,15 +32,9 @@ def main() -> None:
     task_name = "locomotion" if args.move_right else "survival"
     task = get_task(task_name, max_episode_steps=MAX_EPISODE_STEPS)
 
-    proc = subprocess.Popen(
-        [sys.executable, "mock_server.py", str(MOCK_PORT)],
-        cwd=PROJECT_ROOT,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    try:
-        time.sleep(0.5)
-        env = TerrariaEnv(port=MOCK_PORT, max_episode_steps=MAX_EPISODE_STEPS, task=task)
+    with MockServerManager(1) as servers:
+        host, port = servers.addresses()[0]
+        env = TerrariaEnv(host=host, port=port, max_episode_steps=MAX_EPISODE_STEPS, task=task)
         random.seed(42)
 
         for ep in range(1, NUM_EPISODES + 1):
@@ -61,9 +52,6 @@ def main() -> None:
                 f"survival_time={info['survival_time']}{extra}"
             )
         env.close()
-    finally:
-        proc.terminate()
-        proc.wait(timeout=2)
 
 
 if __name__ == "__main__":
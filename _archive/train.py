@@ -1,70 +1,199 @@
 """
 Train PPO on Terraria env. Task controls reward and termination.
-Starts mock_server in a subprocess if not already running.
+Starts mock servers (server_manager.MockServerManager: free ports, one per core up to --n-envs,
+ready when they answer) unless --port names an already running server.
+--latency (TerrariaEnv slots: --n-envs 1 or --vec-env shm) prints per-phase step latency
+percentiles at the end of every episode.
+--overlap (--n-envs >= 2) splits the envs into two groups and runs PPO's inference for one group
+while the other group's step is in flight (src/rollout.py).
+--frame-stack K feeds the policy the last K observations of each env (src/frame_stack.py);
+evaluate.py picks K up from the saved model.
+--frame-skip N repeats each action N frames: one action-sequence command per step to the mock servers
+it starts, N single actions to a --port server.
 
 Usage:
   python train.py --task locomotion --timesteps 50000
   python train.py --task wood --timesteps 30000 --save-path models/wood
+  python train.py --task wood --n-envs 1024 --vec-env mock --timesteps 5000000   # in-process, no server
+  python train.py --task wood --n-envs 8 --overlap
+  python train.py --task survival --n-envs 64 --vec-env mock --frame-stack 8
 """
 
 import argparse
-import sys
-import time
+import functools
 from pathlib import Path
 
 from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv
 
 from src.environment import TerrariaEnv
+from src.frame_stack import FrameStackVecEnv
+from src.rollout import OverlappedPPO, split_groups
+from src.shm_vec_env import SharedMemoryVecEnv
 from src.tasks import get_task
+from src.vec_env import MockVecEnv, TerrariaVecEnv
+
+# Root modules are importable once src is (src/__init__ puts the repo root on sys.path).
+from latency import PhaseTimer
+from server_manager import MockServerManager, default_server_count
 
-PROJECT_ROOT = Path(__file__).resolve().parent
-DEFAULT_PORT = 8765
 MAX_EPISODE_STEPS = 10_000
 DEFAULT_TIMESTEPS = 50_000
+MOCK_SEED = 42
 
 
-def make_env(port: int, task_name: str):
-    """Factory for TerrariaEnv with given task."""
-    task = get_task(task_name, max_episode_steps=MAX_EPISODE_STEPS)
-    def _init():
-        return TerrariaEnv(port=port, max_episode_steps=MAX_EPISODE_STEPS, task=task)
-    return _init
+def make_vec_env(
+    vec_env: str,
+    task,
+    addresses: list[tuple[str, int]],
+    offset: int = 0,
+    max_episode_steps: int = MAX_EPISODE_STEPS,
+    frame_skip: int = 1,
+    latency: bool = False,
+    frame_stack: int = 1,
+    seed: int | None = MOCK_SEED,
+    action_sequences: bool = False,
+):
+    """
+    VecEnv of kind vec_env ("socket", "shm", "mock") for slots offset .. offset + len(addresses) - 1
+    of the run (one slot per address; mock worlds ignore the addresses).
+    seed: slot j of the run plays world seed + j, so slots sharing a server don't duplicate each other
+    (socket: "seed" on connect; shm: the first reset; mock: the world seeds). None: no seeding, for
+    servers without the seed / "reset S" commands.
+    frame_stack > 1 wraps it in FrameStackVecEnv (last frame_stack observations per slot).
+    action_sequences: frame_skip repeats go out as one action-sequence command (see TerrariaEnv).
+    """
+    slot_seed = None if seed is None else seed + offset
+    if vec_env == "mock":
+        env = MockVecEnv(len(addresses), max_episode_steps=max_episode_steps, task=task, seed=slot_seed)
+    elif vec_env == "shm":
+        env_fns = [
+            functools.partial(
+                TerrariaEnv,
+                host=host,
+                port=port,
+                max_episode_steps=max_episode_steps,
+                task=task,
+                frame_skip=frame_skip,
+                latency=PhaseTimer(report=print) if latency else None,
+                action_sequences=action_sequences,
+            )
+            for host, port in addresses
+        ]
+        env = SharedMemoryVecEnv(env_fns)
+        if slot_seed is not None:
+            env.seed(slot_seed)  # worker i's first reset uses slot_seed + i
+    else:
+        env = TerrariaVecEnv(
+            len(addresses), addresses=addresses, max_episode_steps=max_episode_steps, task=task, seed=slot_seed
+        )
+    return FrameStackVecEnv(env, frame_stack) if frame_stack > 1 else env
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train PPO on Terraria task.")
     parser.add_argument("--task", type=str, default="locomotion", help="Task: locomotion, wood, survival")
     parser.add_argument("--timesteps", type=int, default=DEFAULT_TIMESTEPS, help="Total training timesteps")
-    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Mock server port")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Use the server already running on this port (default: start mock servers)",
+    )
+    parser.add_argument(
+        "--servers", type=int, default=None, help="Mock servers to start (default: one per core, at most --n-envs)"
+    )
     parser.add_argument("--save-path", type=str, default=None, help="Model save path (default: models/<task>)")
+    parser.add_argument("--frame-skip", type=int, default=1, help="Repeat each action N frames")
     parser.add_argument("--n-envs", type=int, default=1, help="Number of parallel envs (default 1)")
+    parser.add_argument(
+        "--vec-env",
+        choices=["socket", "shm", "mock"],
+        default="socket",
+        help=(
+            "With --n-envs > 1: 'socket' batches I/O in this process; 'shm' runs one env per worker process. "
+            "'mock' steps --n-envs in-process mock worlds with NumPy (no server)"
+        ),
+    )
+    parser.add_argument("--latency", action="store_true", help="Print per-phase step latency every episode")
+    parser.add_argument(
+        "--overlap", action="store_true", help="Two env groups: inference for one while the other steps"
+    )
+    parser.add_argument(
+        "--frame-stack", type=int, default=1, help="Observe the last K observations per env (default 1: off)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=MOCK_SEED, help="World seed: env i plays seed + i (not sent with --port)"
+    )
     args = parser.parse_args()
+    if args.frame_stack < 1:
+        parser.error("--frame-stack must be >= 1")
+    if args.overlap and args.n_envs < 2:
+        parser.error("--overlap needs --n-envs >= 2")
+    if args.latency and (args.vec_env == "mock" or (args.n_envs > 1 and args.vec_env != "shm")):
+        parser.error("--latency times TerrariaEnv slots: --n-envs 1 or --vec-env shm")
+    if args.frame_skip > 1 and (args.vec_env == "mock" or (args.n_envs > 1 and args.vec_env != "shm")):
+        parser.error("--frame-skip needs a TerrariaEnv per slot: --n-envs 1 or --vec-env shm")
 
     save_path = args.save_path or f"models/{args.task}"
     if not save_path.endswith(".zip"):
         save_path = save_path.rstrip("/")
 
-    # Start mock server in subprocess
-    import subprocess
-    proc = subprocess.Popen(
-        [sys.executable, "mock_server.py", str(args.port)],
-        cwd=PROJECT_ROOT,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
+    # Start mock servers (not needed for the in-process mock backend or an existing server)
+    servers = None
+    addresses = [("localhost", args.port)] * args.n_envs
+    if args.vec_env != "mock" and args.port is None:
+        servers = MockServerManager(args.servers or min(args.n_envs, default_server_count()))
+        servers.start()
+        addresses = servers.addresses(args.n_envs)
+    # A server we didn't start may not know the seed or action-sequence commands.
+    seed = args.seed if args.port is None or args.vec_env == "mock" else None
+    action_sequences = args.port is None
     try:
-        time.sleep(0.5)
-        if args.n_envs == 1:
-            task = get_task(args.task, max_episode_steps=MAX_EPISODE_STEPS)
-            env = TerrariaEnv(port=args.port, max_episode_steps=MAX_EPISODE_STEPS, task=task)
+        task = get_task(args.task, max_episode_steps=MAX_EPISODE_STEPS)
+        if args.overlap:
+            env = split_groups(
+                lambda count, offset: make_vec_env(
+                    args.vec_env,
+                    task,
+                    addresses[offset : offset + count],
+                    offset,
+                    frame_skip=args.frame_skip,
+                    latency=args.latency,
+                    frame_stack=args.frame_stack,
+                    seed=seed,
+                    action_sequences=action_sequences,
+                ),
+                args.n_envs,
+            )
+        elif args.n_envs == 1 and args.vec_env != "mock":
+            host, port = addresses[0]
+            env = TerrariaEnv(
+                host=host,
+                port=port,
+                max_episode_steps=MAX_EPISODE_STEPS,
+                task=task,
+                frame_skip=args.frame_skip,
+                latency=PhaseTimer(report=print) if args.latency else None,
+                action_sequences=action_sequences,
+            )
+            if args.frame_stack > 1:
+                single = Monitor(env)
+                env = FrameStackVecEnv(DummyVecEnv([lambda: single]), args.frame_stack)
         else:
             env = make_vec_env(
-                make_env(args.port, args.task),
-                n_envs=args.n_envs,
+                args.vec_env,
+                task,
+                addresses,
+                frame_skip=args.frame_skip,
+                latency=args.latency,
+                frame_stack=args.frame_stack,
+                seed=seed,
+                action_sequences=action_sequences,
             )
 
-        model = PPO(
+        model = (OverlappedPPO if args.overlap else PPO)(
             "MlpPolicy",
             env,
             verbose=1,
@@ -76,8 +205,8 @@ def main() -> None:
         print(f"Saved model to {save_path}")
         env.close()
     finally:
-        proc.terminate()
-        proc.wait(timeout=2)
+        if servers is not None:
+            servers.stop()
 
 
 if __name__ == "__main__":
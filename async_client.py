@@ -0,0 +1,107 @@
+"""
+asyncio bridge client for Terraria RL (standard library only).
+Same surface as bridge_client.BridgeClient (connect / request_state / send_action / close),
+but coroutine-based, so many game connections can share one event loop instead of
+one blocking thread each.
+
+Example:
+  async def main():
+      clients = [AsyncBridgeClient(port=8765) for _ in range(32)]
+      await asyncio.gather(*(c.connect() for c in clients))
+      states = await asyncio.gather(*(c.send_action(1) for c in clients))
+"""
+
+import asyncio
+import json
+import socket
+from typing import Any, Awaitable
+
+from bridge_client import DEFAULT_HOST, DEFAULT_PORT, _action_line, _reset_line
+
+STREAM_LIMIT = 1 << 20  # max line length accepted by readuntil
+
+
+class AsyncBridgeClient:
+    """
+    Coroutine TCP client: one request in flight per connection, replies read with
+    StreamReader.readuntil(b"\\n"). Raises ConnectionError when the server closes or a reply
+    line exceeds STREAM_LIMIT. A request that fails that way, times out or is cancelled closes the
+    connection, since the rest of its reply may still arrive and would be read as the next one;
+    connect() again to continue.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        timeout: float | None = 5.0,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        if self.connected:
+            return
+        self._reader, self._writer = await self._with_timeout(
+            asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        )
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._reader = self._writer = None
+
+    async def request_state(self) -> dict:
+        """Send 'state', receive one newline-terminated JSON line, return parsed dict."""
+        return await self._request(b"state\n")
+
+    async def reset(self, seed: int | None = None) -> dict:
+        """Send 'reset' (or 'reset S'), return the fresh episode state."""
+        return await self._request(_reset_line(seed))
+
+    async def send_action(self, action: int) -> dict:
+        """Send {"action_id": N}, receive the resulting state line, return parsed dict."""
+        return await self._request(_action_line(action))
+
+    async def _request(self, line: bytes) -> dict:
+        async with self._lock:
+            if self._writer is None:  # checked under the lock: a request ahead of us may have aborted
+                raise ConnectionError("Not connected")
+            try:
+                self._writer.write(line)
+                await self._writer.drain()
+                raw = await self._with_timeout(self._reader.readuntil(b"\n"))
+            except asyncio.IncompleteReadError as e:
+                self._abort()
+                raise ConnectionError("Connection closed") from e
+            except asyncio.LimitOverrunError as e:
+                self._abort()  # the rest of the oversized line is still buffered
+                raise ConnectionError(f"Reply line longer than {STREAM_LIMIT} bytes") from e
+            except (ConnectionError, asyncio.TimeoutError, asyncio.CancelledError):
+                self._abort()
+                raise
+        return json.loads(raw)
+
+    def _abort(self) -> None:
+        """Drop the connection without waiting (a late reply must not answer a later request)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    def _with_timeout(self, aw: Awaitable[Any]) -> Awaitable[Any]:
+        return aw if self.timeout is None else asyncio.wait_for(aw, self.timeout)
@@ -0,0 +1 @@
+"""Throughput benchmarks for the bridge stack. Run from the repo root, e.g. python -m benchmarks.bench_framing."""
@@ -0,0 +1,73 @@
+"""
+K connections stepped one after another with BridgeClient vs. concurrently with
+AsyncBridgeClient on one event loop, against mock_server.py (env steps/sec).
+
+Usage:
+  python -m benchmarks.bench_async
+  python -m benchmarks.bench_async --envs 32 --steps 500
+"""
+
+import argparse
+import asyncio
+import time
+
+from async_client import AsyncBridgeClient
+from benchmarks.common import HOST, mock_server
+from bridge_client import BridgeClient
+
+
+def _run_sequential(port: int, n_envs: int, steps: int) -> float:
+    clients = [BridgeClient(host=HOST, port=port) for _ in range(n_envs)]
+    for c in clients:
+        c.connect()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            for c in clients:
+                c.send_action(1)
+        return n_envs * steps / (time.perf_counter() - t0)
+    finally:
+        for c in clients:
+            c.close()
+
+
+async def _run_async(port: int, n_envs: int, steps: int) -> float:
+    clients = [AsyncBridgeClient(host=HOST, port=port) for _ in range(n_envs)]
+    await asyncio.gather(*(c.connect() for c in clients))
+    try:
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            await asyncio.gather(*(c.send_action(1) for c in clients))
+        return n_envs * steps / (time.perf_counter() - t0)
+    finally:
+        await asyncio.gather(*(c.close() for c in clients))
+
+
+def run(port: int, n_envs: int, steps: int) -> list[tuple[str, float]]:
+    """Return (scenario, env_steps_per_sec) rows."""
+    return [
+        ("sequential", _run_sequential(port, n_envs, steps)),
+        ("asyncio", asyncio.run(_run_async(port, n_envs, steps))),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs. asyncio multi-connection stepping.")
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=300, help="Vector steps per scenario")
+    parser.add_argument("--port", type=int, default=None, help="Use a running server instead of spawning one")
+    args = parser.parse_args()
+
+    if args.port is not None:
+        rows = run(args.port, args.envs, args.steps)
+    else:
+        with mock_server() as port:
+            rows = run(port, args.envs, args.steps)
+
+    print(f"{'scenario':<12} {'env steps/sec':>14}")
+    for name, rate in rows:
+        print(f"{name:<12} {rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Simulator backend throughput: mock steps/sec over TCP vs. in-process MockBackend vs.
+the NumPy VectorMockBackend (and MockVecEnv with the task batch API on top).
+
+Usage:
+  python -m benchmarks.bench_backend
+  python -m benchmarks.bench_backend --steps 20000 --envs 1024 4096
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import HOST, mock_server
+from src.client import TerrariaClient
+from src.mock_backend import MockBackend, VectorMockBackend
+from src.tasks import get_task
+from src.vec_env import MockVecEnv
+
+
+def _socket_rate(steps: int) -> float:
+    with mock_server() as port:
+        client = TerrariaClient(host=HOST, port=port)
+        client.get_state()
+        t0 = time.perf_counter()
+        for i in range(steps):
+            client.send_action(i % 7)
+        dt = time.perf_counter() - t0
+        client.close()
+    return steps / dt
+
+
+def _backend_rate(steps: int) -> float:
+    backend = MockBackend()
+    t0 = time.perf_counter()
+    for i in range(steps):
+        backend.send_action(i % 7)
+    return steps / (time.perf_counter() - t0)
+
+
+def _vector_rate(num_envs: int, steps: int) -> float:
+    backend = VectorMockBackend(num_envs)
+    iters = max(1, steps // num_envs)
+    actions = np.random.default_rng(0).integers(0, 7, (iters, num_envs))
+    t0 = time.perf_counter()
+    for k in range(iters):
+        backend.step(actions[k])
+    return iters * num_envs / (time.perf_counter() - t0)
+
+
+def _vec_env_rate(num_envs: int, steps: int) -> float:
+    env = MockVecEnv(num_envs, task=get_task("wood"), max_episode_steps=1000)
+    env.reset()
+    iters = max(1, steps // num_envs)
+    actions = np.random.default_rng(0).integers(0, 7, (iters, num_envs))
+    t0 = time.perf_counter()
+    for k in range(iters):
+        env.step(actions[k])
+    return iters * num_envs / (time.perf_counter() - t0)
+
+
+def run(steps: int, envs: list[int]) -> list[tuple[str, float]]:
+    """Return (scenario, steps_per_sec) rows."""
+    rows = [("TerrariaClient (TCP)", _socket_rate(min(steps, 20_000))), ("MockBackend", _backend_rate(steps))]
+    for n in envs:
+        rows.append((f"VectorMockBackend x{n}", _vector_rate(n, steps * 10)))
+        rows.append((f"MockVecEnv x{n}", _vec_env_rate(n, steps * 10)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mock simulator backends.")
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--envs", type=int, nargs="+", default=[256, 4096])
+    args = parser.parse_args()
+
+    print(f"{'scenario':<26} {'steps/sec':>12}")
+    for name, rate in run(args.steps, args.envs):
+        print(f"{name:<26} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Frame stacking (src/frame_stack.py) vs. SB3's VecFrameStack.
+
+1. Equivalence: both wrap the same MockVecEnv worlds; stacked observations and the stacked
+   terminal observations must be identical.
+2. Cost: wrapper time per vector step (us) over a zero-cost inner VecEnv (fixed observations,
+   one env finishing every --episode-steps / N steps), so only the stacking is timed.
+   FrameStackVecEnv writes 2 rows per env per step (copy=False returns a view, copy=True adds one
+   copy of the stack); VecFrameStack shifts the whole stack every step.
+
+Usage:
+  python -m benchmarks.bench_frame_stack
+  python -m benchmarks.bench_frame_stack --envs 256 1024 --k 8 64
+"""
+
+import argparse
+import time
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv, VecFrameStack
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+from src.environment import NUM_ACTIONS, OBS_HIGH, OBS_KEYS, OBS_LOW
+from src.frame_stack import FrameStackVecEnv
+from src.tasks import get_task
+from src.vec_env import MockVecEnv
+
+
+class _FixedVecEnv(VecEnv):
+    """Returns the same preallocated observations every step; slot t % N finishes every episode_steps / N steps."""
+
+    def __init__(self, num_envs: int, episode_steps: int):
+        self.render_mode = None
+        observation_space = gym.spaces.Box(low=OBS_LOW, high=OBS_HIGH, shape=(len(OBS_KEYS),), dtype=np.float32)
+        super().__init__(num_envs, observation_space, gym.spaces.Discrete(NUM_ACTIONS))
+        self._obs = np.ones((num_envs, len(OBS_KEYS)), dtype=np.float32)
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._period = max(1, episode_steps // num_envs)
+        self._t = 0
+
+    def reset(self) -> np.ndarray:
+        return self._obs
+
+    def step_async(self, actions: np.ndarray) -> None:
+        pass
+
+    def step_wait(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        self._t += 1
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos: list[dict] = [{} for _ in range(self.num_envs)]
+        if self._t % self._period == 0:
+            i = (self._t // self._period) % self.num_envs
+            dones[i] = True
+            infos[i] = {"terminal_observation": self._obs[i]}
+        return self._obs, self._rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def get_attr(self, attr_name: str, indices: Any = None) -> list[Any]:
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: Any = None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args: Any, indices: Any = None, **method_kwargs: Any) -> list[Any]:
+        return [getattr(self, method_name)(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class: type, indices: Any = None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+
+def check_equivalence(num_envs: int, k: int, steps: int) -> bool:
+    task = get_task("wood", max_episode_steps=50)
+    ours = FrameStackVecEnv(MockVecEnv(num_envs, max_episode_steps=50, task=task, seed=1), k, copy=False)
+    sb3 = VecFrameStack(MockVecEnv(num_envs, max_episode_steps=50, task=task, seed=1), k)
+    if not np.array_equal(ours.reset(), sb3.reset()):
+        return False
+    rng = np.random.default_rng(0)
+    for _ in range(steps):
+        actions = rng.integers(0, NUM_ACTIONS, num_envs)
+        obs_a, _, dones, infos_a = ours.step(actions)
+        obs_b, _, _, infos_b = sb3.step(actions)
+        if not np.array_equal(obs_a, obs_b):
+            return False
+        for i in np.flatnonzero(dones).tolist():
+            if not np.array_equal(infos_a[i]["terminal_observation"], infos_b[i]["terminal_observation"]):
+                return False
+    return True
+
+
+def _us_per_step(venv: VecEnv, steps: int) -> float:
+    actions = np.zeros(venv.num_envs, dtype=np.int64)
+    venv.reset()
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        venv.step(actions)
+    return (time.perf_counter() - t0) / steps * 1e6
+
+
+def run(envs: list[int], ks: list[int], steps: int, episode_steps: int) -> list[tuple[int, int, float, float, float]]:
+    """Return [(N, K, view us, copy us, VecFrameStack us)] per vector step, inner env cost subtracted."""
+    rows = []
+    for n in envs:
+        base = _us_per_step(_FixedVecEnv(n, episode_steps), steps)
+        for k in ks:
+            view = _us_per_step(FrameStackVecEnv(_FixedVecEnv(n, episode_steps), k, copy=False), steps)
+            copy = _us_per_step(FrameStackVecEnv(_FixedVecEnv(n, episode_steps), k), steps)
+            sb3 = _us_per_step(VecFrameStack(_FixedVecEnv(n, episode_steps), k), steps)
+            rows.append((n, k, view - base, copy - base, sb3 - base))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ring-buffer frame stacking against VecFrameStack.")
+    parser.add_argument("--envs", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--k", type=int, nargs="+", default=[4, 32])
+    parser.add_argument("--steps", type=int, default=2000, help="Vector steps per measurement")
+    parser.add_argument("--episode-steps", type=int, default=1000, help="Mean episode length of the inner env")
+    args = parser.parse_args()
+
+    same = all(check_equivalence(16, k, 300) for k in args.k)
+    print(f"observations identical to VecFrameStack: {same}")
+    print(f"{'envs':>5} {'k':>3} {'view us':>8} {'copy us':>8} {'VecFrameStack us':>17} {'speedup':>8}")
+    for n, k, view, copy, sb3 in run(args.envs, args.k, args.steps, args.episode_steps):
+        print(f"{n:>5} {k:>3} {view:>8.1f} {copy:>8.1f} {sb3:>17.1f} {sb3 / view:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
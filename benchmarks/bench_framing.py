@@ -0,0 +1,109 @@
+"""
+Line framing microbenchmark against mock_server.py: lines/sec and recv syscalls per line.
+
+Scenarios (all send "state" and read the JSON reply line):
+  recv1      legacy TerrariaClient._recv_line: recv(1) per byte
+  recv_copy  legacy BridgeClient: fresh bytearray + recv(4096) per line
+  framer     LineFramer.readline, one request in flight
+  framer_xK  LineFramer, K requests written with one sendall, K lines read back
+
+Usage:
+  python -m benchmarks.bench_framing
+  python -m benchmarks.bench_framing --lines 20000 --burst 32
+  python -m benchmarks.bench_framing --port 8765   # use an already running server
+"""
+
+import argparse
+import socket
+import time
+from typing import Callable
+
+from benchmarks.common import HOST, mock_server
+from framing import LineFramer
+
+REQUEST = b"state\n"
+
+
+def _recv1(sock: socket.socket, counter: list[int]) -> bytes:
+    buf = []
+    while True:
+        b = sock.recv(1)
+        counter[0] += 1
+        if not b:
+            raise ConnectionError("closed")
+        if b == b"\n":
+            return b"".join(buf)
+        buf.append(b)
+
+
+def _recv_copy(sock: socket.socket, counter: list[int]) -> bytes:
+    buf = bytearray()
+    while True:
+        idx = buf.find(b"\n")
+        if idx != -1:
+            return bytes(buf[:idx])
+        data = sock.recv(4096)
+        counter[0] += 1
+        if not data:
+            raise ConnectionError("closed")
+        buf.extend(data)
+
+
+def _run_legacy(port: int, n_lines: int, reader: Callable[[socket.socket, list[int]], bytes]) -> tuple[float, int]:
+    counter = [0]
+    with socket.create_connection((HOST, port)) as sock:
+        t0 = time.perf_counter()
+        for _ in range(n_lines):
+            sock.sendall(REQUEST)
+            reader(sock, counter)
+        return time.perf_counter() - t0, counter[0]
+
+
+def _run_framer(port: int, n_lines: int, burst: int) -> tuple[float, int]:
+    with socket.create_connection((HOST, port)) as sock:
+        framer = LineFramer(sock)
+        request = REQUEST * burst
+        t0 = time.perf_counter()
+        for _ in range(n_lines // burst):
+            sock.sendall(request)
+            for _ in range(burst):
+                if framer.readline() is None:
+                    raise ConnectionError("closed")
+        return time.perf_counter() - t0, framer.recv_calls
+
+
+def run(port: int, n_lines: int, burst: int) -> list[tuple[str, int, float, int]]:
+    """Return (scenario, lines, seconds, recv_calls) rows."""
+    n_lines = max(burst, n_lines - n_lines % burst)
+    rows = []
+    for name, fn in (
+        ("recv1", lambda: _run_legacy(port, n_lines, _recv1)),
+        ("recv_copy", lambda: _run_legacy(port, n_lines, _recv_copy)),
+        ("framer", lambda: _run_framer(port, n_lines, 1)),
+        (f"framer_x{burst}", lambda: _run_framer(port, n_lines, burst)),
+    ):
+        elapsed, calls = fn()
+        rows.append((name, n_lines, elapsed, calls))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bridge line framing against mock_server.py.")
+    parser.add_argument("--lines", type=int, default=5000, help="Lines per scenario")
+    parser.add_argument("--burst", type=int, default=16, help="Requests per sendall in the pipelined scenario")
+    parser.add_argument("--port", type=int, default=None, help="Use a running server instead of spawning one")
+    args = parser.parse_args()
+
+    if args.port is not None:
+        rows = run(args.port, args.lines, args.burst)
+    else:
+        with mock_server() as port:
+            rows = run(port, args.lines, args.burst)
+
+    print(f"{'scenario':<14} {'lines/sec':>12} {'recv/line':>10}")
+    for name, n, elapsed, calls in rows:
+        print(f"{name:<14} {n / elapsed:>12.0f} {calls / n:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
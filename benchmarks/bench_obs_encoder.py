@@ -0,0 +1,61 @@
+"""
+Observation encoding microbenchmark: _state_to_obs vs. the compiled ObservationEncoder (ns/step).
+
+Usage:
+  python -m benchmarks.bench_obs_encoder
+  python -m benchmarks.bench_obs_encoder --iters 500000 --batch 512
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+import mock_server
+from src.environment import OBS_KEYS, _state_to_obs, default_encoder
+from src.observation import ListField, ObservationEncoder
+
+
+def _time_ns(fn: Callable[[], object], iters: int) -> float:
+    t0 = time.perf_counter_ns()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter_ns() - t0) / iters
+
+
+def run(iters: int, batch: int) -> list[tuple[str, float]]:
+    """Return (scenario, ns_per_state) rows."""
+    state = mock_server._default_state()
+    state["nearby_npcs"] = [{"x": 3.0, "y": -1.0, "health": 40}, {"x": -8.0, "y": 0.0, "health": 15}]
+    encoder = default_encoder()
+    normalized = ObservationEncoder(OBS_KEYS, normalize=True)
+    with_npcs = ObservationEncoder(OBS_KEYS, list_fields=[ListField("nearby_npcs", 4, ("x", "y", "health"))])
+    out = np.empty(encoder.dim, dtype=np.float32)
+    states = [state] * batch
+    rows_out = np.empty((batch, encoder.dim), dtype=np.float32)
+
+    return [
+        ("_state_to_obs", _time_ns(lambda: _state_to_obs(state), iters)),
+        ("encode (alloc)", _time_ns(lambda: encoder.encode(state), iters)),
+        ("encode (out=)", _time_ns(lambda: encoder.encode(state, out), iters)),
+        ("encode normalized", _time_ns(lambda: normalized.encode(state, out), iters)),
+        ("encode +4 npc slots", _time_ns(lambda: with_npcs.encode(state), iters)),
+        (f"encode_batch x{batch}", _time_ns(lambda: encoder.encode_batch(states, rows_out), max(1, iters // batch)) / batch),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark observation encoding.")
+    parser.add_argument("--iters", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<22} {'ns/state':>10}")
+    for name, ns in run(args.iters, args.batch):
+        print(f"{name:<22} {ns:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
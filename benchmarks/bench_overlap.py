@@ -0,0 +1,153 @@
+"""
+Double-buffered rollouts (src/rollout.py) vs. lock-step stepping.
+
+1. Equivalence: a fresh PPO policy (deterministic predict) drives K MockVecEnv slots lock-step and
+   as two double-buffered groups; the per-slot action sequences must match.
+2. Throughput: steps/sec of both loops over K mock_server.py worlds (one multiplexed TerrariaVecEnv
+   connection per group), with each reply delayed by --rtt (a stand-in for the game's tick and
+   network time) and a policy of --hidden layers (a stand-in for nontrivial inference).
+   A group step costs its own inference plus the longer of its reply wait and the other group's
+   inference, against full-batch inference plus the wait for lock-step. So the gain needs inference
+   that grows with batch size (hundreds of slots on CPU) and a wait about as long as one group's
+   inference; with rtt 0 the second predict call per step is pure overhead.
+
+Usage:
+  python -m benchmarks.bench_overlap
+  python -m benchmarks.bench_overlap --envs 1024 --rtt 0 0.01 0.05 --hidden 512 512
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch as th
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecEnv, VecEnvWrapper
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+from benchmarks.common import HOST, mock_server
+from src.rollout import DoubleBufferedVecEnv, split_groups
+from src.tasks import get_task
+from src.vec_env import MockVecEnv, TerrariaVecEnv
+
+SEED = 42
+
+
+class _Delayed(VecEnvWrapper):
+    """step_wait returns no earlier than rtt seconds after step_async (without using the CPU meanwhile)."""
+
+    def __init__(self, venv: VecEnv, rtt: float):
+        super().__init__(venv)
+        self.rtt = rtt
+        self._due = 0.0
+
+    def reset(self) -> np.ndarray:
+        return self.venv.reset()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._due = time.perf_counter() + self.rtt
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        delay = self._due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return self.venv.step_wait()
+
+
+def _lockstep(model: PPO, venv: VecEnv, steps: int) -> np.ndarray:
+    """(steps, K) actions of steps lock-step vector steps."""
+    obs = venv.reset()
+    actions = np.zeros((steps, venv.num_envs), dtype=np.int64)
+    for t in range(steps):
+        actions[t] = model.predict(obs, deterministic=True)[0]
+        obs = venv.step(actions[t])[0]
+    return actions
+
+
+def _overlapped(model: PPO, venv: DoubleBufferedVecEnv, steps: int) -> np.ndarray:
+    venv.reset()
+    actions = np.zeros((steps, venv.num_envs), dtype=np.int64)
+    rows = [0, 0]
+    for step in venv.overlapped(lambda o: (model.predict(o, deterministic=True)[0], None), steps=steps):
+        actions[rows[step.group], step.offset : step.offset + len(step.actions)] = step.actions
+        rows[step.group] += 1
+    return actions
+
+
+def check_equivalence(num_envs: int, steps: int) -> bool:
+    task = get_task("wood", max_episode_steps=200)
+    th.manual_seed(0)
+    model = PPO("MlpPolicy", MockVecEnv(num_envs, task=task, seed=SEED))
+    plain = _lockstep(model, MockVecEnv(num_envs, max_episode_steps=200, task=task, seed=SEED), steps)
+    double = _overlapped(
+        model,
+        split_groups(lambda n, off: MockVecEnv(n, max_episode_steps=200, task=task, seed=SEED + off), num_envs),
+        steps,
+    )
+    return bool(np.array_equal(plain, double))
+
+
+def _predict_ms(model: PPO, rows: int, calls: int = 20) -> float:
+    obs = np.zeros((rows, *model.observation_space.shape), dtype=np.float32)
+    model.predict(obs, deterministic=True)
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        model.predict(obs, deterministic=True)
+    return (time.perf_counter() - t0) / calls * 1e3
+
+
+def run(
+    num_envs: int, steps: int, rtts: list[float], hidden: list[int]
+) -> tuple[tuple[float, float], list[tuple[float, float, float]]]:
+    """Return ((predict ms for all slots, for one group), [(rtt, lock-step steps/sec, double-buffered steps/sec)])."""
+    task = get_task("wood", max_episode_steps=1000)
+    rows = []
+    with mock_server() as port:
+        probe = TerrariaVecEnv(1, host=HOST, port=port, task=task)
+        model = PPO("MlpPolicy", probe, policy_kwargs=dict(net_arch=hidden))
+        predict_ms = (_predict_ms(model, num_envs), _predict_ms(model, (num_envs + 1) // 2))
+        for rtt in rtts:
+
+            def group(n: int, offset: int) -> VecEnv:
+                return _Delayed(
+                    TerrariaVecEnv(
+                        n, host=HOST, port=port, max_episode_steps=1000, task=task, multiplex=True, seed=SEED + offset
+                    ),
+                    rtt,
+                )
+
+            plain = group(num_envs, 0)
+            t0 = time.perf_counter()
+            _lockstep(model, plain, steps)
+            lock_rate = steps * num_envs / (time.perf_counter() - t0)
+            plain.close()
+
+            double = split_groups(group, num_envs)
+            t0 = time.perf_counter()
+            _overlapped(model, double, steps)
+            double_rate = steps * num_envs / (time.perf_counter() - t0)
+            double.close()
+            rows.append((rtt, lock_rate, double_rate))
+    return predict_ms, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark double-buffered rollouts against lock-step stepping.")
+    parser.add_argument("--envs", type=int, default=512, help="Slots (split into two groups)")
+    parser.add_argument("--steps", type=int, default=200, help="Vector steps per run")
+    parser.add_argument("--rtt", type=float, nargs="+", default=[0.0, 0.005, 0.01, 0.02], help="Added reply delay (s)")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[1024, 1024], help="Policy hidden layer sizes")
+    args = parser.parse_args()
+
+    same = check_equivalence(min(args.envs, 64), args.steps)
+    print(f"actions identical to lock-step: {same}")
+    (full_ms, half_ms), rows = run(args.envs, args.steps, args.rtt, args.hidden)
+    print(f"predict: {full_ms:.2f} ms for {args.envs} slots, {half_ms:.2f} ms for one group")
+    print(f"{'rtt_ms':>7} {'lock-step/s':>12} {'double/s':>10} {'speedup':>8}")
+    for rtt, lock_rate, double_rate in rows:
+        print(f"{rtt * 1e3:>7.1f} {lock_rate:>12.0f} {double_rate:>10.0f} {double_rate / lock_rate:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
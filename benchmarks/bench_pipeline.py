@@ -0,0 +1,59 @@
+"""
+Pipelined vs. lock-step BridgeClient actions against mock_server.py (steps/sec).
+
+Usage:
+  python -m benchmarks.bench_pipeline
+  python -m benchmarks.bench_pipeline --steps 20000 --windows 1 8 64 256
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import HOST, mock_server
+from bridge_client import BridgeClient
+
+
+def run(port: int, steps: int, windows: list[int]) -> list[tuple[str, float]]:
+    """Return (scenario, steps_per_sec) rows."""
+    rng = random.Random(0)
+    actions = [rng.randrange(7) for _ in range(steps)]
+    rows = []
+
+    client = BridgeClient(host=HOST, port=port)
+    client.connect()
+    try:
+        t0 = time.perf_counter()
+        for a in actions:
+            client.send_action(a)
+        rows.append(("send_action", steps / (time.perf_counter() - t0)))
+
+        for window in windows:
+            t0 = time.perf_counter()
+            client.send_actions(actions, window=window)
+            rows.append((f"send_actions w={window}", steps / (time.perf_counter() - t0)))
+    finally:
+        client.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pipelined BridgeClient actions.")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--port", type=int, default=None, help="Use a running server instead of spawning one")
+    args = parser.parse_args()
+
+    if args.port is not None:
+        rows = run(args.port, args.steps, args.windows)
+    else:
+        with mock_server() as port:
+            rows = run(port, args.steps, args.windows)
+
+    print(f"{'scenario':<20} {'steps/sec':>12}")
+    for name, rate in rows:
+        print(f"{name:<20} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Client throughput against a replayed capture: record a mock-server session with
+BridgeClient(capture=...), serve it back with replay_server.py as fast as possible, and
+compare lock-step and pipelined steps/sec (and bytes parsed) with the live mock server.
+Pass --capture to replay an existing capture (e.g. from the real game) instead of recording one.
+
+Usage:
+  python -m benchmarks.bench_replay
+  python -m benchmarks.bench_replay --capture run.cap --steps 50000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import HOST, mock_server, replay_server
+from bridge_client import BridgeClient
+from capture import read_capture
+
+
+def _record(path: str, steps: int) -> None:
+    with mock_server() as port:
+        client = BridgeClient(host=HOST, port=port, capture=path)
+        client.connect()
+        client.send_actions([i % 7 for i in range(steps)])
+        client.close()
+
+
+def _rates(port: int, steps: int) -> tuple[float, float]:
+    """(lock-step, pipelined) steps/sec for `steps` replies from a server on port."""
+    client = BridgeClient(host=HOST, port=port)
+    client.connect()
+    t0 = time.perf_counter()
+    for i in range(steps):
+        client.send_action(i % 7)
+    lockstep = steps / (time.perf_counter() - t0)
+    client.close()
+    client.connect()
+    t0 = time.perf_counter()
+    client.send_actions([i % 7 for i in range(steps)])
+    pipelined = steps / (time.perf_counter() - t0)
+    client.close()
+    return lockstep, pipelined
+
+
+def run(steps: int, capture: str | None) -> list[tuple[str, float, float]]:
+    """Return (server, lockstep_steps_per_sec, pipelined_steps_per_sec) rows."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if capture is None:
+            capture = os.path.join(tmp, "mock.cap")
+            _record(capture, steps)
+            with mock_server() as port:
+                rows.append(("mock_server (live)", *_rates(port, steps)))
+        records = sum(1 for _ in read_capture(capture))
+        with replay_server(capture, None, "--loop") as port:
+            rows.append((f"replay_server ({records} msgs)", *_rates(port, steps)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark clients against a replayed capture.")
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--capture", default=None, help="Existing capture file to replay")
+    args = parser.parse_args()
+
+    print(f"{'server':<30} {'lock-step/s':>12} {'pipelined/s':>12}")
+    for name, lockstep, pipelined in run(args.steps, args.capture):
+        print(f"{name:<30} {lockstep:>12.0f} {pipelined:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+PrioritizedReplayBuffer throughput: single add() (one env step), add_batch() (a vector step),
+and prioritized sample() + update_priorities() per batch, in RAM and disk-backed.
+
+Usage:
+  python -m benchmarks.bench_replay_buffer
+  python -m benchmarks.bench_replay_buffer --capacity 4000000 --batch-size 512
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+from src.environment import OBS_KEYS
+from src.replay_buffer import PrioritizedReplayBuffer
+
+
+def _bench(buffer: PrioritizedReplayBuffer, batch_size: int, iters: int) -> list[tuple[str, float]]:
+    dim = buffer.obs_dim
+    obs = np.zeros(dim, dtype=np.float32)
+    t0 = time.perf_counter()
+    for i in range(iters):
+        buffer.add(obs, i % 7, 1.0, obs, False)
+    add_us = (time.perf_counter() - t0) / iters * 1e6
+
+    n = 1024
+    rows = np.zeros((n, dim), dtype=np.float32)
+    actions, rewards, dones = np.zeros(n, np.int32), np.zeros(n, np.float32), np.zeros(n, bool)
+    fills = max(1, buffer.capacity // n)
+    t0 = time.perf_counter()
+    for _ in range(fills):
+        buffer.add_batch(rows, actions, rewards, rows, dones)
+    batch_rate = fills * n / (time.perf_counter() - t0)
+
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    for _ in range(iters // 100):
+        sample = buffer.sample(batch_size)
+        buffer.update_priorities(sample["indices"], rng.random(batch_size))
+    sample_us = (time.perf_counter() - t0) / (iters // 100) * 1e6
+    return [
+        ("add() (us/transition)", add_us),
+        ("add_batch() (transitions/s)", batch_rate),
+        (f"sample+update x{batch_size} (us)", sample_us),
+    ]
+
+
+def run(capacity: int, batch_size: int, iters: int) -> list[tuple[str, float]]:
+    """Return (scenario, value) rows."""
+    rows = [(f"RAM: {name}", v) for name, v in _bench(PrioritizedReplayBuffer(capacity), batch_size, iters)]
+    with tempfile.TemporaryDirectory() as path:
+        buffer = PrioritizedReplayBuffer(capacity, path=path)
+        rows += [(f"disk: {name}", v) for name, v in _bench(buffer, batch_size, iters)]
+        buffer.flush()
+        del buffer
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the prioritized replay buffer.")
+    parser.add_argument("--capacity", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--iters", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"obs_dim={len(OBS_KEYS)} capacity={args.capacity}")
+    print(f"{'scenario':<40} {'value':>14}")
+    for name, value in run(args.capacity, args.batch_size, args.iters):
+        print(f"{name:<40} {value:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
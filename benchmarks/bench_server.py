@@ -0,0 +1,80 @@
+"""
+Mock server load test: many concurrent connections, each keeping `depth` actions in flight.
+Reports aggregate steps/sec per (connections, server workers) so the server can be checked
+not to be the bottleneck for the client stack.
+
+Usage:
+  python -m benchmarks.bench_server
+  python -m benchmarks.bench_server --conns 1 64 256 --workers 1 4 --depth 8 --procs 4
+"""
+
+import argparse
+import multiprocessing
+import selectors
+import socket
+import time
+
+from benchmarks.common import HOST, mock_server
+
+_ACTION = b"6\n"
+
+
+def _drive(port: int, conns: int, depth: int, seconds: float) -> int:
+    """Open `conns` connections, keep `depth` actions in flight on each; return replies received."""
+    sel = selectors.DefaultSelector()
+    socks = []
+    for _ in range(conns):
+        sock = socket.create_connection((HOST, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        sock.sendall(_ACTION * depth)
+        sel.register(sock, selectors.EVENT_READ)
+        socks.append(sock)
+    replies = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for key, _ in sel.select(1.0):
+            sock = key.fileobj
+            try:
+                data = sock.recv(65536)
+            except BlockingIOError:
+                continue
+            n = data.count(b"\n")
+            if n:
+                replies += n
+                sock.send(_ACTION * n)
+    for sock in socks:
+        sock.close()
+    return replies
+
+
+def run(conns: list[int], workers: list[int], depth: int, seconds: float, procs: int) -> list[tuple[int, int, float]]:
+    """Return (connections, workers, steps_per_sec) rows."""
+    rows = []
+    for w in workers:
+        with mock_server("--workers", str(w)) as port:
+            for c in conns:
+                n = max(1, min(procs, c))
+                with multiprocessing.Pool(n) as pool:
+                    args = [(port, c // n + (i < c % n), depth, seconds) for i in range(n)]
+                    replies = sum(pool.starmap(_drive, args))
+                rows.append((c, w, replies / seconds))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test mock_server.py with many concurrent connections.")
+    parser.add_argument("--conns", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--depth", type=int, default=4, help="Actions in flight per connection")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--procs", type=int, default=1, help="Load-generator processes")
+    args = parser.parse_args()
+
+    print(f"{'conns':>6} {'workers':>8} {'steps/sec':>12}")
+    for c, w, rate in run(args.conns, args.workers, args.depth, args.seconds, args.procs):
+        print(f"{c:>6} {w:>8} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Trajectory recording overhead: TerrariaEnv steps over MockBackend with and without
+TrajectoryWriter, and TrajectoryReader read throughput over the resulting files.
+
+Usage:
+  python -m benchmarks.bench_trajectory
+  python -m benchmarks.bench_trajectory --steps 500000 --chunk-size 16384
+"""
+
+import argparse
+import tempfile
+import time
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+from src.environment import TerrariaEnv
+from src.mock_backend import MockBackend
+from src.tasks import get_task
+from src.trajectory import DEFAULT_CHUNK_SIZE, TrajectoryReader, TrajectoryWriter
+
+
+def _env() -> TerrariaEnv:
+    return TerrariaEnv(task=get_task("wood"), backend=MockBackend(0), max_episode_steps=1000)
+
+
+def _step_ns(env, steps: int) -> float:
+    env.reset()
+    t0 = time.perf_counter_ns()
+    for i in range(steps):
+        _, _, terminated, truncated, _ = env.step(i % 7)
+        if terminated or truncated:
+            env.reset()
+    return (time.perf_counter_ns() - t0) / steps
+
+
+def run(steps: int, chunk_size: int) -> list[tuple[str, float]]:
+    """Return (scenario, value) rows."""
+    with tempfile.TemporaryDirectory() as path:
+        base = _step_ns(_env(), steps)
+        writer = TrajectoryWriter(_env(), path, chunk_size=chunk_size)
+        recorded = _step_ns(writer, steps)
+        writer.close()
+
+        reader = TrajectoryReader(path)
+        t0 = time.perf_counter()
+        sum(float(chunk["obs"].sum()) for chunk in reader.iter_chunks())
+        read_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for i in range(len(reader.episodes)):
+            reader.episode(i)
+        episodes_s = time.perf_counter() - t0
+        rows = [
+            ("step, no recording (us)", base / 1000),
+            ("step, TrajectoryWriter (us)", recorded / 1000),
+            ("recording overhead (us/step)", (recorded - base) / 1000),
+            ("reader obs scan (Msteps/s)", len(reader) / read_s / 1e6),
+            ("reader episode() (episodes/s)", len(reader.episodes) / episodes_s if episodes_s else float("inf")),
+        ]
+        del reader
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark trajectory recording overhead.")
+    parser.add_argument("--steps", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<32} {'value':>12}")
+    for name, value in run(args.steps, args.chunk_size):
+        print(f"{name:<32} {value:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+JSON lines vs. delta-encoded JSON vs. negotiated binary frames: bytes per step,
+encode/parse time, and live pipelined steps/sec against mock_server.py.
+
+Usage:
+  python -m benchmarks.bench_wire
+  python -m benchmarks.bench_wire --iters 200000 --steps 20000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import mock_server
+from benchmarks.common import HOST, mock_server as spawn_mock_server
+from binary_protocol import decode_state, encode_state
+from bridge_client import BridgeClient
+from delta_protocol import DeltaDecoder, DeltaEncoder
+
+
+def _sample_states(n: int) -> list[dict]:
+    rng = random.Random(0)
+    state = mock_server._default_state()
+    states = []
+    for _ in range(n):
+        state = mock_server._apply_action(state, rng.randrange(7), rng)
+        states.append(state)
+    return states
+
+
+def _per_state_ns(fn, items: list, iters: int) -> float:
+    n = len(items)
+    t0 = time.perf_counter_ns()
+    for i in range(iters):
+        fn(items[i % n])
+    return (time.perf_counter_ns() - t0) / iters
+
+
+def run_codec(iters: int) -> list[tuple[str, float, float, float]]:
+    """Return (format, bytes_per_state, encode_ns, parse_ns) rows."""
+    states = _sample_states(1000)
+    json_lines = [(json.dumps(s) + "\n").encode("utf-8") for s in states]
+    frames = [encode_state(s) for s in states]
+    payloads = [f[4:] for f in frames]
+    delta_enc = DeltaEncoder(keyframe_every=20)
+    delta_lines = [(json.dumps(delta_enc.encode(s)) + "\n").encode("utf-8") for s in states]
+    encoder, decoder = DeltaEncoder(keyframe_every=20), DeltaDecoder()
+    return [
+        (
+            "json",
+            sum(map(len, json_lines)) / len(states),
+            _per_state_ns(lambda s: (json.dumps(s) + "\n").encode("utf-8"), states, iters),
+            _per_state_ns(json.loads, json_lines, iters),
+        ),
+        (
+            "delta",
+            sum(map(len, delta_lines)) / len(states),
+            _per_state_ns(lambda s: (json.dumps(encoder.encode(s)) + "\n").encode("utf-8"), states, iters),
+            _per_state_ns(lambda line: decoder.decode(json.loads(line)), delta_lines, iters),
+        ),
+        (
+            "binary",
+            sum(map(len, frames)) / len(states),
+            _per_state_ns(encode_state, states, iters),
+            _per_state_ns(decode_state, payloads, iters),
+        ),
+    ]
+
+
+def run_live(port: int, steps: int) -> list[tuple[str, float]]:
+    """Return (format, steps_per_sec) rows for pipelined send_actions."""
+    rng = random.Random(1)
+    actions = [rng.randrange(7) for _ in range(steps)]
+    rows = []
+    for name, kwargs in (("json", {}), ("delta", {"delta": 20}), ("binary", {"binary": True})):
+        client = BridgeClient(host=HOST, port=port, **kwargs)
+        client.connect()
+        try:
+            t0 = time.perf_counter()
+            client.send_actions(actions)
+            rows.append((name, steps / (time.perf_counter() - t0)))
+        finally:
+            client.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON vs. binary bridge replies.")
+    parser.add_argument("--iters", type=int, default=100_000, help="Codec iterations per format")
+    parser.add_argument("--steps", type=int, default=5000, help="Live pipelined steps per format")
+    parser.add_argument("--port", type=int, default=None, help="Use a running server instead of spawning one")
+    args = parser.parse_args()
+
+    print(f"{'format':<8} {'bytes/step':>10} {'encode ns':>10} {'parse ns':>10}")
+    for name, nbytes, enc, dec in run_codec(args.iters):
+        print(f"{name:<8} {nbytes:>10.1f} {enc:>10.0f} {dec:>10.0f}")
+
+    if args.port is not None:
+        live = run_live(args.port, args.steps)
+    else:
+        with spawn_mock_server() as port:
+            live = run_live(port, args.steps)
+    print(f"\n{'format':<8} {'steps/sec':>10}")
+    for name, rate in live:
+        print(f"{name:<8} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Shared benchmark helpers: run mock_server.py (through MockServerManager) or replay_server.py (on a free
+port) for the duration of a block; make the _archive src package importable.
+"""
+
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from server_manager import MockServerManager
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HOST = "127.0.0.1"
+
+# The env/task package (src) lives under _archive/; benchmarks import it from there.
+_ARCHIVE_DIR = str(REPO_ROOT / "_archive")
+if _ARCHIVE_DIR not in sys.path:
+    sys.path.append(_ARCHIVE_DIR)
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 5.0) -> None:
+    """Poll until something accepts on HOST:port; raise TimeoutError otherwise."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((HOST, port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"mock server did not come up on {HOST}:{port}")
+            time.sleep(0.01)
+
+
+@contextmanager
+def _spawn(argv: list[str], port: int) -> Iterator[int]:
+    proc = subprocess.Popen(
+        [sys.executable, *argv],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=2)
+
+
+@contextmanager
+def mock_server(*args: str) -> Iterator[int]:
+    """
+    Run one mock_server.py (with extra CLI args) for the duration of the block; yields its port.
+    It binds port 0 and reports the port it got, so no other process can take it first.
+    """
+    with MockServerManager(1, seed=None, extra_args=args) as manager:
+        yield manager.addresses()[0][1]
+
+
+@contextmanager
+def replay_server(capture: str, port: int | None = None, *args: str) -> Iterator[int]:
+    """Run replay_server.py on a capture file (with extra CLI args) for the duration of the block; yields its port."""
+    port = port or free_port()
+    with _spawn(["replay_server.py", capture, str(port), *args], port):
+        yield port
@@ -0,0 +1,376 @@
+"""
+Repeatable benchmark suite with machine-readable results and regression checks.
+
+Scenario groups (each metric is the median of --repeat runs):
+  framing  lines/sec of "state" requests for each client: LineFramer (one in flight and a
+           pipelined burst), BridgeClient.request_state, TerrariaClient.get_state,
+           AsyncBridgeClient.request_state
+  rtt      BridgeClient.send_action round-trip p50/p99 at several reply sizes, served by
+           replay_server.py from a synthetic capture (so the server side costs the same at any size)
+  env      TerrariaEnv steps/sec, and TerrariaVecEnv steps/sec for each --envs count, against mock_server.py
+  micro    mock_server._apply_action and each task's compute_reward, ns per call
+
+Results are written as JSON: {"meta": {python, platform, cpus, git commit, ...}, "results":
+{metric: {"value", "unit", "higher_is_better", "samples"}}}. compare flags every metric that got
+worse than the baseline by more than --threshold (relative), and exits 1 if any did.
+
+Usage:
+  python -m benchmarks.suite run -o baseline.json
+  python -m benchmarks.suite run -o current.json --baseline baseline.json   # run, then compare
+  python -m benchmarks.suite run --groups micro env --quick
+  python -m benchmarks.suite compare baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+import benchmarks.common  # noqa: F401  (puts _archive on sys.path)
+from async_client import AsyncBridgeClient
+from benchmarks.common import HOST, REPO_ROOT, mock_server, replay_server
+from bridge_client import BridgeClient
+from capture import CaptureWriter
+from framing import LineFramer
+from latency import LatencyHistogram
+from mock_server import _apply_action, _default_state
+from src.client import TerrariaClient
+from src.environment import TerrariaEnv
+from src.tasks import get_task
+from src.vec_env import TerrariaVecEnv
+
+GROUPS = ("framing", "rtt", "env", "micro")
+DEFAULT_THRESHOLD = 0.10
+PAYLOAD_SIZES = (256, 4096, 65536)
+TASKS = ("locomotion", "survival", "wood")
+
+# metric name -> (value, unit, higher_is_better)
+Metrics = dict[str, tuple[float, str, bool]]
+
+
+def _rate(n: int, fn: Callable[[], Any]) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+# --- framing -----------------------------------------------------------------------------------
+
+
+def _framer_rate(port: int, lines: int, burst: int) -> float:
+    with socket.create_connection((HOST, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        framer = LineFramer(sock)
+        request = b"state\n" * burst
+        rounds = max(1, lines // burst)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            sock.sendall(request)
+            for _ in range(burst):
+                if framer.readline() is None:
+                    raise ConnectionError("closed")
+        return rounds * burst / (time.perf_counter() - t0)
+
+
+def _async_rate(port: int, lines: int) -> float:
+    async def drive() -> float:
+        client = AsyncBridgeClient(HOST, port)
+        await client.connect()
+        try:
+            t0 = time.perf_counter()
+            for _ in range(lines):
+                await client.request_state()
+            return lines / (time.perf_counter() - t0)
+        finally:
+            await client.close()
+
+    return asyncio.run(drive())
+
+
+def bench_framing(scale: float, burst: int = 16) -> Metrics:
+    lines = int(5000 * scale)
+    with mock_server() as port:
+        bridge = BridgeClient(HOST, port)
+        bridge.connect()
+        terraria = TerrariaClient(HOST, port)
+        terraria.connect()
+        try:
+            return {
+                "framing/line_framer": (_framer_rate(port, lines, 1), "lines/s", True),
+                f"framing/line_framer_x{burst}": (_framer_rate(port, lines, burst), "lines/s", True),
+                "framing/bridge_client": (_rate(lines, bridge.request_state), "lines/s", True),
+                "framing/terraria_client": (_rate(lines, terraria.get_state), "lines/s", True),
+                "framing/async_client": (_async_rate(port, lines), "lines/s", True),
+            }
+        finally:
+            bridge.close()
+            terraria.close()
+
+
+# --- rtt ---------------------------------------------------------------------------------------
+
+
+def _write_payload_capture(path: Path, size: int, messages: int = 64) -> None:
+    """A capture of state lines padded with a "tiles" list to about `size` bytes each."""
+    rng = random.Random(0)
+    with CaptureWriter(path) as writer:
+        for i in range(messages):
+            state = _default_state(i)
+            base = len(json.dumps(state)) + len(', "tiles": []') + 1
+            state["tiles"] = [rng.randrange(10) for _ in range(max(0, (size - base) // 3))]
+            writer.record((json.dumps(state) + "\n").encode("utf-8"))
+
+
+def bench_rtt(scale: float) -> Metrics:
+    steps = int(2000 * scale)
+    out: Metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in PAYLOAD_SIZES:
+            path = Path(tmp) / f"payload_{size}.cap"
+            _write_payload_capture(path, size)
+            with replay_server(str(path), None, "--loop") as port:
+                client = BridgeClient(HOST, port)
+                client.connect()
+                hist = LatencyHistogram()
+                try:
+                    for i in range(steps):
+                        t0 = time.perf_counter_ns()
+                        client.send_action(i % 7)
+                        hist.record(time.perf_counter_ns() - t0)
+                finally:
+                    client.close()
+            out[f"rtt/send_action_{size}B_p50"] = (hist.percentile(50) / 1e3, "us", False)
+            out[f"rtt/send_action_{size}B_p99"] = (hist.percentile(99) / 1e3, "us", False)
+    return out
+
+
+# --- env ---------------------------------------------------------------------------------------
+
+
+def bench_env(scale: float, envs: list[int]) -> Metrics:
+    steps = int(3000 * scale)
+    out: Metrics = {}
+    with mock_server() as port:
+        env = TerrariaEnv(host=HOST, port=port, task=get_task("survival"), max_episode_steps=1000)
+        env.reset(seed=0)
+        try:
+            t0 = time.perf_counter()
+            for i in range(steps):
+                _, _, terminated, truncated, _ = env.step(i % 7)
+                if terminated or truncated:
+                    env.reset()
+            out["env/terraria_env"] = (steps / (time.perf_counter() - t0), "steps/s", True)
+        finally:
+            env.close()
+        for n in envs:
+            venv = TerrariaVecEnv(n, host=HOST, port=port, task=get_task("survival"), max_episode_steps=1000)
+            venv.reset()
+            iters = max(1, steps // n)
+            actions = np.random.default_rng(0).integers(0, 7, (iters, n))
+            try:
+                t0 = time.perf_counter()
+                for k in range(iters):
+                    venv.step(actions[k])
+                out[f"env/terraria_vec_env_x{n}"] = (iters * n / (time.perf_counter() - t0), "steps/s", True)
+            finally:
+                venv.close()
+    return out
+
+
+# --- micro -------------------------------------------------------------------------------------
+
+
+def _ns_per_call(n: int, fn: Callable[[int], Any]) -> float:
+    t0 = time.perf_counter_ns()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter_ns() - t0) / n
+
+
+def bench_micro(scale: float) -> Metrics:
+    n = int(100_000 * scale)
+    rng = random.Random(0)
+    states = [_default_state(0)]
+    for i in range(255):
+        states.append(_apply_action(states[-1], i % 7, rng))
+    out: Metrics = {
+        "micro/apply_action": (_ns_per_call(n, lambda i: _apply_action(states[i & 255], i % 7, rng)), "ns", False)
+    }
+    for name in TASKS:
+        task = get_task(name, max_episode_steps=1000)
+        out[f"micro/compute_reward_{name}"] = (
+            _ns_per_call(
+                n,
+                lambda i: task.compute_reward(
+                    states[i & 255], states[(i + 1) & 255], states[(i + 1) & 255]["last_reward_events"]
+                ),
+            ),
+            "ns",
+            False,
+        )
+    return out
+
+
+# --- results -----------------------------------------------------------------------------------
+
+
+def _git(*args: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_metadata() -> dict[str, Any]:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "hostname": platform.node(),
+        "numpy": np.__version__,
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(status) if status is not None else None,
+    }
+
+
+def run_suite(groups: list[str], repeat: int, scale: float, envs: list[int]) -> dict[str, Any]:
+    """Run the groups `repeat` times; each metric keeps every sample and their median as value."""
+    scenarios: dict[str, Callable[[], Metrics]] = {
+        "framing": lambda: bench_framing(scale),
+        "rtt": lambda: bench_rtt(scale),
+        "env": lambda: bench_env(scale, envs),
+        "micro": lambda: bench_micro(scale),
+    }
+    results: dict[str, dict[str, Any]] = {}
+    for group in groups:
+        for r in range(repeat):
+            print(f"[suite] {group} ({r + 1}/{repeat})", file=sys.stderr, flush=True)
+            for name, (value, unit, higher) in scenarios[group]().items():
+                entry = results.setdefault(name, {"unit": unit, "higher_is_better": higher, "samples": []})
+                entry["samples"].append(value)
+    for entry in results.values():
+        entry["value"] = statistics.median(entry["samples"])
+    meta = environment_metadata()
+    meta.update(groups=groups, repeat=repeat, scale=scale, envs=envs)
+    return {"meta": meta, "results": results}
+
+
+def format_results(report: dict[str, Any]) -> str:
+    lines = [f"{'metric':<40} {'value':>14} {'unit':<8} {'spread':>8}"]
+    for name, entry in report["results"].items():
+        samples = entry["samples"]
+        spread = (max(samples) - min(samples)) / entry["value"] if entry["value"] else 0.0
+        lines.append(f"{name:<40} {entry['value']:>14.1f} {entry['unit']:<8} {spread:>7.1%}")
+    return "\n".join(lines)
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    One row per metric present in both reports: baseline, current, change (relative, signed so
+    that negative is worse) and whether it is a regression (worse by more than threshold).
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if not cur["higher_is_better"]:
+            change = -change
+        rows.append(
+            {
+                "metric": name,
+                "unit": cur["unit"],
+                "baseline": base["value"],
+                "current": cur["value"],
+                "change": change,
+                "regression": change < -threshold,
+            }
+        )
+    return rows
+
+
+def format_comparison(rows: list[dict], baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    lines = []
+    for label, report in (("baseline", baseline), ("current", current)):
+        meta = report["meta"]
+        lines.append(f"{label}: {meta.get('git_commit', '?')} {meta.get('timestamp', '')} python {meta.get('python', '?')}")
+    lines.append(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['metric']:<40} {row['baseline']:>12.1f} {row['current']:>12.1f} {row['change']:>+8.1%}{flag}"
+        )
+    only = sorted(set(baseline["results"]) ^ set(current["results"]))
+    if only:
+        lines.append("not in both reports: " + ", ".join(only))
+    return "\n".join(lines)
+
+
+def _load(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _report_comparison(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> int:
+    rows = compare(baseline, current, threshold)
+    print(format_comparison(rows, baseline, current))
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite or compare two result files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="Run scenario groups and write JSON results")
+    run_p.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    run_p.add_argument("--repeat", type=int, default=3, help="Runs per group; metrics are medians")
+    run_p.add_argument("--quick", action="store_true", help="Tenth of the default iteration counts")
+    run_p.add_argument("--envs", type=int, nargs="+", default=[1, 4, 16], help="TerrariaVecEnv sizes")
+    run_p.add_argument("-o", "--output", type=str, default=None, help="Write results JSON here")
+    run_p.add_argument("--baseline", type=str, default=None, help="Compare against this results JSON")
+    run_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative change counted as regression")
+    cmp_p = sub.add_parser("compare", help="Compare two results JSON files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative change counted as regression")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        return _report_comparison(_load(args.baseline), _load(args.current), args.threshold)
+
+    report = run_suite(args.groups, args.repeat, 0.1 if args.quick else 1.0, args.envs)
+    print(format_results(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        return _report_comparison(_load(args.baseline), report, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
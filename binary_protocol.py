@@ -0,0 +1,89 @@
+"""
+Compact binary reply format for the bridge, negotiated per connection (standard library only).
+
+Handshake: the client sends HANDSHAKE_REQUEST as an ordinary command line. A server that
+supports it answers HANDSHAKE_ACK (a text line) and from then on sends every reply as a frame.
+Any other answer (e.g. a JSON state line from a server that doesn't know the command) means
+the client stays on newline JSON. No answer in time: the client reconnects and stays on JSON
+(a late ack would otherwise be read as a reply). Requests from the client stay newline text in both modes.
+
+Frame: u32 little-endian payload length, then payload =
+  STATE_STRUCT (fixed scalar fields + last_reward_events bitfield)
+  [+ UTF-8 JSON object with any extra keys not in the fixed layout]
+
+Batch frame (reply to a multi-world batch command): u32 length, then payload =
+  u32 count, then per state: u32 state payload length + state payload (as above).
+"""
+
+import json
+import struct
+from typing import Any
+
+from framing import FRAME_HEADER
+from reward_events import events_to_mask, mask_to_events
+
+HANDSHAKE_REQUEST = b"proto binary/1\n"
+HANDSHAKE_ACK = "proto binary/1 ok"
+
+# Fixed layout: (field, struct code). Floats are f64 so JSON floats round-trip exactly.
+STATE_LAYOUT = [
+    ("player_x", "d"),
+    ("player_y", "d"),
+    ("enemy_distance", "d"),
+    ("time_of_day", "d"),
+    ("health", "i"),
+    ("wood_count", "i"),
+    ("step_count", "I"),
+    ("enemy_count", "H"),
+    ("is_night", "B"),
+    ("has_shelter", "B"),
+]
+STATE_FIELDS = [name for name, _ in STATE_LAYOUT]
+# The scalar fields, then a u16 event bitfield (reward_events.EVENT_BITS).
+STATE_STRUCT = struct.Struct("<" + "".join(code for _, code in STATE_LAYOUT) + "H")
+
+_KNOWN_KEYS = frozenset(STATE_FIELDS) | {"last_reward_events"}
+
+
+def encode_state(state: dict[str, Any]) -> bytes:
+    """Encode a state dict as one length-prefixed frame."""
+    payload = STATE_STRUCT.pack(
+        *(state.get(name, 0) for name in STATE_FIELDS),
+        events_to_mask(state.get("last_reward_events")),
+    )
+    extra = {k: v for k, v in state.items() if k not in _KNOWN_KEYS}
+    if extra:
+        payload += json.dumps(extra).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_state(payload: bytes) -> dict[str, Any]:
+    """Decode one frame payload (without the length prefix) into a state dict."""
+    *values, mask = STATE_STRUCT.unpack_from(payload)
+    state: dict[str, Any] = dict(zip(STATE_FIELDS, values))
+    state["last_reward_events"] = mask_to_events(mask) if mask else {}
+    if len(payload) > STATE_STRUCT.size:
+        state.update(json.loads(payload[STATE_STRUCT.size :]))
+    return state
+
+
+def encode_states(states: list[dict[str, Any]]) -> bytes:
+    """Encode several states as one batch frame."""
+    parts = [FRAME_HEADER.pack(len(states))]
+    for state in states:
+        parts.append(encode_state(state))  # each is already u32 length + payload
+    payload = b"".join(parts)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_states(payload: bytes) -> list[dict[str, Any]]:
+    """Decode one batch frame payload (without the outer length prefix) into state dicts."""
+    (count,) = FRAME_HEADER.unpack_from(payload)
+    offset = FRAME_HEADER.size
+    states = []
+    for _ in range(count):
+        (size,) = FRAME_HEADER.unpack_from(payload, offset)
+        offset += FRAME_HEADER.size
+        states.append(decode_state(payload[offset : offset + size]))
+        offset += size
+    return states
@@ -2,16 +2,29 @@
 Minimal TCP bridge client for Terraria RL.
 Connects to localhost:8765, receives newline-terminated JSON game state,
 and prints parsed state. Handles partial packets, JSON errors, and disconnections.
+--capture PATH also appends every received message to a capture file (capture.py) that
+replay_server.py can serve back.
 """
 
 import json
 import socket
 import sys
 import time
+from collections import deque
+from typing import Iterable
+
+from binary_protocol import HANDSHAKE_ACK, HANDSHAKE_REQUEST, decode_state, decode_states
+from capture import CaptureWriter
+from connection_pool import backoff_delay
+from delta_protocol import KEYFRAME_COMMAND, DeltaDecoder, delta_request, is_delta_message
+from framing import LineFramer
+from latency import PhaseTimer
 
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 8765
-RECV_SIZE = 4096
+RESET_COMMAND = "reset"
+RECONNECT_BACKOFF_BASE = 0.5
+RECONNECT_BACKOFF_MAX = 10.0
 
 
 def _format_state(state: dict) -> str:
@@ -26,34 +39,30 @@ def _format_state(state: dict) -> str:
     return "\n".join(lines)
 
 
-def _recv_until_newline(
-    sock: socket.socket, buf: bytearray, debug: bool = False
-) -> tuple[str | None, bytearray]:
+def _recv_line(framer: LineFramer, debug: bool = False) -> str | None:
     """
-    Read from socket until a newline; buffer partial data in buf.
-    Returns (decoded line or None if connection closed, updated buffer).
+    Read the next newline-terminated line through the connection's framer.
+    Bytes past the newline stay buffered in the framer for the next call.
+    Returns the decoded line, or None if the connection closed or errored.
     """
-    while True:
-        idx = buf.find(b"\n")
-        if idx != -1:
-            line_b = bytes(buf[:idx])
-            del buf[: idx + 1]
-            if debug:
-                print(f"[Bridge] Received line ({len(line_b)} bytes)", flush=True)
-            return line_b.decode("utf-8").strip(), buf
-        try:
-            data = sock.recv(RECV_SIZE)
-        except (ConnectionResetError, BrokenPipeError, OSError, socket.timeout) as e:
-            if debug:
-                print(f"[Bridge] recv error: {e}", flush=True)
-            return None, buf
-        if not data:
+    try:
+        while True:
+            line_b = framer.pop_line()
+            if line_b is not None:
+                if debug:
+                    print(f"[Bridge] Received line ({len(line_b)} bytes)", flush=True)
+                return line_b.decode("utf-8").strip()
+            n = framer.fill()
+            if n == 0:
+                if debug:
+                    print("[Bridge] recv returned 0 (connection closed)", flush=True)
+                return None
             if debug:
-                print("[Bridge] recv returned 0 (connection closed)", flush=True)
-            return None, buf
+                print(f"[Bridge] recv {n} bytes (buffer now {framer.buffered} bytes, no newline yet)", flush=True)
+    except (ConnectionResetError, BrokenPipeError, OSError, socket.timeout) as e:
         if debug:
-            print(f"[Bridge] recv {len(data)} bytes (buffer now {len(buf) + len(data)} bytes, no newline yet)", flush=True)
-        buf.extend(data)
+            print(f"[Bridge] recv error: {e}", flush=True)
+        return None
 
 
 def run_bridge(
@@ -61,6 +70,7 @@ def run_bridge(
     port: int = DEFAULT_PORT,
     request_state_line: str | None = None,
     debug: bool = False,
+    capture: str | None = None,
 ) -> None:
     """
     Connect to the game server and continuously receive and print JSON state.
@@ -68,26 +78,54 @@ def run_bridge(
       so the server sends a state (mock server / request-response protocol).
       If None, only read (for push-based servers that send JSON lines without request).
     - debug: print when sending requests and when receiving raw bytes (for diagnosing no data).
+    - capture: append every received line, timestamped, to this capture file (kept across reconnects).
     """
-    buf = bytearray()
+    writer = CaptureWriter(capture) if capture else None
+    try:
+        _bridge_loop(host, port, request_state_line, debug, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _bridge_loop(
+    host: str,
+    port: int,
+    request_state_line: str | None,
+    debug: bool,
+    writer: CaptureWriter | None,
+) -> None:
+    request_b = (request_state_line + "\n").encode("utf-8") if request_state_line else None
+    attempt = 0  # consecutive failed connects; reconnect waits back off exponentially with jitter
     while True:
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(30.0)
             sock.connect((host, port))
             print(f"[Bridge] Connected to {host}:{port}", flush=True)
+            attempt = 0
         except (ConnectionRefusedError, OSError) as e:
-            print(f"[Bridge] Connection failed: {e}. Retrying in 5s...", flush=True)
+            delay = backoff_delay(attempt, RECONNECT_BACKOFF_BASE, RECONNECT_BACKOFF_MAX)
+            attempt += 1
+            print(f"[Bridge] Connection failed: {e}. Retrying in {delay:.1f}s...", flush=True)
             try:
-                time.sleep(5)
+                time.sleep(delay)
             except KeyboardInterrupt:
                 sys.exit(0)
             continue
 
-        buf.clear()
+        framer = LineFramer(sock, capture=writer)
         try:
             while True:
-                line, buf = _recv_until_newline(sock, buf, debug=debug)
+                if request_b is not None:
+                    try:
+                        sock.sendall(request_b)
+                    except (ConnectionResetError, BrokenPipeError, OSError) as e:
+                        print(f"[Bridge] Send failed: {e}", flush=True)
+                        break
+                    if debug:
+                        print(f"[Bridge] Sent request: {request_state_line!r}", flush=True)
+                line = _recv_line(framer, debug=debug)
                 if line is None:
                     print("[Bridge] Connection closed by server.", flush=True)
                     break
@@ -108,17 +146,97 @@ def run_bridge(
             except OSError:
                 pass
         # Reconnect after disconnect
-        print("[Bridge] Reconnecting in 2s...", flush=True)
+        delay = backoff_delay(0, RECONNECT_BACKOFF_BASE, RECONNECT_BACKOFF_MAX)
+        print(f"[Bridge] Reconnecting in {delay:.1f}s...", flush=True)
         try:
-            time.sleep(2)
+            time.sleep(delay)
         except KeyboardInterrupt:
             sys.exit(0)
 
 
+def _action_line(action: int, env: int | None = None) -> bytes:
+    """Encode one action as the newline-terminated JSON line the mod expects (optionally for world env)."""
+    if env is None:
+        return (json.dumps({"action_id": int(action)}) + "\n").encode("utf-8")
+    return (json.dumps({"env": int(env), "action_id": int(action)}) + "\n").encode("utf-8")
+
+
+def _sequence_line(actions: Iterable[int], all_states: bool = False, env: int | None = None) -> bytes:
+    """Encode an action-sequence command (applied in order by the server; frame skip / action repeat)."""
+    msg: dict = {"actions": [int(a) for a in actions], "return": "all" if all_states else "final"}
+    if env is not None:
+        msg["env"] = int(env)
+    return (json.dumps(msg) + "\n").encode("utf-8")
+
+
+def _reset_line(seed: int | None = None, env: int | None = None) -> bytes:
+    """Encode an episode reset (optionally reseeded) for world 0 or world env."""
+    if env is not None:
+        return (json.dumps({"env": int(env), "reset": None if seed is None else int(seed)}) + "\n").encode("utf-8")
+    return (RESET_COMMAND if seed is None else f"{RESET_COMMAND} {int(seed)}").encode("utf-8") + b"\n"
+
+
+def _batch_line(steps: Iterable[tuple[int, int | str | None]]) -> bytes:
+    """Encode a multi-world batch command: [(env, action_id, None or "reset"), ...]."""
+    batch = [[int(env), action if action is None or action == RESET_COMMAND else int(action)] for env, action in steps]
+    return (json.dumps({"batch": batch}) + "\n").encode("utf-8")
+
+
+class PendingState:
+    """
+    Reply slot for a pipelined request. Replies arrive in request order;
+    result() reads from the connection until this slot is filled, and re-raises the error
+    that reading its reply failed with (on every call).
+    """
+
+    __slots__ = ("_client", "_state", "_error", "_done", "_batch")
+
+    def __init__(self, client: "BridgeClient", batch: bool = False):
+        self._client = client
+        self._state: dict | list[dict] | None = None
+        self._error: BaseException | None = None
+        self._done = False
+        self._batch = batch
+
+    def done(self) -> bool:
+        return self._done
+
+    def _fail(self, error: BaseException) -> None:
+        self._error = error
+        self._done = True
+
+    def result(self) -> dict | list[dict]:
+        while not self._done:
+            self._client._resolve_next()
+        if self._error is not None:
+            raise self._error
+        return self._state
+
+
 class BridgeClient:
     """
     Minimal TCP client: connect, request state (send 'state'), optionally send action, receive JSON.
     Used by test_server_connection and for one-off requests.
+
+    Pipelined use: submit() queues actions and returns PendingState slots; flush() writes
+    every queued line with one sendall; replies are matched to slots in order.
+    send_actions() does this for a whole sequence, window lines per round trip.
+
+    binary=True negotiates the compact reply format (binary_protocol) on connect and
+    falls back to JSON lines if the server doesn't acknowledge; self.binary is the outcome.
+    delta=N (JSON mode only) asks for delta-encoded replies with a keyframe every N steps
+    (delta_protocol); full states are rebuilt locally. On a sequence gap the replies in flight
+    are read and a keyframe is fetched before result() returns; it replaces the last of those
+    states. self.delta_enabled is the outcome, self.delta_gaps counts gaps.
+
+    Multi-world servers: env= on submit/send_action/request_state addresses world env;
+    step_batch() steps many worlds with one command and one reply; set_seed() reseeds them.
+    send_action_sequence() applies several actions to one world in a single round trip.
+    reset(seed) starts a new episode server-side and returns the fresh state.
+
+    capture=PATH appends every received message to a capture file (capture.py) until close().
+    latency=PhaseTimer records "send" (flush), "recv" (waiting for and framing a reply), "decode"
+    and "send_action" (the whole round trip) times.
     """
 
     def __init__(
@@ -126,11 +244,29 @@ class BridgeClient:
         host: str = DEFAULT_HOST,
         port: int = DEFAULT_PORT,
         timeout: float = 5.0,
+        debug: bool = False,
+        binary: bool = False,
+        negotiate_timeout: float = 1.0,
+        delta: int = 0,
+        capture: str | None = None,
+        latency: PhaseTimer | None = None,
     ):
         self.host = host
         self.port = port
         self.timeout = timeout
+        self.debug = debug
+        self.prefer_binary = binary
+        self.negotiate_timeout = negotiate_timeout
+        self.binary = False
+        self.delta = delta
+        self._decoder: DeltaDecoder | None = None
+        self.capture = capture
+        self._capture: CaptureWriter | None = None
+        self.latency = latency
         self._sock: socket.socket | None = None
+        self._framer: LineFramer | None = None
+        self._outbox: list[bytes] = []  # submitted lines not yet written
+        self._pending: deque[PendingState] = deque()  # replies owed by the server, in order
 
     def connect(self) -> None:
         if self._sock is not None:
@@ -139,9 +275,46 @@ class BridgeClient:
                 return
             except OSError:
                 self._sock = None
+        self._open()
+        self._outbox.clear()
+        self._pending.clear()
+        self.binary = False
+        self._decoder = None
+        if self.prefer_binary:
+            self._negotiate_binary()
+        if self.delta > 0 and not self.binary:
+            self._negotiate_delta()
+
+    def _open(self) -> None:
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.settimeout(self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self._sock.connect((self.host, self.port))
+        if self.capture and self._capture is None:
+            self._capture = CaptureWriter(self.capture)
+        self._framer = LineFramer(self._sock, capture=self._capture)
+
+    def _negotiate_binary(self) -> None:
+        """
+        Offer binary replies; stay on JSON unless the server acknowledges. Without an answer within
+        negotiate_timeout the connection is replaced by a fresh one that never offered binary: a late
+        ack on the old one would be read as the reply to the next request.
+        """
+        self._sock.sendall(HANDSHAKE_REQUEST)
+        self._sock.settimeout(self.negotiate_timeout)
+        try:
+            line = self._framer.readline()
+        except socket.timeout:
+            self._sock.close()
+            self._open()
+            line = b""  # server ignored the handshake: keep JSON
+        finally:
+            self._sock.settimeout(self.timeout)
+        if line is None:
+            raise ConnectionError("Connection closed during handshake")
+        self.binary = line.decode("utf-8").strip() == HANDSHAKE_ACK
+        if self.debug:
+            print(f"[Bridge] Reply format: {'binary' if self.binary else 'json'}", flush=True)
 
     def close(self) -> None:
         if self._sock is not None:
@@ -150,30 +323,225 @@ class BridgeClient:
             except OSError:
                 pass
             self._sock = None
+            self._framer = None
+        if self._capture is not None:
+            self._capture.close()
+            self._capture = None
+        self._outbox.clear()
+        self._pending.clear()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests submitted whose replies have not been read yet."""
+        return len(self._pending)
 
-    def request_state(self) -> dict:
-        """Send 'state', receive one newline-terminated JSON line, return parsed dict."""
+    def _submit_line(self, line: bytes, batch: bool = False) -> PendingState:
         if self._sock is None:
             raise ConnectionError("Not connected")
-        buf = bytearray()
-        line, _ = _recv_until_newline(self._sock, buf)
-        if line is None:
-            raise ConnectionError("Connection closed")
-        return json.loads(line)
+        slot = PendingState(self, batch)
+        self._outbox.append(line)
+        self._pending.append(slot)
+        return slot
 
-    def send_action(self, action: int) -> dict:
-        """Send newline-terminated JSON {\"action_id\": N}, receive one JSON line (state), return parsed dict. Only action_id is sent; no state sent to the mod."""
+    def submit(self, action: int, env: int | None = None) -> PendingState:
+        """Queue {\"action_id\": N} without waiting; the line is written on the next flush() or result()."""
+        return self._submit_line(_action_line(action, env))
+
+    def submit_sequence(
+        self,
+        actions: Iterable[int],
+        all_states: bool = False,
+        env: int | None = None,
+    ) -> PendingState:
+        """Queue an action sequence; result() is the final state, or every intermediate state if all_states."""
+        return self._submit_line(_sequence_line(actions, all_states, env), batch=all_states)
+
+    def submit_batch(self, steps: Iterable[tuple[int, int | None]]) -> PendingState:
+        """Queue a batch of (env, action_id or None) steps; result() is the list of their states."""
+        return self._submit_line(_batch_line(steps), batch=True)
+
+    def flush(self) -> None:
+        """Write every queued request line with a single sendall."""
+        if not self._outbox:
+            return
         if self._sock is None:
             raise ConnectionError("Not connected")
-        action_obj = {"action_id": int(action)}
-        message = json.dumps(action_obj) + "\n"
-        print("SENDING TO MOD:", message)
-        self._sock.sendall(message.encode("utf-8"))
-        buf = bytearray()
-        line, _ = _recv_until_newline(self._sock, buf)
+        data = b"".join(self._outbox)
+        self._outbox.clear()
+        if self.debug:
+            print(f"[Bridge] Sending {len(self._pending)} in flight, {len(data)} bytes", flush=True)
+        lat = self.latency
+        if lat is None:
+            self._sock.sendall(data)
+            return
+        t0 = time.perf_counter_ns()
+        self._sock.sendall(data)
+        lat.record("send", time.perf_counter_ns() - t0)
+
+    def _negotiate_delta(self) -> None:
+        """Enable delta replies; stay on full states if the server answers with a plain state."""
+        self._sock.sendall(delta_request(self.delta))
+        line = _recv_line(self._framer, debug=self.debug)
         if line is None:
-            raise ConnectionError("Connection closed")
-        return json.loads(line)
+            raise ConnectionError("Connection closed during delta negotiation")
+        msg = json.loads(line)
+        if is_delta_message(msg):
+            self._decoder = DeltaDecoder()
+            self._decoder.decode(msg)
+
+    @property
+    def delta_enabled(self) -> bool:
+        return self._decoder is not None
+
+    @property
+    def delta_gaps(self) -> int:
+        return self._decoder.gaps if self._decoder is not None else 0
+
+    def _resolve_next(self) -> None:
+        """Read one reply and fill the oldest pending slot."""
+        if not self._pending:
+            raise RuntimeError("No request in flight")
+        self.flush()
+        slot = self._pending.popleft()
+        try:
+            slot._state = self._read_reply(slot._batch)
+        except BaseException as e:
+            slot._fail(e)
+            raise
+        slot._done = True
+
+    def _read_reply(self, batch: bool = False) -> dict | list[dict]:
+        lat = self.latency
+        t0 = time.perf_counter_ns() if lat is not None else 0
+        if self.binary:
+            try:
+                payload = self._framer.readframe()
+            except (ConnectionResetError, BrokenPipeError, OSError, socket.timeout):
+                payload = None
+            if payload is not None:
+                if lat is None:
+                    return decode_states(payload) if batch else decode_state(payload)
+                t1 = time.perf_counter_ns()
+                reply = decode_states(payload) if batch else decode_state(payload)
+                lat.record("recv", t1 - t0)
+                lat.record("decode", time.perf_counter_ns() - t1)
+                return reply
+        else:
+            line = _recv_line(self._framer, debug=self.debug)
+            if line is not None:
+                if lat is None:
+                    msg = json.loads(line)
+                else:
+                    t1 = time.perf_counter_ns()
+                    msg = json.loads(line)
+                    lat.record("recv", t1 - t0)
+                    lat.record("decode", time.perf_counter_ns() - t1)
+                if batch:
+                    if "error" in msg:
+                        raise ValueError(f"Batch rejected by server: {msg['error']}")
+                    return msg["states"]
+                if self._decoder is None or not is_delta_message(msg):  # env-addressed replies are full states
+                    return msg
+                state, gap = self._decoder.decode(msg)
+                return self._rebase(state) if gap else state
+        error = ConnectionError("Connection closed")
+        for slot in self._pending:  # their replies can't arrive either
+            slot._fail(error)
+        self._pending.clear()
+        self._outbox.clear()
+        raise error
+
+    def _rebase(self, state: dict) -> dict:
+        """
+        After a delta gap, fetch a keyframe and return it in place of `state`. Replies come in request
+        order, so the requests still in flight are read first (their states extend the same stale base)
+        and the keyframe, the state after the last of them, replaces that one's state instead.
+        """
+        last = None
+        while self._pending:
+            last = self._pending[0]
+            try:
+                self._resolve_next()
+            except ValueError:
+                pass  # rejected batch or bad line: kept on that slot
+        self._sock.sendall((KEYFRAME_COMMAND + "\n").encode("utf-8"))
+        keyframe = self._read_reply()
+        if last is None:
+            return keyframe
+        if last._error is None:
+            last._state = keyframe
+        return state
+
+    def drain(self) -> None:
+        """Flush queued lines and read replies until nothing is in flight."""
+        while self._pending:
+            self._resolve_next()
+
+    def request_state(self, env: int | None = None) -> dict:
+        """Send 'state' (or {\"env\": E} for world E), receive one newline-terminated JSON line, return parsed dict."""
+        if env is None:
+            return self._submit_line(b"state\n").result()
+        return self._submit_line((json.dumps({"env": int(env)}) + "\n").encode("utf-8")).result()
+
+    def send_action(self, action: int, env: int | None = None) -> dict:
+        """Send newline-terminated JSON {\"action_id\": N}, receive one JSON line (state), return parsed dict. Only action_id is sent; no state sent to the mod."""
+        lat = self.latency
+        if lat is None:
+            return self.submit(action, env).result()
+        t0 = time.perf_counter_ns()
+        state = self.submit(action, env).result()
+        lat.record("send_action", time.perf_counter_ns() - t0)
+        return state
+
+    def send_action_sequence(
+        self,
+        actions: Iterable[int],
+        all_states: bool = False,
+        env: int | None = None,
+    ) -> dict | list[dict]:
+        """
+        Apply actions in order on the server in one round trip (frame skip / action repeat).
+        Returns the final state, or one state per action if all_states.
+        """
+        actions = list(actions)
+        result = self.submit_sequence(actions, all_states, env).result()
+        if all_states and len(result) != len(actions):
+            raise ValueError(f"Expected {len(actions)} states in sequence reply, got {len(result)}")
+        return result
+
+    def step_batch(self, steps: Iterable[tuple[int, int | None]]) -> list[dict]:
+        """Step several worlds in one round trip; returns their states in the same order."""
+        steps = list(steps)
+        states = self.submit_batch(steps).result()
+        if len(states) != len(steps):
+            raise ValueError(f"Expected {len(steps)} states in batch reply, got {len(states)}")
+        return states
+
+    def reset(self, seed: int | None = None, env: int | None = None) -> dict:
+        """Start a new episode (world 0, or world env) and return its fresh state; seed reseeds its stream."""
+        return self._submit_line(_reset_line(seed, env)).result()
+
+    def set_seed(self, seed: int) -> dict:
+        """Reseed (and restart) every world on this connection: world e uses seed + e. Returns world 0's state."""
+        return self._submit_line(f"seed {int(seed)}\n".encode("utf-8")).result()
+
+    def send_actions(self, actions: Iterable[int], window: int = 256) -> list[dict]:
+        """
+        Pipelined send_action: write up to window action lines per sendall, then read
+        their replies in order. Returns one state per action (the state after that action).
+        window bounds unread replies so neither side blocks on a full socket buffer.
+        """
+        states: list[dict] = []
+        slots: list[PendingState] = []
+        for action in actions:
+            slots.append(self.submit(action))
+            if len(slots) >= window:
+                self.flush()
+                states.extend(slot.result() for slot in slots)
+                slots.clear()
+        self.flush()
+        states.extend(slot.result() for slot in slots)
+        return states
 
 
 def connect_and_receive_one(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> dict | None:
@@ -206,9 +574,12 @@ def main() -> int:
         action="store_true",
         help="Print when sending requests and receiving bytes (diagnose no data).",
     )
+    parser.add_argument("--capture", default=None, help="Append received messages to this capture file.")
     args = parser.parse_args()
     request_line = None if args.no_request else "state"
-    run_bridge(host=args.host, port=args.port, request_state_line=request_line, debug=args.debug)
+    run_bridge(
+        host=args.host, port=args.port, request_state_line=request_line, debug=args.debug, capture=args.capture
+    )
     return 0
 
 
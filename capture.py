@@ -0,0 +1,80 @@
+"""
+Raw protocol capture files (standard library only).
+
+A capture is an append-only record of every message a client received, exactly as it came
+off the wire (a JSON line with its newline, a handshake ack, or a length-prefixed binary
+frame), so a run against the real game can be served back by replay_server.py.
+
+File: CAPTURE_MAGIC once at the start, then records of
+  RECORD_HEADER (u64 time.monotonic_ns() at receipt, u32 length) + the raw message bytes.
+Appending to an existing capture adds records after the old ones; timestamps stay monotonic
+within one boot, so the gap between sessions is preserved too.
+"""
+
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+CAPTURE_MAGIC = b"TERLCAP1"
+RECORD_HEADER = struct.Struct("<QI")
+FLUSH_INTERVAL = 1.0  # seconds of buffered records a crash can lose at most (plus the last record)
+
+
+class CaptureWriter:
+    """
+    Append received messages to a capture file.
+    - record(data): one raw message, stamped with time.monotonic_ns() (or t_ns).
+    - flush() / close(): records are buffered and written at least every flush_interval seconds.
+    """
+
+    def __init__(self, path: str | Path, flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._file: BinaryIO = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+        else:
+            with open(self.path, "rb") as f:
+                if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+                    self._file.close()
+                    raise ValueError(f"{self.path} exists and is not a capture file")
+        self._next_flush = time.monotonic() + flush_interval
+
+    def record(self, data: bytes, t_ns: int | None = None) -> None:
+        now = time.monotonic_ns() if t_ns is None else t_ns
+        self._file.write(RECORD_HEADER.pack(now, len(data)))
+        self._file.write(data)
+        self.records += 1
+        if now * 1e-9 >= self._next_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._next_flush = time.monotonic() + self.flush_interval
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def read_capture(path: str | Path) -> Iterator[tuple[int, bytes]]:
+    """Yield (monotonic_ns, raw message) records in file order; a truncated last record is dropped."""
+    data = Path(path).read_bytes()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"{path} is not a capture file")
+    offset = len(CAPTURE_MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        t_ns, length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > len(data):
+            return
+        yield t_ns, data[offset : offset + length]
+        offset += length
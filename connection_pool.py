@@ -0,0 +1,147 @@
+"""
+Warm-standby connections to the game server (standard library only).
+
+ConnectionPool keeps `standby` already-connected sockets ready in a background thread, so a
+client whose connection drops can swap in a live socket immediately instead of sleeping and
+redoing a TCP connect inside the training step. Failed connects are retried by that thread with
+exponential backoff and full jitter (backoff_delay), off the caller's hot path.
+"""
+
+import random
+import socket
+import threading
+import time
+from typing import Any
+
+DEFAULT_BACKOFF_BASE = 0.05
+DEFAULT_BACKOFF_MAX = 5.0
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = DEFAULT_BACKOFF_BASE,
+    cap: float = DEFAULT_BACKOFF_MAX,
+    rng: random.Random | None = None,
+) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return (rng or random).uniform(0.0, min(cap, base * (2 ** min(attempt, 30))))
+
+
+def _alive(sock: socket.socket) -> bool:
+    """True if an idle socket has not been closed or reset by the peer."""
+    try:
+        sock.setblocking(False)
+        try:
+            return sock.recv(1, socket.MSG_PEEK) != b""
+        except (BlockingIOError, InterruptedError):
+            return True
+        finally:
+            sock.setblocking(True)
+    except OSError:
+        return False
+
+
+class ConnectionPool:
+    """
+    Pre-connected sockets to host:port.
+    - acquire(timeout): a live socket (a standby if one is ready, else waits for the filler thread).
+    - metrics(): standby hits/misses, background connect failures, sockets ready.
+    - close(): stop the filler thread and close the standby sockets.
+    Sockets are returned with TCP_NODELAY set and the pool's timeout.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = 30.0,
+        standby: int = 1,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.standby = max(1, standby)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.standby_hits = 0
+        self.standby_misses = 0
+        self.connect_failures = 0
+        self._ready: list[socket.socket] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._rng = random.Random()
+        self._thread = threading.Thread(target=self._fill, name=f"pool-{host}:{port}", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _fill(self) -> None:
+        """Background thread: keep `standby` connected sockets ready, backing off while connects fail."""
+        attempt = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._ready) < self.standby)
+                if self._closed:
+                    return
+            try:
+                sock = self._connect()
+            except OSError:
+                with self._cond:
+                    self.connect_failures += 1
+                    self._cond.wait(backoff_delay(attempt, self.backoff_base, self.backoff_max, self._rng))
+                attempt += 1
+                continue
+            attempt = 0
+            with self._cond:
+                if self._closed:
+                    sock.close()
+                    return
+                self._ready.append(sock)
+                self._cond.notify_all()
+
+    def acquire(self, timeout: float | None = None) -> socket.socket:
+        """Take a live standby socket, waiting up to timeout (default: the pool timeout) for one."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._ready:
+                self.standby_hits += 1
+            else:
+                self.standby_misses += 1
+            while True:
+                while self._ready:
+                    sock = self._ready.pop(0)
+                    self._cond.notify_all()
+                    if _alive(sock):
+                        sock.settimeout(self.timeout)
+                        return sock
+                    sock.close()
+                if self._closed:
+                    raise ConnectionError("Connection pool closed")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ConnectionError(f"No connection to {self.host}:{self.port} within {timeout}s")
+                self._cond.wait(remaining)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "standby_hits": self.standby_hits,
+                "standby_misses": self.standby_misses,
+                "connect_failures": self.connect_failures,
+                "standby_ready": len(self._ready),
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            ready, self._ready = self._ready, []
+            self._cond.notify_all()
+        for sock in ready:
+            sock.close()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,79 @@
+"""
+Delta-encoded state updates for the bridge (standard library only, JSON replies).
+
+Opt-in per connection: the client sends the command line "delta N" (N = keyframe interval;
+"delta 0" turns it off). A supporting server answers with a keyframe and from then on every
+reply is one of
+  {"seq": S, "keyframe": {...full state...}}
+  {"seq": S, "delta": {...changed keys...}, "removed": [...]}   ("removed" only if non-empty)
+with S incremented by one per reply and a keyframe every N replies. The command "keyframe"
+asks for a keyframe of the current state without applying an action. A server that answers
+"delta N" with a plain state line does not support deltas; the client stays on full states.
+"""
+
+from typing import Any
+
+DELTA_COMMAND = "delta"
+KEYFRAME_COMMAND = "keyframe"
+
+
+def delta_request(keyframe_every: int) -> bytes:
+    """Command line enabling (N > 0) or disabling (N = 0) delta replies."""
+    return f"{DELTA_COMMAND} {int(keyframe_every)}\n".encode("utf-8")
+
+
+def is_delta_message(msg: Any) -> bool:
+    """True if a decoded JSON reply is a delta-mode message rather than a plain state."""
+    return isinstance(msg, dict) and "seq" in msg and ("keyframe" in msg or "delta" in msg)
+
+
+class DeltaEncoder:
+    """Server side: turn successive full states into keyframe/delta messages."""
+
+    def __init__(self, keyframe_every: int):
+        self.keyframe_every = max(1, int(keyframe_every))
+        self.seq = -1
+        self._last: dict[str, Any] | None = None
+
+    def encode(self, state: dict[str, Any], keyframe: bool = False) -> dict[str, Any]:
+        self.seq += 1
+        last = self._last
+        self._last = state
+        if keyframe or last is None or self.seq % self.keyframe_every == 0:
+            return {"seq": self.seq, "keyframe": state}
+        msg: dict[str, Any] = {
+            "seq": self.seq,
+            "delta": {k: v for k, v in state.items() if k not in last or last[k] != v},
+        }
+        removed = [k for k in last if k not in state]
+        if removed:
+            msg["removed"] = removed
+        return msg
+
+
+class DeltaDecoder:
+    """
+    Client side: rebuild full states from keyframe/delta messages.
+    decode() returns (state, gap); gap is True when a delta's seq does not follow the
+    previous message (the caller should request a keyframe). Returned dicts are never mutated.
+    """
+
+    def __init__(self) -> None:
+        self.seq: int | None = None
+        self.state: dict[str, Any] | None = None
+        self.gaps = 0
+
+    def decode(self, msg: dict[str, Any]) -> tuple[dict[str, Any], bool]:
+        seq = msg["seq"]
+        if "keyframe" in msg:
+            self.seq, self.state = seq, msg["keyframe"]
+            return self.state, False
+        gap = self.seq is None or seq != self.seq + 1
+        if gap:
+            self.gaps += 1
+        state = dict(self.state or {})
+        state.update(msg["delta"])
+        for k in msg.get("removed", ()):
+            state.pop(k, None)
+        self.seq, self.state = seq, state
+        return state, gap
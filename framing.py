@@ -0,0 +1,140 @@
+"""
+Newline framing for the bridge protocol (standard library only).
+One LineFramer per connection keeps a persistent receive buffer that is filled with
+recv_into through a preallocated memoryview, so bytes read past a newline are kept
+for the next line instead of being dropped, and a state line costs one recv, not hundreds.
+The same buffer also splits u32 length-prefixed frames (binary_protocol replies).
+A capture.CaptureWriter attached as `capture` receives every message with its delimiter.
+"""
+
+import socket
+import struct
+from typing import Iterator
+
+from capture import CaptureWriter
+
+RECV_SIZE = 65536
+FRAME_HEADER = struct.Struct("<I")
+
+
+class LineFramer:
+    """
+    Split a socket byte stream into newline-terminated lines.
+    - fill(): one recv_into into the free tail of the buffer; returns bytes read (0 = closed).
+    - pop_line(): next complete line already buffered (without the newline), or None.
+    - readline(): pop_line(), filling as needed; None when the peer closes.
+    - lines(): generator yielding whole lines until the peer closes.
+    - pop_frame() / readframe(): the same for u32 little-endian length-prefixed frames.
+    Socket errors and timeouts propagate to the caller.
+    capture: if set, every returned line/frame is also recorded raw (newline / length prefix included).
+    """
+
+    def __init__(self, sock: socket.socket, bufsize: int = RECV_SIZE, capture: CaptureWriter | None = None):
+        self.sock = sock
+        self.capture = capture
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        self._start = 0  # first unconsumed byte
+        self._end = 0  # one past the last received byte
+        self._scan = 0  # bytes before this offset are known to hold no newline
+        self.recv_calls = 0
+        self.bytes_received = 0
+        self.lines_framed = 0
+
+    @property
+    def buffered(self) -> int:
+        """Number of received bytes not yet returned as lines."""
+        return self._end - self._start
+
+    def pop_line(self) -> bytes | None:
+        """Return the next buffered line without reading from the socket, or None."""
+        idx = self._buf.find(b"\n", self._scan, self._end)
+        if idx == -1:
+            self._scan = self._end
+            return None
+        line = bytes(self._view[self._start : idx])
+        if self.capture is not None:
+            self.capture.record(bytes(self._view[self._start : idx + 1]))
+        self._start = self._scan = idx + 1
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        self.lines_framed += 1
+        return line
+
+    def fill(self) -> int:
+        """Receive once into the free tail of the buffer. Returns bytes read; 0 means the peer closed."""
+        if self._end == len(self._buf):
+            self._make_room()
+        n = self.sock.recv_into(self._view[self._end :])
+        self.recv_calls += 1
+        self.bytes_received += n
+        self._end += n
+        return n
+
+    def readline(self) -> bytes | None:
+        """Return the next line, reading from the socket as needed; None if the peer closed."""
+        while True:
+            line = self.pop_line()
+            if line is not None:
+                return line
+            if self.fill() == 0:
+                return None
+
+    def lines(self) -> Iterator[bytes]:
+        """Yield whole lines until the peer closes the connection."""
+        while True:
+            line = self.readline()
+            if line is None:
+                return
+            yield line
+
+    def pop_frame(self) -> bytes | None:
+        """Return the next buffered length-prefixed frame payload without reading, or None."""
+        avail = self._end - self._start
+        if avail < FRAME_HEADER.size:
+            return None
+        (length,) = FRAME_HEADER.unpack_from(self._buf, self._start)
+        stop = self._start + FRAME_HEADER.size + length
+        if stop > self._end:
+            if FRAME_HEADER.size + length > len(self._buf):
+                self._grow(FRAME_HEADER.size + length)
+            return None
+        payload = bytes(self._view[self._start + FRAME_HEADER.size : stop])
+        if self.capture is not None:
+            self.capture.record(bytes(self._view[self._start : stop]))
+        self._start = self._scan = stop
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        self.lines_framed += 1
+        return payload
+
+    def readframe(self) -> bytes | None:
+        """Return the next frame payload, reading as needed; None if the peer closed."""
+        while True:
+            frame = self.pop_frame()
+            if frame is not None:
+                return frame
+            if self.fill() == 0:
+                return None
+
+    def clear(self) -> None:
+        """Drop any buffered bytes (e.g. after reconnecting on the same framer)."""
+        self._start = self._end = self._scan = 0
+
+    def _make_room(self) -> None:
+        """Compact pending bytes to the front; grow the buffer if a single line fills it."""
+        pending = self._end - self._start
+        if self._start > 0:
+            self._buf[:pending] = self._view[self._start : self._end].tobytes()
+            self._scan -= self._start
+            self._start, self._end = 0, pending
+            return
+        self._grow(2 * len(self._buf))
+
+    def _grow(self, size: int) -> None:
+        """Enlarge the buffer to at least size bytes, keeping its contents."""
+        if size <= len(self._buf):
+            return
+        self._view.release()
+        self._buf.extend(bytes(size - len(self._buf)))
+        self._view = memoryview(self._buf)
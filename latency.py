@@ -0,0 +1,148 @@
+"""
+Opt-in per-phase latency instrumentation (standard library only).
+
+PhaseTimer keeps one LatencyHistogram per phase name ("send", "recv", "decode", "obs", ...).
+Clients and envs hold an optional `latency` attribute: None (the default) costs one attribute
+check per timed section; a PhaseTimer makes them record time.perf_counter_ns() deltas into it.
+Histograms are log-bucketed (16 buckets per power of two, <= ~6% relative error), so memory and
+record cost stay constant however many samples are taken.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+SUB_BITS = 4
+SUB = 1 << SUB_BITS  # buckets per power of two
+NUM_BUCKETS = SUB + (64 - SUB_BITS) * SUB
+
+
+def _bucket(ns: int) -> int:
+    if ns < SUB:
+        return max(ns, 0)
+    e = ns.bit_length() - 1
+    return SUB + (e - SUB_BITS) * SUB + ((ns >> (e - SUB_BITS)) - SUB)
+
+
+def _bucket_mid(index: int) -> float:
+    """Midpoint of a bucket's value range (exact for the small linear buckets)."""
+    if index < SUB:
+        return float(index)
+    shift, sub = divmod(index - SUB, SUB)
+    return ((SUB + sub) << shift) + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of nanosecond durations: record(ns), percentile(q), count/total/min/max."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max = 0
+
+    def record(self, ns: int) -> None:
+        if ns < SUB:
+            self.counts[max(ns, 0)] += 1
+        else:
+            e = ns.bit_length() - 1  # _bucket(), inlined
+            self.counts[SUB + (e - SUB_BITS) * SUB + ((ns >> (e - SUB_BITS)) - SUB)] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in ns; exact min/max at the ends."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(max(_bucket_mid(index), float(self.min)), float(self.max))
+        return float(self.max)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+
+class PhaseTimer:
+    """
+    One histogram per phase.
+    - record(phase, ns) / time(phase) context manager for code outside the instrumented classes (e.g. the policy).
+    - summary(): {phase: {count, mean_us, p50_us, p95_us, p99_us, max_us}} plus "steps_per_sec"
+      (count of the `step_phase` phase over wall time since the timer started or was cleared).
+    - format(): the summary as a table. report: if set (e.g. print), TerrariaEnv passes it format()
+      at the end of every episode.
+    """
+
+    def __init__(self, step_phase: str = "step", report: Callable[[str], Any] | None = None):
+        self.step_phase = step_phase
+        self.report = report
+        self.phases: dict[str, LatencyHistogram] = {}
+        self.started = time.perf_counter_ns()
+
+    def record(self, phase: str, ns: int) -> None:
+        hist = self.phases.get(phase)
+        if hist is None:
+            hist = self.phases[phase] = LatencyHistogram()
+        hist.record(ns)
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter_ns() - t0)
+
+    def clear(self) -> None:
+        self.phases.clear()
+        self.started = time.perf_counter_ns()
+
+    def summary(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for phase, h in self.phases.items():
+            out[phase] = {
+                "count": h.count,
+                "mean_us": h.total / h.count / 1e3 if h.count else 0.0,
+                "p50_us": h.percentile(50) / 1e3,
+                "p95_us": h.percentile(95) / 1e3,
+                "p99_us": h.percentile(99) / 1e3,
+                "max_us": h.max / 1e3,
+            }
+        elapsed = (time.perf_counter_ns() - self.started) / 1e9
+        steps = self.phases[self.step_phase].count if self.step_phase in self.phases else 0
+        out["steps_per_sec"] = steps / elapsed if elapsed > 0 else 0.0
+        return out
+
+    def format(self) -> str:
+        summary = self.summary()
+        lines = [f"{'phase':<12} {'count':>9} {'mean_us':>9} {'p50_us':>9} {'p95_us':>9} {'p99_us':>9} {'max_us':>10}"]
+        for phase, s in summary.items():
+            if phase == "steps_per_sec":
+                continue
+            lines.append(
+                f"{phase:<12} {s['count']:>9} {s['mean_us']:>9.1f} {s['p50_us']:>9.1f} "
+                f"{s['p95_us']:>9.1f} {s['p99_us']:>9.1f} {s['max_us']:>10.1f}"
+            )
+        lines.append(f"steps/sec: {summary['steps_per_sec']:.1f}")
+        return "\n".join(lines)
+
+    def episode_end(self) -> None:
+        if self.report is not None:
+            self.report(self.format())
@@ -1,15 +1,46 @@
 """
 Mock Terraria server: serves JSON state over TCP (localhost:8765).
 Simulates state updates from actions; deterministic when seeded.
+Each connection can drive many independent worlds by env id ({"env": 17, "action_id": 3});
+{"batch": [[env, action_id|null], ...]} steps several and answers {"states": [...]} in one reply.
+{"actions": [...], "return": "final"|"all"} applies a sequence to one world (frame skip).
+World e of connection c is seeded with seed + c * MAX_WORLDS + e (c counts the server's connections,
+so clients that don't send "seed" still get distinct worlds); "seed S" makes them S + e and restarts them.
+"reset [S]" starts a new episode in world 0 ({"env": E, "reset": S|null} for world E; "reset" as a
+batch action): default state, stream reseeded with S if given, else continued.
+One selectors event loop per process serves all connections; --workers N adds
+processes sharing the port through SO_REUSEPORT.
+Port 0 binds a free port; the "listening on HOST:PORT" line printed once the socket is
+listening reports it (server_manager.py waits for that line).
 """
 
+import argparse
+import itertools
 import json
+import multiprocessing
 import random
+import selectors
+import signal
 import socket
-import threading
+import sys
+from typing import Iterator
+
+from binary_protocol import HANDSHAKE_ACK, HANDSHAKE_REQUEST, encode_state, encode_states
+from delta_protocol import DELTA_COMMAND, KEYFRAME_COMMAND, DeltaEncoder
 
 DEFAULT_PORT = 8765
 STEP_PER_DAY_NIGHT = 50  # steps before flipping is_night (simple cycle)
+DEFAULT_BACKLOG = socket.SOMAXCONN
+RECV_SIZE = 65536
+MAX_LINE = 1 << 20  # drop a connection whose unterminated command grows past this
+MAX_PENDING_WRITE = 4 << 20  # stop reading from a connection until it drains below this
+MAX_WORLDS = 1 << 16  # env ids per connection: 0 .. MAX_WORLDS - 1
+MAX_CONNECTION_SEEDS = 1 << 20  # connections before a server's seed blocks wrap into the next server's
+SERVER_SEED_STRIDE = MAX_CONNECTION_SEEDS * MAX_WORLDS  # --seed spacing for servers that must not share worlds
+SEED_COMMAND = "seed"
+RESET_COMMAND = "reset"
+
+_HANDSHAKE = HANDSHAKE_REQUEST.decode("utf-8").strip()
 
 
 def _default_state(seed: int | None = None) -> dict:
@@ -93,50 +124,358 @@ def _apply_action(state: dict, action: int, rng: random.Random) -> dict:
     return state
 
 
-def _handle_client(conn: socket.socket, addr: tuple, seed: int | None) -> None:
-    rng = random.Random(seed)
-    state = _default_state(seed)
-    buf = b""
-    try:
+def _parse_action(cmd: str) -> int | None:
+    """Action id from a digit command or a JSON {"action_id": N} line; None if not an action."""
+    if cmd.isdecimal():  # not isdigit(): "²" is a digit that int() rejects
+        action = int(cmd)
+    elif cmd.startswith("{"):
+        try:
+            action = json.loads(cmd).get("action_id")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+        if not isinstance(action, int):
+            return None
+    else:
+        return None
+    return action if 0 <= action <= 6 else None
+
+
+def _encode_reply(
+    state: dict,
+    binary: bool,
+    delta: DeltaEncoder | None = None,
+    keyframe: bool = False,
+) -> bytes:
+    """Serialize a state reply: a binary frame once negotiated, else a JSON line (delta-encoded if enabled)."""
+    if binary:
+        return encode_state(state)
+    if delta is not None:
+        return (json.dumps(delta.encode(state, keyframe=keyframe)) + "\n").encode("utf-8")
+    return (json.dumps(state) + "\n").encode("utf-8")
+
+
+class _World:
+    """One seeded game: its state and its random stream."""
+
+    __slots__ = ("state", "rng")
+
+    def __init__(self, seed: int | None):
+        self.rng = random.Random(seed)
+        self.state = _default_state(seed)
+
+    def step(self, action: int | None) -> dict:
+        if action is not None:
+            self.state = _apply_action(self.state, action, self.rng)
+        return self.state
+
+    def reset(self, seed: int | None = None) -> dict:
+        """Start a new episode from the default state; reseed the stream if a seed is given, else continue it."""
+        if seed is not None:
+            self.rng = random.Random(seed)
+        self.state = _default_state(seed)
+        return self.state
+
+
+def _seed_arg(value) -> int | None:
+    """Seed from a command argument (int, or integer string in line commands), else None."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _world_id(value) -> int | None:
+    """Validated env id from a command, or None."""
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < MAX_WORLDS:
+        return value
+    return None
+
+
+def _valid_action(value) -> int | None:
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 6:
+        return value
+    return None
+
+
+class _Session:
+    """
+    Protocol state of one connection and the worlds it addresses; handle(cmd) returns the reply bytes.
+    World e is created on first use with seed base_seed + e (None stays unseeded). Plain commands
+    (digits, {"action_id"}, "state", delta/keyframe) address world 0.
+    """
+
+    __slots__ = ("base_seed", "worlds", "binary", "delta")
+
+    def __init__(self, seed: int | None):
+        self.base_seed = seed
+        self.worlds: dict[int, _World] = {}
+        self.binary = False
+        self.delta: DeltaEncoder | None = None
+
+    def world(self, env: int) -> _World:
+        world = self.worlds.get(env)
+        if world is None:
+            seed = None if self.base_seed is None else self.base_seed + env
+            world = self.worlds[env] = _World(seed)
+        return world
+
+    def handle(self, cmd: str) -> bytes:
+        if cmd == _HANDSHAKE:
+            self.binary = True
+            return (HANDSHAKE_ACK + "\n").encode("utf-8")
+        if cmd.startswith(DELTA_COMMAND + " "):
+            every = cmd[len(DELTA_COMMAND) + 1 :]
+            self.delta = DeltaEncoder(int(every)) if every.isdecimal() and int(every) > 0 else None
+            return _encode_reply(self.world(0).state, self.binary, self.delta, keyframe=True)
+        if cmd == KEYFRAME_COMMAND:
+            return _encode_reply(self.world(0).state, self.binary, self.delta, keyframe=True)
+        if cmd.startswith(SEED_COMMAND + " "):
+            seed = _seed_arg(cmd[len(SEED_COMMAND) + 1 :])
+            if seed is not None:
+                self.base_seed = seed
+                self.worlds.clear()
+            return _encode_reply(self.world(0).state, self.binary, self.delta, keyframe=True)
+        if cmd == RESET_COMMAND or cmd.startswith(RESET_COMMAND + " "):
+            state = self.world(0).reset(_seed_arg(cmd[len(RESET_COMMAND) :].strip()))
+            return _encode_reply(state, self.binary, self.delta, keyframe=True)
+        if cmd.startswith("{"):
+            try:
+                msg = json.loads(cmd)
+            except json.JSONDecodeError:
+                msg = None
+            if not isinstance(msg, dict):
+                msg = {}
+            if "batch" in msg:
+                return self._batch(msg["batch"])
+            if "actions" in msg:
+                return self._sequence(msg)
+            action = _valid_action(msg.get("action_id"))
+            if "env" in msg:
+                env = _world_id(msg["env"])
+                if env is not None and "reset" in msg:
+                    return _encode_reply(self.world(env).reset(_seed_arg(msg["reset"])), self.binary)
+                if env is not None:
+                    return _encode_reply(self.world(env).step(action), self.binary)
+                action = None  # unknown world: answer world 0 unchanged
+        else:
+            action = _parse_action(cmd)
+        return _encode_reply(self.world(0).step(action), self.binary, self.delta)
+
+    def _batch(self, items) -> bytes:
+        """Step each [env, action_id|null|"reset"] pair in order; answer all resulting states in one reply."""
+        states = []
+        error = None
+        if not isinstance(items, list):
+            error = "batch must be a list of [env, action_id] pairs"
+        else:
+            for item in items:
+                env = _world_id(item[0]) if isinstance(item, list) and len(item) == 2 else None
+                if env is None:
+                    error = f"bad batch item {item!r}"
+                    states = []
+                    break
+                world = self.world(env)
+                states.append(world.reset() if item[1] == RESET_COMMAND else world.step(_valid_action(item[1])))
+        return self._states_reply(states, error)
+
+    def _sequence(self, msg: dict) -> bytes:
+        """
+        Apply {"actions": [...]} to one world in order (action repeat / frame skip). Replies with the
+        final state, or with every intermediate state when "return" is "all". Invalid action ids
+        are no-ops but still produce a state.
+        """
+        actions = msg["actions"]
+        env = _world_id(msg.get("env", 0))
+        if not isinstance(actions, list) or env is None:
+            return self._states_reply([], "actions must be a list and env a valid world id")
+        world = self.world(env)
+        states = [world.step(_valid_action(a)) for a in actions]
+        if msg.get("return") == "all":
+            return self._states_reply(states)
+        if "env" in msg:
+            return _encode_reply(world.state, self.binary)
+        return _encode_reply(world.state, self.binary, self.delta)
+
+    def _states_reply(self, states: list[dict], error: str | None = None) -> bytes:
+        """Several states in one reply: a batch frame, or a {"states": [...]} line (plus "error")."""
+        if self.binary:
+            return encode_states(states)
+        reply: dict = {"states": states}
+        if error is not None:
+            reply["error"] = error
+        return (json.dumps(reply) + "\n").encode("utf-8")
+
+
+class _Connection:
+    """
+    Non-blocking client connection: bytearray read buffer scanned once per recv (every complete
+    command line is answered), replies batched into one write buffer and flushed with one send.
+    """
+
+    __slots__ = ("sock", "session", "rbuf", "wbuf")
+
+    def __init__(self, sock: socket.socket, session: _Session):
+        self.sock = sock
+        self.session = session
+        self.rbuf = bytearray()
+        self.wbuf = bytearray()
+
+    def on_readable(self) -> bool:
+        """Read what is available and queue replies; False when the peer closed or misbehaved."""
+        try:
+            data = self.sock.recv(RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return True
+        if not data:
+            return False
+        rbuf = self.rbuf
+        rbuf += data
+        start = 0
+        handle, wbuf = self.session.handle, self.wbuf
         while True:
-            data = conn.recv(1024)
-            if not data:
+            nl = rbuf.find(b"\n", start)
+            if nl < 0:
                 break
-            buf += data
-            while b"\n" in buf:
-                line, buf = buf.split(b"\n", 1)
-                cmd = line.decode("utf-8").strip()
-                if cmd == "state":
-                    conn.sendall((json.dumps(state) + "\n").encode("utf-8"))
-                elif cmd.isdigit() and 0 <= int(cmd) <= 6:
-                    action = int(cmd)
-                    state = _apply_action(state, action, rng)
-                    conn.sendall((json.dumps(state) + "\n").encode("utf-8"))
-                else:
-                    conn.sendall((json.dumps(state) + "\n").encode("utf-8"))
-    except (ConnectionResetError, BrokenPipeError, OSError):
-        pass
-    finally:
-        conn.close()
+            try:
+                wbuf += handle(rbuf[start:nl].decode("utf-8", "replace").strip())
+            except Exception as e:
+                # One bad command must not take down the loop serving every connection. A binary
+                # client can't be sent a JSON error line, so drop it instead.
+                if self.session.binary:
+                    return False
+                wbuf += (json.dumps({"error": f"{type(e).__name__}: {e}"}) + "\n").encode("utf-8")
+            start = nl + 1
+        if start:
+            del rbuf[:start]
+        return len(rbuf) <= MAX_LINE
+
+    def flush(self) -> None:
+        """Send as much of the write buffer as the socket takes without blocking."""
+        if self.wbuf:
+            try:
+                sent = self.sock.send(self.wbuf)
+            except BlockingIOError:
+                return
+            del self.wbuf[:sent]
 
+    def interest(self) -> int:
+        """Selector events to wait for: stop reading while too many replies are unsent."""
+        if not self.wbuf:
+            return selectors.EVENT_READ
+        if len(self.wbuf) > MAX_PENDING_WRITE:
+            return selectors.EVENT_WRITE
+        return selectors.EVENT_READ | selectors.EVENT_WRITE
 
-def run_server(port: int = DEFAULT_PORT, seed: int | None = 42) -> None:
+
+def _listen(port: int, backlog: int, reuse_port: bool = False) -> socket.socket:
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server.bind(("127.0.0.1", port))
-    server.listen(1)
-    print(f"Mock Terraria server listening on 127.0.0.1:{port} (seed={seed})")
+    server.listen(backlog)
+    server.setblocking(False)
+    return server
+
 
+def _accept_all(server: socket.socket, sel: selectors.BaseSelector, seeds: Iterator[int | None]) -> None:
     while True:
-        conn, addr = server.accept()
-        # Each client gets a deterministic but distinct stream (seed + client port)
-        client_seed = (seed or 0) + (addr[1] % 10000)
-        t = threading.Thread(target=_handle_client, args=(conn, addr, client_seed))
-        t.daemon = True
-        t.start()
+        try:
+            conn, addr = server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        conn.setblocking(False)
+        # Replies are small and latency-bound; don't let Nagle hold back pipelined replies.
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sel.register(conn, selectors.EVENT_READ, _Connection(conn, _Session(next(seeds))))
+
+
+def _connection_seeds(seed: int | None, worker: int, workers: int) -> Iterator[int | None]:
+    """Base seed of each accepted connection: its own MAX_WORLDS block, interleaved across workers."""
+    for c in itertools.count(worker, workers):
+        yield None if seed is None else seed + c * MAX_WORLDS
+
+
+def _close(sel: selectors.BaseSelector, conn: _Connection) -> None:
+    sel.unregister(conn.sock)
+    conn.sock.close()
+
+
+def serve(server: socket.socket, seed: int | None, worker: int = 0, workers: int = 1) -> None:
+    """
+    Single-threaded event loop over a listening socket: accept, answer and flush every connection.
+    worker / workers: this loop's index among the processes sharing the port (keeps connection seeds apart).
+    """
+    sel = selectors.DefaultSelector()
+    sel.register(server, selectors.EVENT_READ, None)
+    seeds = _connection_seeds(seed, worker, workers)
+    while True:
+        for key, mask in sel.select():
+            conn = key.data
+            if conn is None:
+                _accept_all(server, sel, seeds)
+                continue
+            before = conn.interest()
+            try:
+                if mask & selectors.EVENT_READ and not conn.on_readable():
+                    _close(sel, conn)
+                    continue
+                conn.flush()
+            except OSError:
+                _close(sel, conn)
+                continue
+            after = conn.interest()
+            if after != before:
+                sel.modify(conn.sock, after, conn)
+
+
+def _serve_worker(port: int, seed: int | None, backlog: int, worker: int, workers: int) -> None:
+    serve(_listen(port, backlog, reuse_port=True), seed, worker, workers)
+
+
+def run_server(
+    port: int = DEFAULT_PORT,
+    seed: int | None = 42,
+    workers: int = 1,
+    backlog: int = DEFAULT_BACKLOG,
+) -> None:
+    """
+    Serve until killed. workers > 1 forks that many processes, each with its own SO_REUSEPORT
+    listener on the same port, so the kernel spreads connections across them (Linux/BSD only).
+    """
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("SO_REUSEPORT not available on this platform; serving with one process")
+        workers = 1
+    server = _listen(port, backlog, reuse_port=workers > 1)
+    port = server.getsockname()[1]  # the bound port when port 0 was asked for
+    procs = []
+    if workers > 1:
+        # Turn SIGTERM into SystemExit so the finally block below stops the worker processes too.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        for worker in range(1, workers):
+            proc = multiprocessing.Process(
+                target=_serve_worker, args=(port, seed, backlog, worker, workers), daemon=True
+            )
+            proc.start()
+            procs.append(proc)
+    print(f"Mock Terraria server listening on 127.0.0.1:{port} (seed={seed}, workers={workers})", flush=True)
+    try:
+        serve(server, seed, 0, workers)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        server.close()
 
 
 if __name__ == "__main__":
-    import sys
-    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
-    run_server(port=port)
+    parser = argparse.ArgumentParser(description="Mock Terraria server (JSON state over TCP).")
+    parser.add_argument("port", type=int, nargs="?", default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processes sharing the port via SO_REUSEPORT")
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG, help="listen() accept backlog")
+    args = parser.parse_args()
+    run_server(port=args.port, seed=args.seed, workers=args.workers, backlog=args.backlog)
@@ -0,0 +1,154 @@
+"""
+Replay server: serves a capture file (capture.py) back to clients in place of the game.
+Every connection gets the captured messages from the beginning, byte for byte:
+- request-response (default): one recorded message per command line received; pipelined
+  commands are answered with one write. The commands themselves are not interpreted.
+- --push: streams the messages without waiting for commands (bridge_client --no-request).
+Timing is as fast as possible unless --realtime, which paces message k to its recorded offset
+from the first message (divided by --speed). After the last message the connection is closed,
+or the capture starts over with --loop.
+"""
+
+import argparse
+import socket
+import threading
+import time
+from pathlib import Path
+
+from capture import read_capture
+from mock_server import DEFAULT_BACKLOG, DEFAULT_PORT, RECV_SIZE, _listen
+
+
+class Capture:
+    """A capture loaded for serving: raw messages and their offsets (seconds) from the first one."""
+
+    def __init__(self, path: str | Path):
+        records = list(read_capture(path))
+        if not records:
+            raise ValueError(f"{path} holds no records")
+        t0 = records[0][0]
+        self.messages = [msg for _, msg in records]
+        self.offsets = [(t - t0) * 1e-9 for t, _ in records]
+        # One loop lasts the recording plus one mean message gap, so lap k+1 doesn't start on lap k's last message.
+        n = len(records)
+        self.period = self.offsets[-1] * (n / (n - 1)) if n > 1 else 0.0
+        self.blob = b"".join(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+
+class _Replayer:
+    """Per-connection cursor over a Capture, with optional recorded-time pacing."""
+
+    def __init__(self, sock: socket.socket, capture: Capture, realtime: bool, speed: float, loop: bool):
+        self.sock = sock
+        self.capture = capture
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.index = 0
+        self.lap = 0
+        self.start: float | None = None
+
+    def exhausted(self) -> bool:
+        return not self.loop and self.index >= len(self.capture)
+
+    def send(self, count: int) -> None:
+        """Send the next count messages (fewer if the capture ends without --loop)."""
+        cap = self.capture
+        if self.start is None:
+            self.start = time.monotonic()
+        while count > 0 and not self.exhausted():
+            if self.index >= len(cap):
+                self.index = 0
+                self.lap += 1
+            take = min(count, len(cap) - self.index)
+            if self.realtime:
+                take = 1
+                due = self.start + (self.lap * cap.period + cap.offsets[self.index]) / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if take == len(cap):
+                self.sock.sendall(cap.blob)
+            else:
+                self.sock.sendall(b"".join(cap.messages[self.index : self.index + take]))
+            self.index += take
+            count -= take
+
+
+def _handle(sock: socket.socket, capture: Capture, push: bool, realtime: bool, speed: float, loop: bool) -> None:
+    sock.setblocking(True)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    replayer = _Replayer(sock, capture, realtime, speed, loop)
+    try:
+        if push:
+            while not replayer.exhausted():
+                replayer.send(len(capture))
+            return
+        buf = bytearray(RECV_SIZE)
+        while not replayer.exhausted():
+            n = sock.recv_into(buf)
+            if n == 0:
+                return
+            commands = buf.count(b"\n", 0, n)
+            if commands:
+                replayer.send(commands)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def run_server(
+    capture_path: str | Path,
+    port: int = DEFAULT_PORT,
+    push: bool = False,
+    realtime: bool = False,
+    speed: float = 1.0,
+    loop: bool = False,
+    backlog: int = DEFAULT_BACKLOG,
+) -> None:
+    """Serve capture_path until killed; one thread per connection."""
+    if speed <= 0:
+        raise ValueError("speed must be > 0")
+    capture = Capture(capture_path)
+    server = _listen(port, backlog)
+    server.setblocking(True)
+    port = server.getsockname()[1]  # the bound port when port 0 was asked for
+    mode = "push" if push else "request-response"
+    timing = f"realtime x{speed:g}" if realtime else "as fast as possible"
+    print(
+        f"Replay server listening on 127.0.0.1:{port} ({len(capture)} messages, {mode}, {timing})",
+        flush=True,
+    )
+    try:
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(
+                target=_handle, args=(conn, capture, push, realtime, speed, loop), daemon=True
+            ).start()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a protocol capture back over TCP.")
+    parser.add_argument("capture", help="Capture file written by --capture / capture.CaptureWriter")
+    parser.add_argument("port", type=int, nargs="?", default=DEFAULT_PORT)
+    parser.add_argument("--push", action="store_true", help="Stream messages without waiting for commands")
+    parser.add_argument("--realtime", action="store_true", help="Pace messages at their recorded timing")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed factor for --realtime")
+    parser.add_argument("--loop", action="store_true", help="Start over when the capture runs out")
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG, help="listen() accept backlog")
+    args = parser.parse_args()
+    run_server(
+        args.capture,
+        port=args.port,
+        push=args.push,
+        realtime=args.realtime,
+        speed=args.speed,
+        loop=args.loop,
+        backlog=args.backlog,
+    )
@@ -0,0 +1,34 @@
+"""
+Reward events reported by the bridge in a state's last_reward_events (standard library only).
+Shared by the binary reply format (binary_protocol) and the batched task API (_archive/src/batch.py),
+which both carry the events as a bitmask: bit i is set when EVENT_NAMES[i] is truthy.
+Unrecognised names are dropped, so a mask of 0 means "no recognised event".
+"""
+
+from typing import Any
+
+EVENT_NAMES = [
+    "wood_collected",
+    "tree_chopped",
+    "shelter_built",
+    "damage_taken",
+    "died",
+    "survived_night",
+]
+EVENT_BITS = {name: 1 << i for i, name in enumerate(EVENT_NAMES)}
+
+
+def events_to_mask(events: dict[str, Any] | None) -> int:
+    """Pack a last_reward_events dict into an event bitmask (unknown events are dropped)."""
+    if not events:
+        return 0
+    mask = 0
+    for name, value in events.items():
+        if value:
+            mask |= EVENT_BITS.get(name, 0)
+    return mask
+
+
+def mask_to_events(mask: int) -> dict[str, bool]:
+    """Unpack an event bitmask into a last_reward_events dict (only set events)."""
+    return {name: True for name, bit in EVENT_BITS.items() if mask & bit}
@@ -0,0 +1,192 @@
+"""
+Lifecycle manager for local mock servers (standard library only).
+
+MockServerManager launches N mock_server.py processes (default: one per CPU core), each on a
+port of its own choosing (port 0, so no two jobs on one box can race for the same port).
+A server counts as ready once it has printed its "listening on HOST:PORT" line and answered a
+"state" request. addresses() hands (host, port) pairs to env factories (round-robin over the
+servers); healthy() probes them; ensure() restarts any that died or stopped answering.
+Server i is seeded with seed + i * SERVER_SEED_STRIDE. mock_server gives its connection c (probes
+included) the block seed + c * MAX_WORLDS, so two servers only share world seeds after one of them has
+accepted MAX_CONNECTION_SEEDS (2**20) connections.
+"""
+
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import IO, Sequence
+
+from mock_server import SERVER_SEED_STRIDE
+
+MOCK_SERVER = Path(__file__).resolve().parent / "mock_server.py"
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 10.0
+PROBE_TIMEOUT = 2.0
+
+_READY = re.compile(rb"listening on ([0-9.]+):(\d+)")
+
+
+def default_server_count() -> int:
+    """CPU cores available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def probe(host: str, port: int, timeout: float = PROBE_TIMEOUT) -> bool:
+    """True if host:port answers a "state" request with a JSON object."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.sendall(b"state\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return False
+                data += chunk
+        return isinstance(json.loads(data), dict)
+    except (OSError, ValueError):
+        return False
+
+
+class _Server:
+    """One mock_server.py process; a thread drains its stdout and records the port it reports."""
+
+    def __init__(self, args: Sequence[str]):
+        self.stderr: IO[bytes] = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(
+            [sys.executable, str(MOCK_SERVER), "0", *args],
+            cwd=MOCK_SERVER.parent,
+            stdout=subprocess.PIPE,
+            stderr=self.stderr,
+        )
+        self.host = HOST
+        self.port: int | None = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self) -> None:
+        for line in self.proc.stdout:
+            if self.port is None:
+                match = _READY.search(line)
+                if match:
+                    self.host, self.port = match.group(1).decode(), int(match.group(2))
+                    self._ready.set()
+        self._ready.set()  # exited: wake wait_ready()
+
+    def wait_ready(self, deadline: float) -> None:
+        """Block until the server reported its port and answers requests; raise RuntimeError if it can't."""
+        self._ready.wait(max(0.0, deadline - time.monotonic()))
+        if self.port is None:
+            raise RuntimeError(f"mock server did not start: {self.error() or 'no ready line before timeout'}")
+        delay = 0.001
+        while not probe(self.host, self.port):
+            if self.proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"mock server on port {self.port} is not answering: {self.error()}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def error(self) -> str:
+        self.stderr.seek(0)
+        return self.stderr.read().decode("utf-8", "replace").strip()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self.alive():
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.proc.stdout.close()
+        self.stderr.close()
+
+
+class MockServerManager:
+    """
+    - start(): launch every server and wait until all are ready (in parallel); returns the addresses.
+    - addresses(n): n (host, port) pairs, round-robin over the servers (n defaults to one per server).
+    - healthy(): one probe per server; ensure(): restart the unhealthy ones, returns how many.
+    - stop(): terminate them all. Also a context manager (start on enter, stop on exit).
+    extra_args are passed to every mock_server.py (e.g. ["--workers", "2"]).
+    """
+
+    def __init__(
+        self,
+        count: int | None = None,
+        seed: int | None = 42,
+        extra_args: Sequence[str] = (),
+        startup_timeout: float = STARTUP_TIMEOUT,
+    ):
+        self.count = count if count is not None else default_server_count()
+        if self.count < 1:
+            raise ValueError("count must be >= 1")
+        self.seed = seed
+        self.extra_args = list(extra_args)
+        self.startup_timeout = startup_timeout
+        self.restarts = 0
+        self._servers: list[_Server] = []
+
+    def _args(self, i: int) -> list[str]:
+        args = list(self.extra_args)
+        if self.seed is not None:
+            args += ["--seed", str(self.seed + i * SERVER_SEED_STRIDE)]
+        return args
+
+    def start(self) -> list[tuple[str, int]]:
+        if self._servers:
+            return self.addresses()
+        self._servers = [_Server(self._args(i)) for i in range(self.count)]
+        deadline = time.monotonic() + self.startup_timeout
+        try:
+            for server in self._servers:
+                server.wait_ready(deadline)
+        except BaseException:
+            self.stop()
+            raise
+        return self.addresses()
+
+    def addresses(self, n: int | None = None) -> list[tuple[str, int]]:
+        if not self._servers:
+            raise RuntimeError("servers not started")
+        n = len(self._servers) if n is None else n
+        return [(s.host, s.port) for s in (self._servers[i % len(self._servers)] for i in range(n))]
+
+    def healthy(self) -> list[bool]:
+        return [s.alive() and probe(s.host, s.port) for s in self._servers]
+
+    def ensure(self) -> int:
+        """Restart every server that died or stopped answering. Restarted servers get new ports."""
+        restarted = 0
+        for i, ok in enumerate(self.healthy()):
+            if ok:
+                continue
+            self._servers[i].stop()
+            server = _Server(self._args(i))
+            self._servers[i] = server
+            server.wait_ready(time.monotonic() + self.startup_timeout)
+            restarted += 1
+        self.restarts += restarted
+        return restarted
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.stop()
+        self._servers = []
+
+    def __enter__(self) -> "MockServerManager":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()